@@ -2,8 +2,6 @@ import os
 import deepl
 from dotenv import load_dotenv
 import pyupbit
-import pandas as pd
-import pandas_ta as ta
 import json
 from openai import OpenAI
 import schedule
@@ -11,12 +9,23 @@ import time
 from datetime import datetime
 import traceback
 from slack_bot import send_slack_message, print_and_slack_message
+from candle_store import get_candles
+from indicator_engine import WARMUP_CANDLES, add_indicators_incremental
+from market_payload import encode_market_data, payload_size_report, prompt_encoding
+from prompt_builder import load_instructions, build_messages, prompt_usage_message, record_usage
+from market_snapshot import MarketSnapshot
+from orderbook_features import orderbook_features
+import metrics
+import http_client
+import translation_cache
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 UPBIT_ACCESS_KEY = os.getenv("UPBIT_ACCESS_KEY")
 UPBIT_SECRET_KEY = os.getenv("UPBIT_SECRET_KEY")
 GPT_MODEL = os.getenv("GPT_MODEL")
+MARKET_DATA_ENCODING = prompt_encoding(os.getenv("MARKET_DATA_ENCODING", "compact"))   # compact, relative
+MARKET_PAYLOAD_REPORT = os.getenv("MARKET_PAYLOAD_REPORT", "off") == "on"   # 사이클마다 인코딩별 크기 출력 (진단용)
 
 HOUR_INTERVAL = 4        # 작동 주기 
 MIN_TRADE_AMOUNT = 5000  # 업비트 최소 거래가능 금액(원)
@@ -25,6 +34,7 @@ FEE_RATE = 0.0005        # 업비트 수수료 0.05%
 # Setup
 client = OpenAI(api_key=OPENAI_API_KEY)
 upbit = pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
+snapshot = MarketSnapshot(upbit, "KRW-BTC")   # 사이클마다 한 번 조회한 시세/계좌
 
 # 거래 전후 상태를 저장
 pre_trade_status = {}
@@ -34,20 +44,12 @@ post_trade_status = {}
 def get_current_status():
     global pre_trade_status
 
-    orderbook = pyupbit.get_orderbook(ticker="KRW-BTC")
+    orderbook = snapshot.orderbook
     current_time = orderbook['timestamp']
-    btc_balance = 0
-    krw_balance = 0
-    btc_avg_buy_price = 0
-    current_btc_price = pyupbit.get_current_price("KRW-BTC")
-    balances = upbit.get_balances()
-
-    for b in balances:
-        if b['currency'] == "BTC":
-            btc_balance = float(b['balance'])
-            btc_avg_buy_price = float(b['avg_buy_price'])
-        if b['currency'] == "KRW":
-            krw_balance = float(b['balance'])
+    current_btc_price = snapshot.current_price
+    btc_balance = snapshot.balance("BTC")
+    btc_avg_buy_price = snapshot.avg_buy_price("BTC")
+    krw_balance = snapshot.balance("KRW")
 
     # gpt 결정 전 상태 저장 (맨 처음에만)
     if(pre_trade_status == {}):
@@ -61,7 +63,7 @@ def get_current_status():
 
     current_status = {
         "current_time": current_time,
-        "orderbook": orderbook,
+        "orderbook": orderbook_features(orderbook),   # 호가 단위 전체 대신 요약 값
         "btc_balance": btc_balance,
         "krw_balance": krw_balance,
         "btc_avg_buy_price": btc_avg_buy_price,
@@ -73,68 +75,32 @@ def get_current_status():
 
 def fetch_and_prepare_data():
     global btc_balance
-    # Fetch data
-    df_daily = pyupbit.get_ohlcv("KRW-BTC", "day", count=30)
-    df_hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-
-    # Define a helper function to add indicators
-    def add_indicators(df):
-        # Moving Averages
-        # Calculate and add SMAs for 3, 5, 10, and 20-day periods
-        df['SMA_3'] = ta.sma(df['close'], length=3)
-        df['SMA_5'] = ta.sma(df['close'], length=5)
-        df['SMA_10'] = ta.sma(df['close'], length=10)
-        df['SMA_20'] = ta.sma(df['close'], length=20)
-
-        # Calculate and add EMAs for 3, 5, 10, and 20-day periods
-        df['EMA_3'] = ta.ema(df['close'], length=3)
-        df['EMA_5'] = ta.ema(df['close'], length=5)
-        df['EMA_10'] = ta.ema(df['close'], length=10)
-        df['EMA_20'] = ta.ema(df['close'], length=20)
-
-        # RSI
-        df['RSI_14'] = ta.rsi(df['close'], length=14)
-
-        # Stochastic Oscillator
-        stoch = ta.stoch(df['high'], df['low'], df['close'], k=14, d=3, smooth_k=3)
-        df = df.join(stoch)
-
-        # MACD
-        ema_fast = df['close'].ewm(span=12, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = ema_fast - ema_slow
-        df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
-
-        # Bollinger Bands
-        df['Middle_Band'] = df['close'].rolling(window=20).mean()
-        # Calculate the standard deviation of closing prices over the last 20 days
-        std_dev = df['close'].rolling(window=20).std()
-        # Calculate the upper band (Middle Band + 2 * Standard Deviation)
-        df['Upper_Band'] = df['Middle_Band'] + (std_dev * 2)
-        # Calculate the lower band (Middle Band - 2 * Standard Deviation)
-        df['Lower_Band'] = df['Middle_Band'] - (std_dev * 2)
-
-        return df
-
-    # Add indicators to both dataframes
-    df_daily = add_indicators(df_daily)
-    df_hourly = add_indicators(df_hourly)
-
-    combined_df = pd.concat([df_daily, df_hourly], keys=['daily', 'hourly'])
-    combined_data = combined_df.to_json(orient='split')
-
-    # make combined data as string and print length
-    print(len(combined_data))
+    # Fetch data (로컬 캔들 저장소에서 새 캔들만 내려받아 사용)
+    with metrics.span("candles"):
+        # 지표 상태를 처음 만들 때 쓸 이력까지 읽음 (보내는 것은 마지막 30/24개)
+        df_daily = get_candles("KRW-BTC", "day", count=WARMUP_CANDLES + 30)
+        df_hourly = get_candles("KRW-BTC", interval="minute60", count=WARMUP_CANDLES + 24)
+
+    # Add indicators to both dataframes (새로 마감된 캔들만 지표 상태에 반영)
+    with metrics.span("indicators"):
+        df_daily = add_indicators_incremental(df_daily, ("KRW-BTC", "day"), count=30)
+        df_hourly = add_indicators_incremental(df_hourly, ("KRW-BTC", "minute60"), count=24)
+
+    frames = {'daily': df_daily, 'hourly': df_hourly}
+    with metrics.span("market_encode"):
+        combined_data = encode_market_data(frames, MARKET_DATA_ENCODING)
+
+    # 인코딩별 크기(바이트/토큰) 출력 (세 형식을 모두 인코딩하고 토큰을 세므로 켰을 때만)
+    if MARKET_PAYLOAD_REPORT:
+        print(payload_size_report(frames, MARKET_DATA_ENCODING))
 
     return combined_data
 
 
 def get_instructions(file_path):
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            instructions = file.read()
-        return instructions
+        # 수정 시각/내용 해시로 캐시된 지시문 (매 호출마다 디스크를 읽지 않음)
+        return load_instructions(file_path)
     except FileNotFoundError:
         print_and_slack_message(f"File not found : {file_path}")
     except Exception as e:
@@ -146,21 +112,27 @@ def get_instructions(file_path):
 def analyze_data_with_gpt4(data_json):
     instructions_path = "instructions.md"
     try:
-        instructions = get_instructions(instructions_path)
-        if not instructions:
-            print_and_slack_message(f"{instructions_path}을 찾을 수 없습니다.")
-            return None
-
-        current_status = get_current_status()
-        response = client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": data_json},
-                {"role": "user", "content": current_status}
-            ],
-            response_format={"type":"json_object"}
-        )
+        with metrics.span("prompt_assembly"):
+            instructions = get_instructions(instructions_path)
+            if not instructions:
+                print_and_slack_message(f"{instructions_path}을 찾을 수 없습니다.")
+                return None
+
+            current_status = get_current_status()
+            # 정적인 지시문을 맨 앞에, 자주 바뀌는 입력은 뒤에 (프롬프트 캐싱이 적중하도록)
+            messages = build_messages(instructions, [
+                ("JSON Data 1: Market Analysis Data", data_json),
+                ("JSON Data 2: Current Investment State", current_status),
+            ])
+        metrics.inc("api_calls", service="api.openai.com")
+        with metrics.span("model_call"):
+            response = client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=messages,
+                response_format={"type":"json_object"}
+            )
+        record_usage(response.usage)
+        print(prompt_usage_message(response.usage))
         return response.choices[0].message.content
     except Exception as e:
         print_and_slack_message(f":bug: `gpt 분석 중 예상치 못한 오류가 발생했습니다:`\n```{e}```")
@@ -170,12 +142,14 @@ def analyze_data_with_gpt4(data_json):
 def execute_buy(percentage=1.00):  # 보유 원화 기준
     print(f"보유 원화의 {percentage * 100}% 만큼 매수를 시도합니다...")
     try:
-        krw = upbit.get_balance("KRW")
+        krw = snapshot.balance("KRW")
         amount_to_buy = krw * percentage
         if amount_to_buy > MIN_TRADE_AMOUNT:
+            metrics.inc("api_calls", service="api.upbit.com")
             result = upbit.buy_market_order("KRW-BTC", amount_to_buy * (1 - FEE_RATE))
             if result is None or 'error' in result:  # 매수 주문 실패를 확인
                 raise Exception(f"매수 주문 실패: 반환 결과 없음 또는 오류 발생\n{result}")
+            snapshot.invalidate_account()   # 주문 후 잔고는 다음에 읽을 때 다시 조회
             print(f"**Buy order successful**\n```{result}```")
         else: 
             raise Exception(f"매수 최소 금액 미달: 필요 : {MIN_TRADE_AMOUNT}, 매수 금액 : {amount_to_buy}")
@@ -186,16 +160,18 @@ def execute_sell(percentage=1.00):   # 보유 BTC 기준
     print('percentage', percentage)
     print(f"보유 BTC의 {percentage * 100}% 만큼 매도를 시도합니다...")
     try:
-        btc = upbit.get_balance("BTC")
-        current_price = pyupbit.get_current_price("KRW-BTC")
+        btc = snapshot.balance("BTC")
+        current_price = snapshot.current_price
         
         # 보유량과 계산된 매도량 중 더 작은 값을 매도량으로 설정
         amount_to_sell = min(btc, btc * percentage)
 
         if amount_to_sell * current_price > MIN_TRADE_AMOUNT:
+            metrics.inc("api_calls", service="api.upbit.com")
             result = upbit.sell_market_order("KRW-BTC", amount_to_sell)
             if result is None:
                 raise Exception("매도 주문 실패: 반환 결과 없음")
+            snapshot.invalidate_account()   # 주문 후 잔고는 다음에 읽을 때 다시 조회
             print(f"**Sell order successful**\n```{result}```")
         else:
             raise Exception(f"매도 최소 금액 미달: 필요 : {MIN_TRADE_AMOUNT}, 현재 : {amount_to_sell * current_price}")
@@ -204,26 +180,37 @@ def execute_sell(percentage=1.00):   # 보유 BTC 기준
 
 
 def make_decision_and_execute():
+    # 사이클 전체와 단계별 시간을 메트릭에 기록 (METRICS_PORT 엔드포인트 / METRICS_DB 저장)
+    with metrics.cycle():
+        _decide_and_execute()
+    print(metrics.format_cycle(metrics.last_cycle()))
+
+
+def _decide_and_execute():
     print("결정을 내리고 실행 중...")
-    data_json = fetch_and_prepare_data()
+    snapshot.invalidate()   # 이번 사이클의 시세/계좌는 처음 필요할 때 한 번만 조회
+    with metrics.span("data_fetch"):
+        data_json = fetch_and_prepare_data()
     advice = analyze_data_with_gpt4(data_json)
 
     try:
-        decisions = json.loads(advice)
+        with metrics.span("json_parse"):
+            decisions = json.loads(advice)
         decision   = decisions.get('decision')
         reason     = decisions.get('reason')
         percentage = float(decisions.get('percentage'))
 
-        translated_reason = translate_to_korean(reason)
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         suff_message = ""
         if decision == "buy":
-            execute_buy(percentage)
+            with metrics.span("order"):
+                execute_buy(percentage)
             suff_message = f"- :moneybag: {int(percentage * 100)}% 매수! :moneybag:"
 
         elif decision == "sell":
-            execute_sell(percentage)
+            with metrics.span("order"):
+                execute_sell(percentage)
             suff_message = f"- :money_with_wings: {int(percentage * 100)}% 매도! :money_with_wings:"
 
         elif decision == "hold":
@@ -233,11 +220,15 @@ def make_decision_and_execute():
             suff_message = "- :thinking_face: 결정을 내릴 수 없습니다 :thinking_face:"
 
 
+        # 번역은 주문 이후에 수행해 주문이 번역 응답을 기다리지 않게 함
+        with metrics.span("translation"):
+            translated_reason = translate_to_korean(reason)
         detailed_message = f"[{current_time}]\n{suff_message}\n- 이유:\n{translated_reason}"
         print_and_slack_message(detailed_message)
 
         # gpt 결정 후 상태 비교 및 메시지 전송
-        compare_trade_status()
+        with metrics.span("status_compare"):
+            compare_trade_status()
 
     except Exception as e:
         print_and_slack_message(f"Failed to parse the advice as JSON: {e}")
@@ -254,22 +245,14 @@ def schedule_tasks(hour_interval):
 
 def translate_to_korean(text):
     try:
-        api_key = os.getenv("DEEPL_API_KEY")
-        if not api_key:
-            raise ValueError("DeepL API 키가 설정되지 않았습니다.")
-        
-        translator = deepl.Translator(api_key)
-        translated_text = translator.translate_text(text, target_lang="KO").text
-        return translated_text
-    except ValueError as e:
-        print(f"DeepL 환경 변수가 설정되지 않았을 수 있습니다: {e}")
-        return translated_text  # API 키 문제 등으로 번역에 실패한 경우 원문 반환
+        # 디스크 번역 캐시에 있으면 DeepL을 호출하지 않음 (API 키가 없으면 원문 그대로)
+        return translation_cache.translate(text, target_lang="KO")
     except deepl.DeepLException as e:
         print(f"DeepL API 호출 중 오류 발생: {e}")
-        return translated_text  # DeepL 관련 오류가 발생한 경우 원문 반환
+        return text  # DeepL 관련 오류가 발생한 경우 원문 반환
     except Exception as e:
         print(f"번역 중 예기치 않은 오류 발생: {e}")
-        return translated_text  # 기타 예외 처리
+        return text  # 기타 예외 처리
     
 
 def format_value_change(pre_value, post_value, format_str="{:,.0f}", suffix=""):   # 천 단위 구분자(,), 소수점 X
@@ -284,11 +267,11 @@ def compare_trade_status():
     global pre_trade_status
     global post_trade_status
 
-    # 잔고 정보를 가져옵니다.
-    krw_balance = upbit.get_balance("KRW")
-    btc_balance = upbit.get_balance("BTC")
-    btc_avg_buy_price = upbit.get_avg_buy_price("BTC")
-    current_btc_price = pyupbit.get_current_price("KRW-BTC")
+    # 잔고 정보를 가져옵니다. (주문이 있었다면 스냅샷이 잔고만 다시 조회)
+    krw_balance = snapshot.balance("KRW")
+    btc_balance = snapshot.balance("BTC")
+    btc_avg_buy_price = snapshot.avg_buy_price("BTC")
+    current_btc_price = snapshot.current_price
 
     # 비트코인 평가금액
     btc_valuation = btc_balance * current_btc_price # 비트코인 평가금액
@@ -326,6 +309,8 @@ def compare_trade_status():
 
 ############ 메인 함수 ############
 if __name__ == "__main__":
+    metrics.start_from_env()
+    http_client.configure_deepl()   # deepl 재시도/타임아웃 (프로세스 전역 설정)
     # make_decision_and_execute()
     schedule_tasks(HOUR_INTERVAL)
 
@@ -1,152 +1,231 @@
 import os
-import deepl
+import argparse
+import threading
 from dotenv import load_dotenv
-import pyupbit
-import pandas as pd
-import pandas_ta as ta
 import json
-from openai import OpenAI
-import schedule
 import time
 import requests
+import http_client
 from datetime import datetime
-import sqlite3
 import traceback
 from slack_bot import send_slack_message, print_and_slack_message
+from market_payload import encode_market_data, payload_size_report, prompt_encoding
+from prompt_builder import load_instructions, build_messages, prompt_usage_message, record_usage, estimate_request_tokens
+from model_scheduler import ModelScheduler
+from order_client import OrderClient, OrderFailed, size_buy, size_sell
+from market_snapshot import MarketSnapshot
+from market_stream import MarketStream
+from portfolio import AnalysisScheduler, parse_markets, currency_of
+from cycle_runner import CycleRunner, daily_times
+import metrics
+import decisions_store
+import translation_cache
+import news_store
+from functools import partial
+from stage_executor import run_stages, format_stage_timings
+# pandas/numpy를 쓰는 모듈(candle_store, indicator_engine, trigger_engine)과 openai, pyupbit, deepl은
+# 처음 쓸 때 import합니다. (import만 하는 테스트, 한 번 실행, 재시작이 전체 import 비용을 치르지 않음)
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 UPBIT_ACCESS_KEY = os.getenv("UPBIT_ACCESS_KEY")
 UPBIT_SECRET_KEY = os.getenv("UPBIT_SECRET_KEY")
 GPT_MODEL = os.getenv("GPT_MODEL")
-
-HOUR_INTERVAL = 8        # 작동 주기 
+MARKET_DATA_ENCODING = prompt_encoding(os.getenv("MARKET_DATA_ENCODING", "compact"))   # compact, relative
+MARKET_PAYLOAD_REPORT = os.getenv("MARKET_PAYLOAD_REPORT", "off") == "on"   # 사이클마다 인코딩별 크기 출력 (진단용)
+MARKETS = parse_markets(os.getenv("MARKETS", "KRW-BTC"))                 # 운용할 마켓 (쉼표 구분)
+MAX_ANALYSES_PER_CYCLE = int(os.getenv("MAX_ANALYSES_PER_CYCLE", "0")) or None   # 사이클당 분석할 최대 마켓 수 (0: 전부)
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "4"))   # 동시에 진행할 모델 호출 수
+MODEL_RPM = int(os.getenv("MODEL_RPM", "0")) or None                   # 분당 모델 요청 한도 (0: 제한 없음)
+MODEL_TPM = int(os.getenv("MODEL_TPM", "0")) or None                   # 분당 모델 토큰 한도 (0: 제한 없음)
+USE_MARKET_STREAM = os.getenv("MARKET_STREAM", "on") != "off"          # WebSocket으로 시세를 메모리에 유지
+
+HOUR_INTERVAL = 8        # 작동 주기 (TRIGGER_MODE=event에서는 조건이 없을 때의 최대 대기 시간)
+TRIGGER_MODE = os.getenv("TRIGGER_MODE", "event")   # event: 시장 조건이 맞을 때만 실행, schedule: HOUR_INTERVAL마다 실행
+TRIGGER_CHECK_SECONDS = 30                          # 트리거 조건 확인 주기
+MIN_CYCLE_GAP_MINUTES = int(os.getenv("MIN_CYCLE_GAP_MINUTES", "15"))   # 사이클 사이 최소 간격
+MISSED_RUN_POLICY = os.getenv("MISSED_RUN_POLICY", "once")   # 꺼져 있던 동안 놓친 정기 실행: once(한 번 보충), skip
+SCHEDULER_STATE_PATH = 'scheduler_state.json'                # 마지막 실행/소요 시간/다음 실행 시각
+NEWS_WAIT_SECONDS = float(os.getenv("NEWS_WAIT_SECONDS", "5"))   # 뉴스 응답을 기다리는 시간(초), 넘으면 저장된 뉴스 사용
 MIN_TRADE_AMOUNT = 5000  # 업비트 최소 거래가능 금액(원)
 FEE_RATE = 0.0005        # 업비트 수수료 0.05%
 
 # Setup
-client = OpenAI(api_key=OPENAI_API_KEY)
-upbit = pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
+# 클라이언트와 무거운 객체는 처음 쓸 때 만듭니다. (get_client, get_upbit, get_model_scheduler, get_trigger_engine)
+# 테스트/하네스가 미리 넣어 둔 값이 있으면 그대로 사용합니다.
+client = None
+upbit = None
+model_scheduler = None
+trigger_engine = None
+trigger_candles = None
+order_client = None
+_lazy_lock = threading.Lock()
+_order_lock = threading.Lock()   # 마켓별 결정이 동시에 나와도 주문은 하나씩 (원화 잔고를 함께 씀)
+market_stream = MarketStream(MARKETS)         # 실행 시 start() (연결 전/끊긴 동안에는 REST 조회로 대신)
+snapshot = MarketSnapshot(lambda: get_upbit(), MARKETS, stream=market_stream)   # 사이클마다 한 번 조회한 시세/계좌 (모든 마켓을 묶어서 조회)
+scheduler = AnalysisScheduler(MARKETS, MAX_ANALYSES_PER_CYCLE)
+
+
+def _lazy(name, factory):
+    value = globals()[name]
+    if value is None:
+        with _lazy_lock:
+            value = globals()[name]
+            if value is None:
+                value = globals()[name] = factory()
+    return value
+
+
+def _create_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY, max_retries=0)   # 재시도는 model_scheduler가 한도를 지키며 수행
+
+
+def _create_upbit():
+    import pyupbit
+    return pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
+
+
+def _create_model_scheduler():
+    import openai
+    return ModelScheduler(
+        lambda **request: get_client().chat.completions.create(**request),
+        max_concurrency=MODEL_MAX_CONCURRENCY,
+        requests_per_minute=MODEL_RPM,
+        tokens_per_minute=MODEL_TPM,
+        retry_on=(openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError),
+    )
+
+
+def _create_trigger_engine():
+    from trigger_engine import TriggerEngine
+    return TriggerEngine(min_gap=MIN_CYCLE_GAP_MINUTES * 60, max_quiet=HOUR_INTERVAL * 3600)
+
+
+def _create_trigger_candles():
+    from candle_store import get_candles
+    from trigger_engine import CandleCache, closed_candles, CANDLE_COUNT
+    return CandleCache(lambda ticker: closed_candles(get_candles(ticker, "minute60", CANDLE_COUNT + 1)))
+
+
+def _create_order_client():
+    return OrderClient(get_upbit)   # 서명은 pyupbit.Upbit, 요청은 http_client의 공유 연결로
+
+
+def get_client():
+    return _lazy("client", _create_client)
+
+
+def get_upbit():
+    return _lazy("upbit", _create_upbit)
+
 
-# 거래 전후 상태를 저장
+def get_model_scheduler():
+    return _lazy("model_scheduler", _create_model_scheduler)
+
+
+def get_order_client():
+    return _lazy("order_client", _create_order_client)
+
+
+def get_trigger_engine():
+    return _lazy("trigger_engine", _create_trigger_engine)
+
+
+def get_trigger_candles():
+    return _lazy("trigger_candles", _create_trigger_candles)
+
+
+# 거래 전후 상태를 마켓별로 저장
 pre_trade_status = {}
 post_trade_status = {}
 
 def initialize_db(db_path='trading_decisions.sqlite'):
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS decisions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME,
-                decision TEXT,
-                percentage REAL,
-                reason TEXT,
-                btc_balance REAL,
-                krw_balance REAL,
-                btc_avg_buy_price REAL,
-                btc_krw_price REAL
-            );
-        ''')
-        conn.commit()
-
-def save_decision_to_db(decisions, current_status, translated_reason):
+    # 테이블/인덱스 생성과 스키마 마이그레이션은 decisions_store가 연결을 열 때 수행
+    decisions_store.get_store(db_path)
+
+def save_decision_to_db(decisions, current_status, translated_reason, ticker="KRW-BTC"):
     db_path = 'trading_decisions.sqlite'
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-    
-        # Parsing current_status from JSON to Python dict
-        status_dict = json.loads(current_status)
-        current_price = pyupbit.get_orderbook(ticker="KRW-BTC")['orderbook_units'][0]["ask_price"]
-
-        # Preparing data for insertion
-        data_to_insert = (
-            decisions.get('decision'),
-            decisions.get('percentage', 100),  # Defaulting to 100 if not provided
-            translated_reason,
-            status_dict.get('btc_balance'),
-            status_dict.get('krw_balance'),
-            status_dict.get('btc_avg_buy_price'),
-            current_price
-        )
-        
-        # Inserting data into the database
-        cursor.execute('''
-            INSERT INTO decisions (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price)
-            VALUES (datetime('now', 'localtime'), ?, ?, ?, ?, ?, ?, ?)
-        ''', data_to_insert)
-    
-        conn.commit()
-
-def fetch_last_decisions(db_path='trading_decisions.sqlite', num_decisions=10):
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price FROM decisions
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (num_decisions,))
-        decisions = cursor.fetchall()
-
-        if decisions:
-            formatted_decisions = []
-            for decision in decisions:
-                # Converting timestamp to milliseconds since the Unix epoch
-                ts = datetime.strptime(decision[0], "%Y-%m-%d %H:%M:%S")
-                ts_millis = int(ts.timestamp() * 1000)
-                
-                formatted_decision = {
-                    "timestamp": ts_millis,
-                    "decision": decision[1],
-                    "percentage": decision[2],
-                    "reason": decision[3],
-                    "btc_balance": decision[4],
-                    "krw_balance": decision[5],
-                    "btc_avg_buy_price": decision[6]
-                }
-                formatted_decisions.append(str(formatted_decision))
-            return "\n".join(formatted_decisions)
-        else:
-            return "No decisions found."
+    store = decisions_store.get_store(db_path)   # 매번 새로 연결하지 않고 같은 연결을 재사용
+    coin = currency_of(ticker).lower()
+
+    # Parsing current_status from JSON to Python dict
+    status_dict = json.loads(current_status)
+    current_price = snapshot.ask_price_for(ticker)
+
+    # Inserting data into the database (btc_* 컬럼에는 해당 마켓 코인의 값을 저장)
+    store.save(
+        decisions.get('decision'),
+        decisions.get('percentage', 100),  # Defaulting to 100 if not provided
+        translated_reason,
+        status_dict.get(f'{coin}_balance'),
+        status_dict.get('krw_balance'),
+        status_dict.get(f'{coin}_avg_buy_price'),
+        current_price,
+        market=ticker,
+    )
+
+def fetch_last_decisions(db_path='trading_decisions.sqlite', num_decisions=10, ticker=None):
+    decisions = decisions_store.get_store(db_path).last_decisions(num_decisions, market=ticker)
+    # 현재 상태(get_current_status)와 같은 키 이름 (market, {coin}_balance, {coin}_avg_buy_price)
+    market = ticker or "KRW-BTC"
+    coin = currency_of(market).lower()
+    if decisions:
+        formatted_decisions = []
+        for decision in decisions:
+            # Converting timestamp to milliseconds since the Unix epoch
+            ts = datetime.strptime(decision[0], "%Y-%m-%d %H:%M:%S")
+            ts_millis = int(ts.timestamp() * 1000)
+            
+            formatted_decision = {
+                "market": market,
+                "timestamp": ts_millis,
+                "decision": decision[1],
+                "percentage": decision[2],
+                "reason": decision[3],
+                f"{coin}_balance": decision[4],
+                "krw_balance": decision[5],
+                f"{coin}_avg_buy_price": decision[6]
+            }
+            formatted_decisions.append(str(formatted_decision))
+        return "\n".join(formatted_decisions)
+    else:
+        return "No decisions found."
 
-def get_current_status():
-    global pre_trade_status
+def get_current_status(ticker="KRW-BTC"):
+    from orderbook_features import orderbook_features   # numpy를 쓰므로 첫 사이클에서 import
+
+    currency = currency_of(ticker)
+    coin = currency.lower()
 
     try:
-        # 업비트의 주문장부 정보
-        orderbook = pyupbit.get_orderbook(ticker="KRW-BTC")
+        # 업비트의 주문장부 정보 (사이클 스냅샷)
+        orderbook = snapshot.orderbook_for(ticker)
         current_time = orderbook['timestamp']
-        btc_balance = 0
-        krw_balance = 0
-        btc_avg_buy_price = 0
-        
-        # 현재 비트코인의 가격 조회
-        current_btc_price = pyupbit.get_current_price("KRW-BTC")
-        balances = upbit.get_balances()
-
-        for b in balances:
-            if b['currency'] == "BTC":
-                btc_balance = float(b['balance'])
-                btc_avg_buy_price = float(b['avg_buy_price'])
-            if b['currency'] == "KRW":
-                krw_balance = float(b['balance'])
-
-        # gpt 결정 전 상태 저장 (맨 처음 실행할 때만)
-        if pre_trade_status == {}:
-            pre_trade_status = {
+
+        # 현재 코인의 가격과 잔고
+        current_btc_price = snapshot.price_for(ticker)
+        btc_balance = snapshot.balance(currency)
+        btc_avg_buy_price = snapshot.avg_buy_price(currency)
+        krw_balance = snapshot.balance("KRW")
+
+        # gpt 결정 전 상태 저장 (마켓별로 맨 처음 실행할 때만)
+        if ticker not in pre_trade_status:
+            pre_trade_status[ticker] = {
                 "krw_balance": krw_balance,
                 "btc_balance": btc_balance,
                 "avg_buy_price": btc_avg_buy_price,
-                "btc_valuation": btc_balance * current_btc_price,  # 비트코인 평가 금액
+                "btc_valuation": btc_balance * current_btc_price,  # 코인 평가 금액
                 "total_assets": krw_balance + (btc_balance * btc_avg_buy_price),  # 총 자산
             }
 
         current_status = {
+            "market": ticker,
             "current_time": current_time,
-            "orderbook": orderbook,
-            "btc_balance": btc_balance,
+            "orderbook": orderbook_features(orderbook),   # 호가 단위 전체 대신 요약 값
+            f"{coin}_balance": btc_balance,
             "krw_balance": krw_balance,
-            "btc_avg_buy_price": btc_avg_buy_price,
+            f"{coin}_avg_buy_price": btc_avg_buy_price,
         }
 
         return json.dumps(current_status)
@@ -156,93 +235,49 @@ def get_current_status():
 
 
 
-def fetch_and_prepare_data():
+def fetch_and_prepare_data(ticker="KRW-BTC"):
     global btc_balance
-    # Fetch data
-    df_daily = pyupbit.get_ohlcv("KRW-BTC", "day", count=30)
-    df_hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-
-    # Define a helper function to add indicators
-    def add_indicators(df):
-        # Moving Averages
-        # Calculate and add SMAs for 3, 5, 10, and 20-day periods
-        df['SMA_3'] = ta.sma(df['close'], length=3)
-        df['SMA_5'] = ta.sma(df['close'], length=5)
-        df['SMA_10'] = ta.sma(df['close'], length=10)
-        df['SMA_20'] = ta.sma(df['close'], length=20)
-
-        # Calculate and add EMAs for 3, 5, 10, and 20-day periods
-        df['EMA_3'] = ta.ema(df['close'], length=3)
-        df['EMA_5'] = ta.ema(df['close'], length=5)
-        df['EMA_10'] = ta.ema(df['close'], length=10)
-        df['EMA_20'] = ta.ema(df['close'], length=20)
-
-        # RSI
-        df['RSI_14'] = ta.rsi(df['close'], length=14)
-
-        # Stochastic Oscillator
-        stoch = ta.stoch(df['high'], df['low'], df['close'], k=14, d=3, smooth_k=3)
-        df = df.join(stoch)
-
-        # MACD
-        ema_fast = df['close'].ewm(span=12, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = ema_fast - ema_slow
-        df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
-
-        # Bollinger Bands
-        df['Middle_Band'] = df['close'].rolling(window=20).mean()
-        # Calculate the standard deviation of closing prices over the last 20 days
-        std_dev = df['close'].rolling(window=20).std()
-        # Calculate the upper band (Middle Band + 2 * Standard Deviation)
-        df['Upper_Band'] = df['Middle_Band'] + (std_dev * 2)
-        # Calculate the lower band (Middle Band - 2 * Standard Deviation)
-        df['Lower_Band'] = df['Middle_Band'] - (std_dev * 2)
-
-        return df
-
-    # Add indicators to both dataframes
-    df_daily = add_indicators(df_daily)
-    df_hourly = add_indicators(df_hourly)
-
-    combined_df = pd.concat([df_daily, df_hourly], keys=['daily', 'hourly'])
-    combined_data = combined_df.to_json(orient='split')
-
-    # make combined data as string and print length
-    print(len(combined_data))
+    from candle_store import get_candles
+    from indicator_engine import WARMUP_CANDLES, add_indicators_incremental
+
+    # Fetch data (로컬 캔들 저장소에서 새 캔들만 내려받아 사용)
+    with metrics.span("candles"):
+        # 지표 상태를 처음 만들 때 쓸 이력까지 읽음 (보내는 것은 마지막 30/24개)
+        df_daily = get_candles(ticker, "day", count=WARMUP_CANDLES + 30)
+        df_hourly = get_candles(ticker, interval="minute60", count=WARMUP_CANDLES + 24)
+
+    # Add indicators to both dataframes (새로 마감된 캔들만 지표 상태에 반영)
+    with metrics.span("indicators"):
+        df_daily = add_indicators_incremental(df_daily, (ticker, "day"), count=30)
+        df_hourly = add_indicators_incremental(df_hourly, (ticker, "minute60"), count=24)
+
+    frames = {'daily': df_daily, 'hourly': df_hourly}
+    with metrics.span("market_encode"):
+        combined_data = encode_market_data(frames, MARKET_DATA_ENCODING)
+
+    # 인코딩별 크기(바이트/토큰) 출력 (세 형식을 모두 인코딩하고 토큰을 세므로 켰을 때만)
+    if MARKET_PAYLOAD_REPORT:
+        print(payload_size_report(frames, MARKET_DATA_ENCODING))
 
     return combined_data
 
 def get_news_data():
     ### Get news data from SERPAPI
-    url = "https://serpapi.com/search.json?engine=google_news&q=btc&api_key=" + os.getenv("SERPAPI_API_KEY")
-
+    # 저장소에 쌓아 두고 지난 사이클 이후의 새 기사와 최근 기사 몇 개만 보냄. 응답이 늦으면 저장된 기사 사용
     result = "No news data available."
 
     try:
-        response = requests.get(url)
-        news_results = response.json()['news_results']
-
-        simplified_news = []
-        
-        for news_item in news_results:
-            # Check if this news item contains 'stories'
-            if 'stories' in news_item:
-                for story in news_item['stories']:
-                    timestamp = int(datetime.strptime(story['date'], '%m/%d/%Y, %H:%M %p, %z %Z').timestamp() * 1000)
-                    simplified_news.append((story['title'], story.get('source', {}).get('name', 'Unknown source'), timestamp))
-            else:
-                # Process news items that are not categorized under stories but check date first
-                if news_item.get('date'):
-                    timestamp = int(datetime.strptime(news_item['date'], '%m/%d/%Y, %H:%M %p, %z %Z').timestamp() * 1000)
-                    simplified_news.append((news_item['title'], news_item.get('source', {}).get('name', 'Unknown source'), timestamp))
-                else:
-                    simplified_news.append((news_item['title'], news_item.get('source', {}).get('name', 'Unknown source'), 'No timestamp provided'))
-        result = str(simplified_news)
+        fetch = partial(news_store.fetch_google_news, os.getenv("SERPAPI_API_KEY"))
+        if not news_store.refresh(fetch, wait=NEWS_WAIT_SECONDS):
+            print(f"뉴스 응답이 {NEWS_WAIT_SECONDS}초 안에 오지 않아 저장된 뉴스를 사용합니다.")
     except Exception as e:
         print_and_slack_message(f"Error fetching news data: {e}")
 
+    try:
+        result = news_store.format_news(*news_store.select())
+    except Exception as e:
+        print_and_slack_message(f"Error reading stored news: {e}")
+
     return result
 
 def fetch_fear_and_greed_index(limit=1, date_format=''):
@@ -263,7 +298,7 @@ def fetch_fear_and_greed_index(limit=1, date_format=''):
            'format': 'json',
            'date_format': date_format
        }
-       response = requests.get(base_url, params=params)
+       response = http_client.get(base_url, params=params)
        response.raise_for_status() # 네트워크 오류나 HTTP 응답 상태 코드가 4xx, 5xx인 경우 예외를 발생시킵니다.
        myData = response.json().get('data', [])
        if not myData: # 데이터가 비어있는 경우
@@ -283,140 +318,270 @@ def fetch_fear_and_greed_index(limit=1, date_format=''):
 
 def get_instructions(file_path):
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            instructions = file.read()
-        return instructions
+        # 수정 시각/내용 해시로 캐시된 지시문 (매 호출, 매 재시도마다 디스크를 읽지 않음)
+        return load_instructions(file_path)
     except FileNotFoundError:
         print("File not found.")
     except Exception as e:
         print("An error occurred while reading the file:", e)
 
-def analyze_data_with_gpt4(news_data, data_json, last_decisions, fear_and_greed, current_status):
+def analyze_data_with_gpt4(news_data, data_json, last_decisions, fear_and_greed, current_status, priority=0):
     instructions_path = "instructions_v2.md"
     try:
-        instructions = get_instructions(instructions_path)
-        if not instructions:
-            print_and_slack_message(f"{instructions_path}을 찾을 수 없습니다.")
-            return None
-        
-        current_status = get_current_status()
-        response = client.chat.completions.create(
+        with metrics.span("prompt_assembly"):
+            instructions = get_instructions(instructions_path)
+            if not instructions:
+                print_and_slack_message(f"{instructions_path}을 찾을 수 없습니다.")
+                return None
+
+            # 정적인 지시문을 맨 앞에, 입력 데이터는 덜 바뀌는 것부터 (프롬프트 캐싱이 적중하도록)
+            messages = build_messages(instructions, [
+                ("Data 4: Fear and Greed Index", fear_and_greed),
+                ("Data 3: Previous Decisions", last_decisions),
+                ("Data 1: Crypto News", news_data),
+                ("Data 2: Market Analysis", data_json),
+                ("Data 5: Current Investment State", current_status),
+            ])
+        # 동시 실행 수와 분당 요청/토큰 한도 안에서 우선순위 순서로 실행 (큐 대기와 모델 응답 시간은 따로 기록)
+        future = get_model_scheduler().submit(
+            priority=priority,
+            estimated_tokens=estimate_request_tokens(messages),
             model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": news_data},
-                {"role": "user", "content": data_json},
-                {"role": "user", "content": last_decisions},
-                {"role": "user", "content": fear_and_greed},
-                {"role": "user", "content": current_status}
-            ],
+            messages=messages,
             response_format={"type":"json_object"}
         )
+        response = future.result()
         advice = response.choices[0].message.content
-        print(f"GPT4 분석됨..")
+        record_usage(response.usage)
+        print(f"GPT4 분석됨.. (대기 {future.queue_wait * 1000:.0f}ms, 응답 {future.model_latency * 1000:.0f}ms) {prompt_usage_message(response.usage)}")
         return advice
     except Exception as e:
         print_and_slack_message(f":bug: `gpt 분석 중 예상치 못한 오류가 발생했습니다:`\n```{e}```")
         print(traceback.format_exc())
         return None
 
-def execute_buy(percentage):
-    print(f"보유 원화의 {percentage}% 만큼 매수를 시도합니다...")
+def execute_buy(percentage, ticker="KRW-BTC", decided_at=None):
+    print(f"보유 원화의 {percentage}% 만큼 {ticker} 매수를 시도합니다...")
     try:
-        krw_balance = upbit.get_balance("KRW")
-        amount_to_invest = krw_balance * (percentage / 100)
-        if amount_to_invest > MIN_TRADE_AMOUNT:
-            result = upbit.buy_market_order("KRW-BTC", amount_to_invest * (1 - FEE_RATE))
-            if result is None or 'error' in result:  # 매수 주문 실패를 확인
-                raise Exception(f"매수 주문 실패: 반환 결과 없음 또는 오류 발생\n{result}")
-            print(f"**Buy order successful**\n```{result}```")
-        else: 
-            raise Exception(f"매수 최소 금액 미달: 필요 : {MIN_TRADE_AMOUNT}, 매수 금액 : {amount_to_invest}")
+        # 이미 가진 잔고로 금액을 정하고 확인한 뒤 주문 요청 한 번만 보냄
+        amount = size_buy(snapshot.balance("KRW"), percentage, MIN_TRADE_AMOUNT, FEE_RATE)
+        result = get_order_client().buy_market(ticker, amount, decided_at)
+        print(f"**Buy order successful** ({_order_latency_message()})\n```{result}```")
+        return _track_fill(result)
+    except OrderFailed as e:
+        print_and_slack_message(f"**:bug: 매수 주문 실패**\n```매수 주문 실패: 오류 발생\n{e}```")
     except Exception as e:
         print_and_slack_message(f"**:bug: 매수 주문 실패**\n```{e}```")
 
-def execute_sell(percentage):
+def execute_sell(percentage, ticker="KRW-BTC", decided_at=None):
     print('percentage', percentage)
-    print(f"보유 BTC의 {percentage * 100}% 만큼 매도를 시도합니다...")
+    print(f"보유 {currency_of(ticker)}의 {percentage * 100}% 만큼 매도를 시도합니다...")
     try:
-        btc_balance = upbit.get_balance("BTC")
-        amount_to_sell = btc_balance * (percentage / 100)
-        current_price = pyupbit.get_orderbook(ticker="KRW-BTC")['orderbook_units'][0]["ask_price"]
-        if current_price * amount_to_sell > MIN_TRADE_AMOUNT:
-            result = upbit.sell_market_order("KRW-BTC", amount_to_sell)
-            if result is None:
-                raise Exception("매도 주문 실패: 반환 결과 없음")
-            print(f"**Sell order successful**\n```{result}```")
-        else:
-            raise Exception(f"매도 최소 금액 미달: 필요 : {MIN_TRADE_AMOUNT}, 현재 : {amount_to_sell * current_price}")
+        # 이미 가진 잔고와 호가(WebSocket/사이클 스냅샷)로 수량을 정하고 확인한 뒤 주문 요청 한 번만 보냄
+        volume = size_sell(snapshot.balance(currency_of(ticker)), percentage, snapshot.ask_price_for(ticker), MIN_TRADE_AMOUNT)
+        result = get_order_client().sell_market(ticker, volume, decided_at)
+        print(f"**Sell order successful** ({_order_latency_message()})\n```{result}```")
+        return _track_fill(result)
+    except OrderFailed as e:
+        print_and_slack_message(f"**:bug: 매도 주문 실패**\n```매도 주문 실패: 오류 발생\n{e}```")
     except Exception as e:
         print_and_slack_message(f"**:bug: 매도 주문 실패**\n```{e}```")
 
-def make_decision_and_execute():
+def _track_fill(order):
+    """
+    주문 uuid로 체결을 확인해 잔고/평균 매수가를 체결 내역으로 갱신하고 Fill을 돌려줍니다.
+    체결을 확인하지 못하면 잔고를 다음에 읽을 때 다시 조회하도록 하고 None을 돌려줍니다.
+    """
+    try:
+        fill = get_order_client().wait_for_fill(order['uuid'])
+    except Exception as e:
+        print(f"체결 확인 실패: {e}")
+        fill = None
+    if fill is None or not fill.done:
+        snapshot.invalidate_account()
+        return None
+    snapshot.apply_fill(fill)
+    print(f"체결: {fill}")
+    return fill
+
+def _order_latency_message():
+    latency = get_order_client().last_latency
+    return "결정 후 주문까지 -" if latency is None else f"결정 후 주문까지 {latency * 1000:.0f}ms"
+
+def make_decision_and_execute(urgent_markets=()):
+    # 사이클 전체와 단계별 시간을 메트릭에 기록 (METRICS_PORT 엔드포인트 / METRICS_DB 저장)
+    with metrics.cycle():
+        _decide_and_execute(urgent_markets)
+    print(metrics.format_cycle(metrics.last_cycle()))
+
+
+def _decide_and_execute(urgent_markets=()):
     print("결정을 내리고 실행 중...")
+    snapshot.invalidate()   # 이번 사이클의 시세/계좌는 처음 필요할 때 한 번만 조회
     try:
-        news_data = get_news_data()
-        data_json = fetch_and_prepare_data()
-        last_decisions = fetch_last_decisions()
-        fear_and_greed = fetch_fear_and_greed_index(limit=30)
-        current_status = get_current_status()
+        # 이번 사이클에 분석할 마켓 (여러 마켓이면 묶음 시세 조회 결과와 트리거 조건이 맞은 마켓으로 우선순위를 정함)
+        markets = scheduler.select(snapshot.prices(), urgent_markets) if len(MARKETS) > 1 else list(MARKETS)
+
+        # 뉴스, 공포/탐욕 지수는 모든 마켓이 함께 쓰고, 시세 데이터/과거 결정/현재 상태는 마켓마다 준비
+        stages = {
+            "news_data":      (get_news_data, ()),
+            "fear_and_greed": (lambda: fetch_fear_and_greed_index(limit=30), ()),
+            # 주문 때 새 연결(TCP/TLS)을 맺지 않도록 업비트 주문 연결을 미리 열어 둠
+            "order_connection": (partial(get_order_client().warm_up, markets[0]), ()),
+        }
+        for ticker in markets:
+            stages[_stage_name("data_json", ticker)] = (partial(fetch_and_prepare_data, ticker), ())
+            stages[_stage_name("last_decisions", ticker)] = (partial(fetch_last_decisions, ticker=ticker), ())
+            stages[_stage_name("current_status", ticker)] = (partial(get_current_status, ticker), ())
+
+        # 서로 의존하지 않는 데이터 수집 단계들은 동시에 실행
+        started = time.perf_counter()
+        with metrics.span("data_fetch"):
+            results, timings = run_stages(stages)
+        for name, seconds in timings.items():
+            metrics.record_span(f"data_fetch.{name}", seconds)
+        print(format_stage_timings(timings, total=time.perf_counter() - started))
+        print(http_client.format_connection_stats())
     except Exception as e:
             print_and_slack_message(f"Error: {e}")
     else:
-        max_retries = 3
-        retry_delay_seconds = 5
-        decisions = None
-        for attempt in range(max_retries):
-            try:
+        inputs = {
+            ticker: (
+                results["news_data"],
+                results[_stage_name("data_json", ticker)],
+                results[_stage_name("last_decisions", ticker)],
+                results["fear_and_greed"],
+                results[_stage_name("current_status", ticker)],
+            )
+            for ticker in markets
+        }
+        # 마켓별 분석은 모델 스케줄러에 우선순위(선정 순서)대로 한꺼번에 넣고, 결정이 나온 마켓부터 바로 주문
+        # (다른 마켓의 분석이나 앞 마켓의 번역/슬랙/DB 저장을 기다리지 않음. 주문은 원화 잔고를 함께 쓰므로 하나씩)
+        outcomes, _ = run_stages({
+            ticker: (partial(_decide_and_order, ticker, inputs[ticker], rank), ())
+            for rank, ticker in enumerate(markets)
+        })
+        for ticker in markets:
+            if outcomes[ticker] is not None:
+                _report_market(ticker, *outcomes[ticker], current_status=inputs[ticker][4])
+
+
+def _stage_name(name, ticker):
+    # 마켓이 하나면 기존 단계 이름을 그대로 사용
+    return name if len(MARKETS) == 1 else f"{name}:{ticker}"
+
+
+def _parse_decisions(ticker, advice, news_data, data_json, last_decisions, fear_and_greed, current_status):
+    # 응답이 올바른 JSON이 아니면 다시 분석 (호출 실패는 model_scheduler가 이미 재시도함)
+    max_retries = 3
+    retry_delay_seconds = 5
+    decisions = None
+    for attempt in range(max_retries):
+        try:
+            if attempt:
                 advice = analyze_data_with_gpt4(news_data, data_json, last_decisions, fear_and_greed, current_status)
-                decisions = json.loads(advice)
+            if advice is None:
                 break
-            except json.JSONDecodeError as e:
-                print_and_slack_message(f"JSON 파싱 실패: {e}. {retry_delay_seconds}초 후 재시도 중...")
-                time.sleep(retry_delay_seconds)
-                print_and_slack_message(f"{attempt + 2}번째 시도 중 / 총 {max_retries}회 시도")
-        if not decisions:
-            print_and_slack_message(f"최대 재시도 횟수({max_retries})를 초과하여 결정을 내릴 수 없습니다.")
-            return
-        else:
-            try:
-                decision   = decisions.get('decision')
-                reason     = decisions.get('reason')
-                percentage = decisions.get('percentage', 100)
+            with metrics.span("json_parse"):
+                decisions = json.loads(advice)
+            break
+        except json.JSONDecodeError as e:
+            print_and_slack_message(f"JSON 파싱 실패: {e}. {retry_delay_seconds}초 후 재시도 중...")
+            time.sleep(retry_delay_seconds)
+            print_and_slack_message(f"{attempt + 2}번째 시도 중 / 총 {max_retries}회 시도")
+    if not decisions:
+        print_and_slack_message(f"최대 재시도 횟수({max_retries})를 초과하여 {ticker} 결정을 내릴 수 없습니다.")
+    return decisions
+
+
+def _decide_and_order(ticker, inputs, priority=0):
+    """분석하고 결정이 나오면 바로 주문합니다. (decisions, 결과 메시지, 결정 시각, 체결 내역) 또는 None을 돌려줍니다."""
+    try:
+        advice = analyze_data_with_gpt4(*inputs, priority=priority)
+        decisions = _parse_decisions(ticker, advice, *inputs)
+    except Exception as e:
+        # 한 마켓의 분석 실패가 이미 주문한 다른 마켓의 결과 보고/DB 저장을 막지 않도록 마켓별로 처리
+        print_and_slack_message(f"**:bug: {ticker} 분석 실패**\n```{e}```")
+        return None
+    if not decisions:
+        return None
+    decided_at = time.perf_counter()   # 결정부터 주문 응답까지의 시간(decision_to_order)의 시작
+    try:
+        decision   = decisions.get('decision')
+        percentage = decisions.get('percentage', 100)
 
-                translated_reason = translate_to_korean(reason)
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-                suff_message = ""
-                if decision == "buy":
-                    execute_buy(percentage)
-                    suff_message = f"- :moneybag: {int(percentage * 100)}% 매수! :moneybag:"
+        suff_message = ""
+        fill = None
+        if decision == "buy":
+            with _order_lock, metrics.span("order"):
+                fill = execute_buy(percentage, ticker, decided_at)
+            suff_message = f"- :moneybag: {int(percentage * 100)}% 매수! :moneybag:"
 
-                elif decision == "sell":
-                    execute_sell(percentage)
-                    suff_message = f"- :money_with_wings: {int(percentage * 100)}% 매도! :money_with_wings:"
+        elif decision == "sell":
+            with _order_lock, metrics.span("order"):
+                fill = execute_sell(percentage, ticker, decided_at)
+            suff_message = f"- :money_with_wings: {int(percentage * 100)}% 매도! :money_with_wings:"
 
-                elif decision == "hold":
-                    suff_message = "- :eyes: 보유합니다 :eyes:"
+        elif decision == "hold":
+            suff_message = "- :eyes: 보유합니다 :eyes:"
 
-                else:
-                    suff_message = "- :thinking_face: 결정을 내릴 수 없습니다 :thinking_face:"
+        else:
+            suff_message = "- :thinking_face: 결정을 내릴 수 없습니다 :thinking_face:"
+        return decisions, suff_message, current_time, fill
+    except Exception as e:
+        print_and_slack_message(f"advice를 JSON으로 파싱하는 데 실패했습니다: {e}")
+        return None
 
-                detailed_message = f"[{current_time}]\n{suff_message}\n- 이유:\n{translated_reason}"
-                print_and_slack_message(detailed_message)
 
-                # gpt 결정 후 상태 비교 및 메시지 전송
-                compare_trade_status()
-                
-                save_decision_to_db(decisions, current_status, translated_reason)
-            except Exception as e:
-                print_and_slack_message(f"advice를 JSON으로 파싱하는 데 실패했습니다: {e}")
+def _report_market(ticker, decisions, suff_message, current_time, fill, current_status):
+    try:
+        # 번역은 주문 이후에 수행해 주문이 번역 응답을 기다리지 않게 함
+        with metrics.span("translation"):
+            translated_reason = translate_to_korean(decisions.get('reason'))
+        detailed_message = f"[{current_time}] {ticker}\n{suff_message}\n- 이유:\n{translated_reason}"
+        print_and_slack_message(detailed_message)
+
+        # gpt 결정 후 상태 비교 및 메시지 전송 (체결 내역으로 갱신한 잔고 사용)
+        with metrics.span("status_compare"):
+            compare_trade_status(ticker, fill)
+
+        with metrics.span("db_write"):
+            save_decision_to_db(decisions, current_status, translated_reason, ticker)
+    except Exception as e:
+        print_and_slack_message(f"{ticker} 결과를 기록하는 중 오류가 발생했습니다: {e}")
+
+
+def check_triggers():
+    # 실시간 시세(WebSocket 연결 중에는 네트워크 없음)와 시간당 한 번 읽는 시간봉으로 조건 확인
+    engine, candles = get_trigger_engine(), get_trigger_candles()
+    prices = snapshot.prices()
+    views = [engine.view(ticker, prices[ticker], candles.get(ticker))
+             for ticker in MARKETS if prices.get(ticker) is not None]
+    trigger = engine.check(views)
+    if trigger:
+        engine.mark_run(prices)
+        return trigger.markets, str(trigger)
+    return None
+
+
+def run_cycle(urgent_markets, reason):
+    print(f"사이클 시작: {reason}")
+    make_decision_and_execute(urgent_markets)
 
 
-def schedule_tasks(hour_interval):
-    for hour in range(0, 24, hour_interval):
-        schedule_time = "{:02d}:01".format(hour)    # 01 분마다
-        schedule.every().day.at(schedule_time).do(make_decision_and_execute)
+def create_cycle_runner(mode=TRIGGER_MODE):
+    """
+    event: TRIGGER_CHECK_SECONDS마다 트리거 조건을 확인해 맞을 때만 실행 (조건이 없으면 HOUR_INTERVAL 후 실행)
+    schedule: 매일 HOUR_INTERVAL 시간마다 01분에 실행
+    한 사이클이 모든 마켓의 원화 잔고를 함께 쓰므로 사이클은 항상 전체 마켓 단위로 겹치지 않게 실행합니다.
+    """
+    if mode == "event":
+        return CycleRunner(run_cycle, MARKETS, check=check_triggers, check_interval=TRIGGER_CHECK_SECONDS,
+                           state_path=SCHEDULER_STATE_PATH, missed_policy=MISSED_RUN_POLICY)
+    return CycleRunner(run_cycle, MARKETS, next_run_after=daily_times(range(0, 24, HOUR_INTERVAL)),
+                       state_path=SCHEDULER_STATE_PATH, missed_policy=MISSED_RUN_POLICY)
 
 
 #########################################################################################################
@@ -426,22 +591,15 @@ def schedule_tasks(hour_interval):
 
 def translate_to_korean(text):
     try:
-        api_key = os.getenv("DEEPL_API_KEY")
-        if not api_key:
-            raise ValueError("DeepL API 키가 설정되지 않았습니다.")
-        
-        translator = deepl.Translator(api_key)
-        translated_text = translator.translate_text(text, target_lang="KO").text
-        return translated_text
-    except ValueError as e:
-        print(f"DeepL 환경 변수가 설정되지 않았을 수 있습니다: {e}")
-        return translated_text  # API 키 문제 등으로 번역에 실패한 경우 원문 반환
-    except deepl.DeepLException as e:
-        print(f"DeepL API 호출 중 오류 발생: {e}")
-        return translated_text  # DeepL 관련 오류가 발생한 경우 원문 반환
+        # 디스크 번역 캐시에 있으면 DeepL을 호출하지 않음 (API 키가 없으면 원문 그대로)
+        return translation_cache.translate(text, target_lang="KO")
     except Exception as e:
+        # deepl은 번역기를 처음 만들 때 import되므로 import하지 않고 모듈 이름으로 DeepL 오류를 구분
+        if type(e).__module__.split(".")[0] == "deepl":
+            print(f"DeepL API 호출 중 오류 발생: {e}")
+            return text  # DeepL 관련 오류가 발생한 경우 원문 반환
         print(f"번역 중 예기치 않은 오류 발생: {e}")
-        return translated_text  # 기타 예외 처리
+        return text  # 기타 예외 처리
     
 
 def format_value_change(pre_value, post_value, format_str="{:,.0f}", suffix=""):   # 천 단위 구분자(,), 소수점 X
@@ -452,21 +610,20 @@ def format_value_change(pre_value, post_value, format_str="{:,.0f}", suffix=""):
         percentage_change = (change / pre_value) * 100 if pre_value else 0
         return f"{format_str.format(pre_value)}{suffix} -> {format_str.format(post_value)}{suffix} ({percentage_change:.2f}%)"  # 소수점 아래 두 자리
 
-def compare_trade_status():
-    global pre_trade_status
-    global post_trade_status
+def compare_trade_status(ticker="KRW-BTC", fill=None):
+    currency = currency_of(ticker)
 
-    # 잔고 정보를 가져옵니다.
-    krw_balance = upbit.get_balance("KRW")
-    btc_balance = upbit.get_balance("BTC")
-    btc_avg_buy_price = upbit.get_avg_buy_price("BTC")
-    current_btc_price = pyupbit.get_current_price("KRW-BTC")
+    # 잔고 정보를 가져옵니다. (체결 내역이 반영된 스냅샷 값, 체결을 확인하지 못한 주문이 있었다면 잔고만 다시 조회)
+    krw_balance = snapshot.balance("KRW")
+    btc_balance = snapshot.balance(currency)
+    btc_avg_buy_price = snapshot.avg_buy_price(currency)
+    current_btc_price = snapshot.price_for(ticker)
 
-    # 비트코인 평가금액
-    btc_valuation = btc_balance * current_btc_price # 비트코인 평가금액
+    # 코인 평가금액
+    btc_valuation = btc_balance * current_btc_price # 코인 평가금액
 
     # 거래 후 상태 업데이트
-    post_trade_status = {
+    post_trade_status[ticker] = {
         "krw_balance": krw_balance,
         "btc_balance": btc_balance,
         "avg_buy_price": btc_avg_buy_price,
@@ -474,7 +631,8 @@ def compare_trade_status():
     }
     
     # 거래 후 총 자산 상태 업데이트
-    post_trade_status["total_assets"] = krw_balance + btc_valuation  # 총 보유 자산
+    post_trade_status[ticker]["total_assets"] = krw_balance + btc_valuation  # 총 보유 자산
+    pre, post = pre_trade_status[ticker], post_trade_status[ticker]
 
 
     # 평가손익 및 수익률 계산
@@ -484,26 +642,44 @@ def compare_trade_status():
     else:
         return_rate = 0
 
-    message = "```\n원화 보유 자산 : " + format_value_change(pre_trade_status["krw_balance"], post_trade_status["krw_balance"], "{:,.0f}", " KRW") # 천 단위 구분자(,), 소수점 X
-    message += "\n코인 보유 자산 : " + format_value_change(pre_trade_status["btc_balance"], post_trade_status["btc_balance"], "{:.5f}", " BTC") # 소수점 5자리까지
-    message += "\n코인 매수 평균가 : " + format_value_change(pre_trade_status["avg_buy_price"], post_trade_status["avg_buy_price"], "{:,.0f}", " KRW")
-    message += "\n코인 평가금액 : " + format_value_change(pre_trade_status["btc_valuation"], post_trade_status["btc_valuation"], "{:,.0f}", " KRW")
+    message = "```\n"
+    if fill is not None:
+        message += f"체결 : {'매수' if fill.side == 'bid' else '매도'} {fill}\n"
+    message += "원화 보유 자산 : " + format_value_change(pre["krw_balance"], post["krw_balance"], "{:,.0f}", " KRW") # 천 단위 구분자(,), 소수점 X
+    message += "\n코인 보유 자산 : " + format_value_change(pre["btc_balance"], post["btc_balance"], "{:.5f}", f" {currency}") # 소수점 5자리까지
+    message += "\n코인 매수 평균가 : " + format_value_change(pre["avg_buy_price"], post["avg_buy_price"], "{:,.0f}", " KRW")
+    message += "\n코인 평가금액 : " + format_value_change(pre["btc_valuation"], post["btc_valuation"], "{:,.0f}", " KRW")
     message += f"\n\n평가손익 : {valuation_profit_loss:,.0f} KRW\n수익률 : {return_rate:.2f}%\n\n"
-    message += "총 보유 자산 : " + format_value_change(pre_trade_status["total_assets"], post_trade_status["total_assets"], "{:,.0f}", " KRW") + "\n```"
+    message += "총 보유 자산 : " + format_value_change(pre["total_assets"], post["total_assets"], "{:,.0f}", " KRW") + "\n```"
 
-    pre_trade_status = post_trade_status.copy()  # 현재 상태를 과거 상태로 덮어씌우기
+    pre_trade_status[ticker] = post.copy()  # 현재 상태를 과거 상태로 덮어씌우기
 
     print_and_slack_message(message)
 
 
 
 ############ 메인 함수 ############
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GPT 비트코인 자동매매 (v2)")
+    parser.add_argument("--once", action="store_true",
+                        help="사이클을 한 번만 실행하고 종료 (WebSocket/스케줄러를 시작하지 않고 REST로 조회)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    metrics.start_from_env()
+    http_client.configure_deepl()   # deepl 재시도/타임아웃 (프로세스 전역 설정)
     initialize_db()
-    make_decision_and_execute()
-    
-    schedule_tasks(HOUR_INTERVAL)
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    if args.once:
+        run_cycle([], "한 번 실행 (--once)")
+    else:
+        if USE_MARKET_STREAM:
+            market_stream.start().wait_ready(timeout=5)
+
+        # 타이머/트리거 확인은 이벤트 루프에서, 사이클은 작업 스레드에서 실행 (사이클이 길어도 겹치거나 밀려 쌓이지 않음)
+        cycle_runner = create_cycle_runner()
+        if TRIGGER_MODE == "event" and cycle_runner.state["last_started"]:
+            get_trigger_engine().last_run = cycle_runner.state["last_started"]   # 재시작 직후 최소 간격/최대 대기 시간 유지
+        cycle_runner.run_forever()
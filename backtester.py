@@ -0,0 +1,199 @@
+"""
+저장된 캔들로 매매 루프를 오프라인에서 다시 재생하는 백테스터입니다.
+
+- 결정은 기록된 decisions 테이블(decisions_from_store)이나 전략 함수(예: rsi_strategy)에서 가져옵니다.
+- 매수/매도 수량은 execute_buy/execute_sell과 같은 규칙을 따릅니다.
+  - 매수: 보유 원화 × 비율 이 MIN_TRADE_AMOUNT를 넘으면 그 금액 × (1 - FEE_RATE)로 시장가 주문 (수수료는 주문 금액에 별도 부과)
+  - 매도: min(보유 BTC, 보유 BTC × 비율) 의 평가액이 MIN_TRADE_AMOUNT를 넘으면 시장가 매도 (수수료는 매도 대금에서 차감)
+  - 비율: autotrade_v2.py는 0~100(%), autotrade.py는 0~1 → percentage_scale로 지정
+- 잔고는 결정 시점에만 바뀌므로 결정 수만큼만 순서대로 계산하고,
+  캔들마다의 잔고/평가액/수익률/낙폭은 NumPy로 한 번에 계산합니다.
+
+실행 (네트워크 없이 candles.sqlite만 사용): python backtester.py [decisions|rsi] [캔들 수] [마켓, 기본 KRW-BTC]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from candle_store import load_candles
+from indicators import compute_indicators, INDICATOR_COLUMNS
+
+# autotrade.py / autotrade_v2.py와 같은 값
+MIN_TRADE_AMOUNT = 5000  # 업비트 최소 거래가능 금액(원)
+FEE_RATE = 0.0005        # 업비트 수수료 0.05%
+
+PERCENT = 100    # autotrade_v2.py: percentage는 0~100
+FRACTION = 1     # autotrade.py: percentage는 0~1
+
+FILL_PRICES = ("next_open", "close")
+
+
+class BacktestResult:
+    def __init__(self, equity, trades, summary):
+        self.equity = equity     # 캔들별 krw, btc, price, equity, drawdown
+        self.trades = trades     # 결정별 체결 내역 (executed=False면 최소 금액 미달 등으로 주문하지 않음)
+        self.summary = summary   # 수익률, 최대 낙폭 등 요약
+
+    def __repr__(self):
+        return "\n".join(f"{key}: {value}" for key, value in self.summary.items())
+
+
+def _decision_bars(index, timestamps, fill):
+    # 결정 시각이 속한 캔들 (시작 시각 <= 결정 시각) → 체결 캔들. 첫 캔들보다 이른 결정은 -1
+    bars = np.searchsorted(index.values, timestamps.values, side='right') - 1
+    if fill == "next_open":
+        bars = np.where(bars >= 0, bars + 1, -1)
+    return bars
+
+
+def run_backtest(candles, decisions, initial_krw=1_000_000, initial_btc=0.0,
+                 fee_rate=FEE_RATE, min_trade_amount=MIN_TRADE_AMOUNT,
+                 percentage_scale=PERCENT, fill="next_open"):
+    """
+    캔들 위에서 결정들을 순서대로 체결해 잔고와 평가액을 계산합니다.
+
+    매개변수:
+    - candles (DataFrame): open, close 컬럼과 시각 인덱스를 가진 OHLCV입니다. (pyupbit.get_ohlcv 형식)
+    - decisions (DataFrame): 시각 인덱스와 decision('buy'/'sell'/'hold'), percentage 컬럼을 가집니다.
+    - fill (str): 'next_open'은 결정 다음 캔들 시가, 'close'는 결정 캔들 종가에 체결합니다.
+    """
+    if fill not in FILL_PRICES:
+        raise ValueError(f"지원하지 않는 체결 방식입니다: {fill} (가능한 값: {', '.join(FILL_PRICES)})")
+
+    candles = candles.sort_index()
+    opens = candles['open'].to_numpy(dtype=float)
+    closes = candles['close'].to_numpy(dtype=float)
+    n = len(candles)
+
+    decisions = decisions.sort_index(kind='stable')
+    bars = _decision_bars(candles.index, decisions.index, fill)
+    valid = (bars >= 0) & (bars < n)
+    decisions = decisions[valid]
+    bars = bars[valid]
+    fill_prices = (opens if fill == "next_open" else closes)[bars]
+    kinds = decisions['decision'].to_numpy()
+    ratios = np.clip(decisions['percentage'].to_numpy(dtype=float) / percentage_scale, 0.0, 1.0)
+
+    # 결정 시점마다의 잔고 (잔고가 이전 체결 결과와 최소 금액 조건에 의존하므로 결정 수만큼 순서대로 계산)
+    m = len(decisions)
+    krw_after = np.empty(m)
+    btc_after = np.empty(m)
+    executed = np.zeros(m, dtype=bool)
+    amounts = np.zeros(m)
+    fees = np.zeros(m)
+    krw, btc = float(initial_krw), float(initial_btc)
+    for i in range(m):
+        price = fill_prices[i]
+        if kinds[i] == "buy":
+            amount = krw * ratios[i]
+            if amount > min_trade_amount:
+                order = amount * (1 - fee_rate)
+                fee = order * fee_rate
+                krw -= order + fee
+                btc += order / price
+                executed[i], amounts[i], fees[i] = True, order, fee
+        elif kinds[i] == "sell":
+            quantity = min(btc, btc * ratios[i])
+            if quantity * price > min_trade_amount:
+                proceeds = quantity * price
+                fee = proceeds * fee_rate
+                btc -= quantity
+                krw += proceeds - fee
+                executed[i], amounts[i], fees[i] = True, proceeds, fee
+        krw_after[i], btc_after[i] = krw, btc
+
+    # 캔들별 잔고: 해당 캔들까지 체결된 마지막 결정의 잔고 (체결 캔들의 시가 이후부터 반영)
+    last = np.searchsorted(bars, np.arange(n), side='right') - 1
+    krw_series = np.where(last >= 0, krw_after[np.maximum(last, 0)], initial_krw) if m else np.full(n, float(initial_krw))
+    btc_series = np.where(last >= 0, btc_after[np.maximum(last, 0)], initial_btc) if m else np.full(n, float(initial_btc))
+    equity = krw_series + btc_series * closes
+    peak = np.maximum.accumulate(equity) if n else equity
+    drawdown = equity / peak - 1 if n else equity
+
+    equity_df = pd.DataFrame({
+        'krw': krw_series, 'btc': btc_series, 'price': closes, 'equity': equity, 'drawdown': drawdown,
+    }, index=candles.index)
+    trades = pd.DataFrame({
+        'decision': kinds, 'percentage': decisions['percentage'].to_numpy(dtype=float),
+        'fill_time': candles.index[bars], 'fill_price': fill_prices,
+        'executed': executed, 'amount_krw': amounts, 'fee': fees,
+        'krw': krw_after, 'btc': btc_after,
+    }, index=decisions.index)
+
+    initial_equity = initial_krw + initial_btc * (closes[0] if n else 0.0)
+    final_equity = float(equity[-1]) if n else float(initial_equity)
+    summary = {
+        "candles": n,
+        "start": candles.index[0] if n else None,
+        "end": candles.index[-1] if n else None,
+        "decisions": m,
+        "trades": int(executed.sum()),
+        "skipped_below_minimum": int(((kinds == "buy") | (kinds == "sell")).sum() - executed.sum()),
+        "fees": round(float(fees.sum()), 2),
+        "final_equity": round(final_equity, 2),
+        "total_return_pct": round((final_equity / initial_equity - 1) * 100, 4) if initial_equity else 0.0,
+        "buy_and_hold_return_pct": round((closes[-1] / closes[0] - 1) * 100, 4) if n else 0.0,
+        "max_drawdown_pct": round(float(drawdown.min()) * 100, 4) if n else 0.0,
+        "exposure_pct": round(float(np.mean(btc_series > 0)) * 100, 2) if n else 0.0,
+    }
+    return BacktestResult(equity_df, trades, summary)
+
+
+def decisions_from_store(db_path='trading_decisions.sqlite', market="KRW-BTC"):
+    """
+    기록된 decisions 테이블에서 market의 결정만 run_backtest에 넘길 수 있는 DataFrame으로 읽습니다. (percentage는 0~100)
+
+    결정은 마켓별로 기록되므로, 그 마켓의 캔들과 함께 재생해야 합니다.
+    봇이 쓰는 DB를 만들거나 마이그레이션하지 않도록 읽기 전용 연결로 읽습니다.
+    """
+    from decisions_store import get_reader
+
+    rows = get_reader(db_path).fetch_since(0, market=market)
+    frame = pd.DataFrame(
+        [(row[1], row[2], row[3]) for row in rows],
+        columns=['timestamp', 'decision', 'percentage'],
+    )
+    frame['percentage'] = frame['percentage'].fillna(100)   # save_decision_to_db의 기본값과 같게
+    return frame.set_index(pd.to_datetime(frame.pop('timestamp'))).sort_index(kind='stable')
+
+
+def rsi_strategy(candles, rsi_low=30, rsi_high=70, percentage=50, hour_interval=8):
+    """
+    예시 전략: hour_interval마다 RSI_14가 rsi_low 미만이면 매수, rsi_high 초과면 매도, 그 외에는 보유.
+
+    전략 함수는 캔들을 받아 결정 DataFrame(decision, percentage)을 돌려주면 되며,
+    지표는 indicators.compute_indicators로 전체 구간을 한 번에 계산합니다.
+    """
+    values = compute_indicators(
+        candles['high'].to_numpy(dtype=float),
+        candles['low'].to_numpy(dtype=float),
+        candles['close'].to_numpy(dtype=float),
+    )
+    rsi = values[:, INDICATOR_COLUMNS.index('RSI_14')]
+    step = max(int(round(hour_interval * 3600 / _bar_seconds(candles.index))), 1)
+    at = np.arange(0, len(candles), step)
+    decision = np.where(rsi[at] < rsi_low, "buy", np.where(rsi[at] > rsi_high, "sell", "hold"))
+    return pd.DataFrame({'decision': decision, 'percentage': float(percentage)}, index=candles.index[at])
+
+
+def _bar_seconds(index):
+    if len(index) < 2:
+        return 3600
+    return float(np.median(np.diff(index.values).astype('timedelta64[s]').astype(float)))
+
+
+def main(argv):
+    source = argv[0] if argv else "rsi"
+    count = int(argv[1]) if len(argv) > 1 else 24 * 365
+    market = argv[2] if len(argv) > 2 else "KRW-BTC"
+    candles = load_candles(market, "minute60", count)
+    if candles.empty:
+        print(f"candles.sqlite에 저장된 {market} 시간봉이 없습니다. 자동매매를 한 번 실행하거나 candle_store.sync_candles로 먼저 저장하세요.")
+        return
+    decisions = decisions_from_store(market=market) if source == "decisions" else rsi_strategy(candles)
+    print(run_backtest(candles, decisions))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,227 @@
+"""
+업비트 OHLCV 캔들을 로컬 SQLite에 저장해 두고, 매 사이클마다 새로 생긴 캔들만 내려받는 모듈입니다.
+
+- 마지막으로 저장된 캔들 이후의 캔들만 요청합니다. (진행 중이던 마지막 캔들은 다시 받아 덮어씀)
+- 요청한 구간 안에서 빠진 캔들(갭)을 찾아 채워 넣습니다.
+  거래가 없어 업비트에 캔들 자체가 없는 구간은 기록해 두고 다시 요청하지 않습니다.
+  (요청이 실패한 구간은 기록하지 않고 다음 동기화에서 다시 요청)
+- 업비트의 요청당 최대 200개 제한을 넘는 긴 기간은 여러 번 나누어 요청합니다.
+
+시각은 pyupbit와 같이 KST 기준 캔들 시작 시각을 사용하며,
+DB에는 이를 UTC인 것처럼 변환한 epoch 초(정수)로 저장합니다.
+"""
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyupbit
+
+import metrics
+
+DB_PATH = 'candles.sqlite'
+MAX_CANDLES_PER_REQUEST = 200   # 업비트 캔들 API 요청당 최대 개수
+REQUEST_PERIOD = 0.1            # 페이지 요청 사이 대기 시간(초), 업비트 초당 요청 제한 대응
+KST_OFFSET = timedelta(hours=9)
+
+# 고정 간격 캔들만 지원 (주/월 캔들은 간격이 일정하지 않아 갭 검사를 할 수 없음)
+INTERVAL_SECONDS = {
+    "minute1": 60,
+    "minute3": 3 * 60,
+    "minute5": 5 * 60,
+    "minute10": 10 * 60,
+    "minute15": 15 * 60,
+    "minute30": 30 * 60,
+    "minute60": 60 * 60,
+    "minute240": 240 * 60,
+    "day": 24 * 60 * 60,
+}
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'value']
+
+
+def initialize_candle_db(db_path=DB_PATH):
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS candles (
+                ticker TEXT,
+                interval TEXT,
+                ts INTEGER,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                value REAL,
+                PRIMARY KEY (ticker, interval, ts)
+            );
+        ''')
+        # 거래가 없어 업비트에 캔들이 존재하지 않는 것으로 확인된 시각
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS candle_gaps (
+                ticker TEXT,
+                interval TEXT,
+                ts INTEGER,
+                PRIMARY KEY (ticker, interval, ts)
+            );
+        ''')
+        conn.commit()
+
+
+def _interval_seconds(interval):
+    try:
+        return INTERVAL_SECONDS[interval]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 캔들 간격입니다: {interval}")
+
+
+def _to_ts(dt):
+    # KST 캔들 시각(naive) -> 저장용 정수
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _from_ts(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def _latest_candle_start(step, now=None):
+    """현재 진행 중인 캔들의 시작 시각(저장용 정수)을 계산합니다."""
+    now_kst = (now or datetime.now(timezone.utc).replace(tzinfo=None)) + KST_OFFSET
+    # 업비트 캔들은 UTC 기준으로 정렬되므로 KST 기준으로는 9시간만큼 어긋남
+    offset = int(KST_OFFSET.total_seconds()) % step
+    return (_to_ts(now_kst) - offset) // step * step + offset
+
+
+def fetch_candles(ticker, interval, count, to=None):
+    """
+    업비트에서 캔들을 최대 200개씩 나누어 요청합니다.
+
+    매개변수:
+    - to (datetime): 이 시각(UTC, 미포함) 이전의 캔들을 가져옵니다. 기본값은 현재 시각입니다.
+
+    반환값:
+    - DataFrame: KST 시각 오름차순으로 정렬된 캔들입니다. 실패 시 빈 DataFrame 입니다.
+    """
+    frames = []
+    remaining = count
+    while remaining > 0:
+        page_count = min(MAX_CANDLES_PER_REQUEST, remaining)
+        metrics.inc("api_calls", service="api.upbit.com")
+        df = pyupbit.get_ohlcv(ticker, interval=interval, count=page_count, to=to)
+        if df is None or df.empty:
+            break
+        frames.append(df)
+        remaining -= len(df)
+        if len(df) < page_count:
+            break
+        # 다음 페이지는 이번 페이지에서 가장 오래된 캔들 이전부터
+        to = df.index[0].to_pydatetime() - KST_OFFSET
+        if remaining > 0:
+            time.sleep(REQUEST_PERIOD)
+
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(frames).sort_index()
+    return df[~df.index.duplicated(keep='last')]
+
+
+def _upsert_candles(conn, ticker, interval, df):
+    rows = [
+        (ticker, interval, _to_ts(index.to_pydatetime()), *(float(row[column]) for column in COLUMNS))
+        for index, row in df.iterrows()
+    ]
+    conn.executemany('''
+        INSERT OR REPLACE INTO candles (ticker, interval, ts, open, high, low, close, volume, value)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+
+def _missing_runs(conn, ticker, interval, step, latest, count):
+    """최근 count개 구간에서 빠진 캔들 시각을 연속 구간(최신 시각, 개수) 목록으로 돌려줍니다."""
+    earliest = latest - (count - 1) * step
+    cursor = conn.execute('''
+        SELECT ts FROM candles WHERE ticker = ? AND interval = ? AND ts >= ?
+        UNION
+        SELECT ts FROM candle_gaps WHERE ticker = ? AND interval = ? AND ts >= ?
+    ''', (ticker, interval, earliest, ticker, interval, earliest))
+    present = {row[0] for row in cursor.fetchall()}
+
+    runs = []
+    for ts in range(latest, earliest - 1, -step):
+        if ts in present:
+            continue
+        if runs and runs[-1][0] - runs[-1][1] * step == ts:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((ts, 1))
+    return runs
+
+
+def sync_candles(ticker, interval, count, db_path=DB_PATH, now=None):
+    """
+    최근 count개 캔들이 로컬 저장소에 모두 있도록 필요한 캔들만 내려받습니다.
+
+    반환값:
+    - int: 이번에 업비트에서 받아 저장한 캔들 수입니다.
+    """
+    step = _interval_seconds(interval)
+    latest = _latest_candle_start(step, now)
+    initialize_candle_db(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.execute('SELECT MAX(ts) FROM candles WHERE ticker = ? AND interval = ?', (ticker, interval))
+        last = cursor.fetchone()[0]
+
+        # 마지막 저장 캔들(진행 중이었을 수 있음)부터 현재 캔들까지만 요청
+        if last is None:
+            new_count = count
+        else:
+            new_count = min(count, max((latest - last) // step + 1, 1))
+        saved = _upsert_candles(conn, ticker, interval, fetch_candles(ticker, interval, new_count))
+
+        # 중간에 빠진 캔들 채우기
+        for run_latest, run_count in _missing_runs(conn, ticker, interval, step, latest, count):
+            to = _from_ts(run_latest + step) - KST_OFFSET
+            df = fetch_candles(ticker, interval, run_count, to=to)
+            saved += _upsert_candles(conn, ticker, interval, df)
+            # pyupbit는 요청이 실패해도 None을 돌려주므로(빈 DataFrame) 빈 응답으로는 아무것도 기록하지 않고 다음 동기화에서 다시 요청
+            if df.empty:
+                continue
+            # 다시 받아도 없는 캔들은 거래가 없던 구간으로 기록. 받은 캔들 중 가장 오래된 것과 요청 끝(to) 사이,
+            # 즉 업비트가 실제로 훑은 구간 안의 시각만 기록 (현재 진행 중인 캔들은 제외)
+            received = {_to_ts(index.to_pydatetime()) for index in df.index}
+            oldest = min(received)
+            gaps = [run_latest - i * step for i in range(run_count)]
+            conn.executemany(
+                'INSERT OR IGNORE INTO candle_gaps (ticker, interval, ts) VALUES (?, ?, ?)',
+                [(ticker, interval, ts) for ts in gaps if oldest <= ts < latest and ts not in received],
+            )
+        conn.commit()
+    return saved
+
+
+def load_candles(ticker, interval, count, db_path=DB_PATH):
+    """로컬 저장소에서 최근 count개 캔들을 pyupbit.get_ohlcv와 같은 형태의 DataFrame으로 읽습니다."""
+    initialize_candle_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.execute('''
+            SELECT ts, open, high, low, close, volume, value FROM candles
+            WHERE ticker = ? AND interval = ?
+            ORDER BY ts DESC
+            LIMIT ?
+        ''', (ticker, interval, count))
+        rows = cursor.fetchall()[::-1]
+
+    index = [_from_ts(row[0]) for row in rows]
+    return pd.DataFrame([row[1:] for row in rows], columns=COLUMNS, index=pd.DatetimeIndex(index))
+
+
+def get_candles(ticker, interval, count, db_path=DB_PATH):
+    """새 캔들만 동기화한 뒤 최근 count개 캔들을 돌려줍니다. 동기화에 실패하면 저장된 캔들을 사용합니다."""
+    try:
+        sync_candles(ticker, interval, count, db_path)
+    except Exception as e:
+        print(f"캔들 동기화 실패, 저장된 캔들을 사용합니다 ({ticker} {interval}): {e}")
+    return load_candles(ticker, interval, count, db_path)
@@ -0,0 +1,252 @@
+"""
+매매 사이클을 타이머 스레드와 분리해 실행하는 asyncio 기반 스케줄러입니다.
+
+- 타이머(정해진 시각)와 트리거 확인(check)은 이벤트 루프가 관리하고, 사이클과 확인 작업은 작업 스레드에서 실행합니다.
+  (느린 모델 호출이 다음 확인이나 타이머를 막지 않음)
+- 같은 마켓의 사이클은 동시에 두 개 실행하지 않습니다. 실행 중에 들어온 요청은 하나로 합쳐 두었다가 끝나면 한 번 실행합니다.
+- 상태(마지막 시작 시각, 소요 시간, 다음 실행 시각 등)를 state_path(JSON)에 저장하고 status()로 보여줍니다.
+- 꺼져 있던 동안 놓친 정기 실행은 missed_policy에 따라 처리합니다.
+  - "once": 놓친 실행이 하나 이상이면 시작하자마자 한 번만 실행 (기본값)
+  - "skip": 놓친 실행은 버리고 다음 정기 시각을 기다림
+  처음 실행할 때(저장된 상태가 없을 때)는 정기 시각을 기다리지 않고 바로 한 번 실행합니다.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+MISSED_POLICIES = ("once", "skip")
+
+
+def daily_times(hours, minute=1):
+    """
+    매일 hours 시각의 minute분에 실행하는 시간표입니다. (로컬 시각)
+
+    반환값:
+    - 함수: 유닉스 시각을 받아 그 이후 첫 실행 시각(유닉스 시각)을 돌려줍니다.
+    """
+    hours = sorted(hours)
+
+    def next_run_after(ts):
+        current = datetime.fromtimestamp(ts)
+        for day in range(2):
+            date = current.date() + timedelta(days=day)
+            for hour in hours:
+                candidate = datetime(date.year, date.month, date.day, hour, minute)
+                if candidate > current:
+                    return candidate.timestamp()
+        raise ValueError("실행 시각이 없습니다.")
+
+    return next_run_after
+
+
+def _format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+
+class CycleRunner:
+    def __init__(self, run, markets, next_run_after=None, check=None, check_interval=30,
+                 state_path=None, missed_policy="once", clock=time.time):
+        """
+        매개변수:
+        - run: 사이클 함수 run(urgent_markets, reason) 입니다. 작업 스레드에서 호출됩니다.
+        - markets: 사이클이 다루는 마켓 목록입니다. (같은 마켓을 다루는 사이클은 겹치지 않음)
+        - next_run_after: 정기 실행 시간표 (daily_times 참고). None이면 정기 실행 없음
+        - check: 트리거 확인 함수입니다. 실행해야 하면 (urgent_markets, reason), 아니면 None을 돌려줍니다.
+        """
+        if missed_policy not in MISSED_POLICIES:
+            raise ValueError(f"지원하지 않는 놓친 실행 처리 방식입니다: {missed_policy} (가능한 값: {', '.join(MISSED_POLICIES)})")
+        self.run = run
+        self.markets = list(markets)
+        self.next_run_after = next_run_after
+        self.check = check
+        self.check_interval = check_interval
+        self.state_path = state_path
+        self.missed_policy = missed_policy
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._busy = set()       # 사이클이 실행 중인 마켓
+        self._pending = None     # 실행 중이라 미뤄 둔 요청 (마켓, 긴급 마켓, 사유)
+        self._checking = False
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cycle")
+        self._loop = None
+        self._wake = None
+        self._stopped = False
+        self.next_run = None
+        self.next_check = None
+        self.state = self._load_state()
+
+    # ---- 상태 ----
+    def _load_state(self):
+        state = {"last_started": None, "last_finished": None, "last_duration": None, "last_reason": None,
+                 "runs": 0, "coalesced": 0, "missed": 0, "failures": 0}
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, encoding="utf-8") as file:
+                    state.update(json.load(file))
+            except (OSError, ValueError) as e:
+                print(f"스케줄러 상태 파일을 읽지 못했습니다: {e}")
+        return state
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            state = dict(self.state, next_run=self.next_run)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, self.state_path)
+
+    def status(self):
+        """다음 실행 시각, 마지막 소요 시간, 실행 중인 마켓 등을 dict로 돌려줍니다."""
+        with self._lock:
+            return {
+                "running": sorted(self._busy),
+                "pending": self._pending[2] if self._pending else None,
+                "next_run": _format_ts(self.next_run),
+                "next_check": _format_ts(self.next_check),
+                "last_started": _format_ts(self.state["last_started"]),
+                "last_duration": self.state["last_duration"],
+                "last_reason": self.state["last_reason"],
+                "runs": self.state["runs"],
+                "coalesced": self.state["coalesced"],
+                "missed": self.state["missed"],
+                "failures": self.state["failures"],
+            }
+
+    def format_status(self):
+        status = self.status()
+        duration = status["last_duration"]
+        return (f"마지막 실행: {status['last_started'] or '-'} ({'-' if duration is None else f'{duration:.1f}초'}), "
+                f"다음 정기 실행: {status['next_run'] or '-'}, 합쳐진 요청: {status['coalesced']}, 놓친 실행: {status['missed']}")
+
+    # ---- 실행 요청 ----
+    def submit(self, reason, urgent_markets=(), markets=None):
+        """사이클 실행을 요청합니다. 어느 스레드에서든 호출할 수 있습니다. 바로 시작했으면 True입니다."""
+        markets = set(markets or self.markets)
+        if self._stopped:
+            return False
+        with self._lock:
+            if self._busy & markets:
+                # 같은 마켓의 사이클이 실행 중: 하나로 합쳐 두었다가 끝나면 실행
+                if self._pending:
+                    markets |= self._pending[0]
+                    urgent_markets = list(dict.fromkeys([*self._pending[1], *urgent_markets]))
+                    reason = f"{self._pending[2]}, {reason}"
+                self._pending = (markets, list(urgent_markets), reason)
+                self.state["coalesced"] += 1
+                return False
+            self._busy |= markets
+            self.state["last_started"] = self.clock()
+            self.state["last_reason"] = reason
+        self._executor.submit(self._run_job, markets, list(urgent_markets), reason)
+        return True
+
+    def _run_job(self, markets, urgent_markets, reason):
+        started = time.monotonic()
+        try:
+            self.run(urgent_markets, reason)
+        except Exception as e:
+            print(f"사이클 실행 중 오류가 발생했습니다: {e}")
+            with self._lock:
+                self.state["failures"] += 1
+        finally:
+            with self._lock:
+                self._busy -= markets
+                self.state["last_finished"] = self.clock()
+                self.state["last_duration"] = time.monotonic() - started
+                self.state["runs"] += 1
+                pending, self._pending = self._pending, None
+            self._save_state()
+            print(self.format_status())
+            if pending:
+                self.submit(pending[2], pending[1], pending[0])
+            self._notify()
+
+    def _notify(self):
+        if self._loop is not None and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:   # 루프가 이미 끝남
+                pass
+
+    # ---- 확인 ----
+    def _run_check(self):
+        try:
+            result = self.check()
+            if result:
+                urgent_markets, reason = result
+                self.submit(reason, urgent_markets)
+        except Exception as e:
+            print(f"트리거 확인 중 오류가 발생했습니다: {e}")
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def _start_check(self):
+        with self._lock:
+            if self._checking:   # 이전 확인이 아직 끝나지 않았으면 건너뜀
+                return
+            self._checking = True
+        threading.Thread(target=self._run_check, name="cycle-check", daemon=True).start()
+
+    # ---- 이벤트 루프 ----
+    def _missed_runs(self, now):
+        last = self.state["last_started"]
+        if self.next_run_after is None or not last:
+            return 0
+        missed, ts = 0, self.next_run_after(last)
+        while ts <= now and missed < 1000:
+            missed += 1
+            ts = self.next_run_after(ts)
+        return missed
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        now = self.clock()
+
+        missed = self._missed_runs(now)
+        if self.next_run_after is not None and not self.state["last_started"]:
+            self.submit("첫 실행")
+        elif missed:
+            with self._lock:
+                self.state["missed"] += missed
+            print(f"꺼져 있던 동안 놓친 정기 실행: {missed}회 ({self.missed_policy})")
+            if self.missed_policy == "once":
+                self.submit(f"놓친 실행 {missed}회 보충")
+        if self.next_run_after is not None:
+            self.next_run = self.next_run_after(now)
+        if self.check is not None:
+            self.next_check = now
+
+        while not self._stopped:
+            now = self.clock()
+            if self.next_run is not None and now >= self.next_run:
+                self.submit("정기 실행")
+                self.next_run = self.next_run_after(now)
+                self._save_state()
+            if self.next_check is not None and now >= self.next_check:
+                self._start_check()
+                self.next_check = now + self.check_interval
+            deadlines = [ts for ts in (self.next_run, self.next_check) if ts is not None]
+            timeout = max(min(deadlines) - self.clock(), 0) if deadlines else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def run_forever(self):
+        asyncio.run(self.serve())
+
+    def stop(self, wait=True):
+        """루프를 멈춥니다. wait이면 실행 중인 사이클이 끝날 때까지 기다립니다."""
+        self._stopped = True
+        self._notify()
+        self._executor.shutdown(wait=wait)
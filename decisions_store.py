@@ -0,0 +1,260 @@
+"""
+매매 결정 기록(trading_decisions.sqlite)을 저장하고 읽는 저장소입니다.
+
+- 프로세스당 하나의 연결을 재사용하고, SQL 문은 모듈 상수로 고정해 sqlite3의 문장 캐시(prepared statement)를 탑니다.
+- WAL 저널 모드를 사용해 봇이 쓰는 동안에도 streamlit_app.py 같은 다른 프로세스가 막히지 않고 읽을 수 있습니다.
+- timestamp 인덱스로 최근 결정 조회(ORDER BY timestamp DESC LIMIT n)가 테이블 크기와 관계없이 일정한 시간에 끝납니다.
+- 스키마 변경은 MIGRATIONS에 순서대로 추가하고, 적용된 버전은 PRAGMA user_version에 기록합니다.
+"""
+import atexit
+import sqlite3
+import threading
+from pathlib import Path
+
+DB_PATH = 'trading_decisions.sqlite'
+
+# (버전, [SQL, ...]) - 이미 배포된 항목은 수정하지 말고 새 버전을 뒤에 추가합니다.
+MIGRATIONS = [
+    (1, ['''
+        CREATE TABLE IF NOT EXISTS decisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            decision TEXT,
+            percentage REAL,
+            reason TEXT,
+            btc_balance REAL,
+            krw_balance REAL,
+            btc_avg_buy_price REAL,
+            btc_krw_price REAL
+        );
+    ''']),
+    (2, ['CREATE INDEX IF NOT EXISTS idx_decisions_timestamp ON decisions (timestamp)']),
+    # 여러 마켓 운용: 결정마다 마켓을 기록 (btc_* 컬럼에는 해당 마켓 코인의 잔고/평균가/가격이 들어감)
+    (3, [
+        "ALTER TABLE decisions ADD COLUMN market TEXT NOT NULL DEFAULT 'KRW-BTC'",
+        'CREATE INDEX IF NOT EXISTS idx_decisions_market_timestamp ON decisions (market, timestamp)',
+    ]),
+]
+
+DECISION_COLUMNS = (
+    'timestamp', 'decision', 'percentage', 'reason',
+    'btc_balance', 'krw_balance', 'btc_avg_buy_price', 'btc_krw_price', 'market',
+)
+DEFAULT_MARKET = 'KRW-BTC'
+
+INSERT_DECISION = '''
+    INSERT INTO decisions (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, market)
+    VALUES (COALESCE(?, datetime('now', 'localtime')), ?, ?, ?, ?, ?, ?, ?, COALESCE(?, 'KRW-BTC'))
+'''
+SELECT_LAST_DECISIONS = '''
+    SELECT timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price FROM decisions
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+SELECT_LAST_MARKET_DECISIONS = '''
+    SELECT timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price FROM decisions
+    WHERE market = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+SELECT_DECISIONS_SINCE = '''
+    SELECT id, timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, market FROM decisions
+    WHERE id > ?
+    ORDER BY id
+'''
+SELECT_MARKET_DECISIONS_SINCE = '''
+    SELECT id, timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, market FROM decisions
+    WHERE id > ? AND market = ?
+    ORDER BY id
+'''
+SELECT_MARKETS = 'SELECT DISTINCT market FROM decisions ORDER BY market'
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """
+    아직 적용되지 않은 마이그레이션을 버전 순서대로 하나의 트랜잭션씩 적용합니다.
+
+    봇과 대시보드가 동시에 시작할 수 있으므로, 버전은 쓰기 잠금(BEGIN IMMEDIATE)을 잡은 뒤 다시 읽습니다.
+    (다른 프로세스가 먼저 적용한 단계는 건너뜀)
+    """
+    current = schema_version(conn)
+    for version, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current = schema_version(conn)
+            if version > current:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+                current = version
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    return current
+
+
+class DecisionStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # isolation_level=None: 트랜잭션은 직접 BEGIN/COMMIT으로 관리 (단건 INSERT는 자동 커밋)
+        # check_same_thread=False: 단계 실행기의 작업 스레드에서도 같은 연결을 사용 (self._lock으로 직렬화)
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False, cached_statements=64)
+        self.journal_mode = self._conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        self._conn.execute('PRAGMA synchronous=NORMAL')   # WAL에서는 NORMAL로도 손상 없이 안전
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        with self._lock:
+            self.version = migrate(self._conn)
+
+    def save(self, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price,
+             timestamp=None, market=DEFAULT_MARKET):
+        """결정 하나를 저장합니다. timestamp가 없으면 현재 로컬 시각을 사용합니다."""
+        with self._lock:
+            cursor = self._conn.execute(INSERT_DECISION, (
+                timestamp, decision, percentage, reason,
+                btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, market,
+            ))
+            return cursor.lastrowid
+
+    def save_many(self, rows):
+        """DECISION_COLUMNS 순서의 튜플들을 한 트랜잭션으로 저장합니다. (market을 빼면 기본 마켓)"""
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(INSERT_DECISION, (
+                    row if len(row) == len(DECISION_COLUMNS) else (*row, None) for row in rows
+                ))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def last_decisions(self, limit=10, market=None):
+        """
+        최근 결정을 최신순으로 돌려줍니다. market을 지정하면 그 마켓의 결정만 돌려줍니다.
+
+        반환값:
+        - list: (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price) 튜플 목록입니다.
+        """
+        with self._lock:
+            if market is None:
+                return self._conn.execute(SELECT_LAST_DECISIONS, (limit,)).fetchall()
+            return self._conn.execute(SELECT_LAST_MARKET_DECISIONS, (market, limit)).fetchall()
+
+    def fetch_since(self, last_id=0, market=None):
+        """
+        id가 last_id보다 큰 결정만 id 순서로 돌려줍니다. (기본 키 범위 조회라 테이블 크기와 관계없이 새 행만 읽음)
+        market을 지정하면 그 마켓의 결정만 돌려줍니다.
+
+        반환값:
+        - list: (id, *DECISION_COLUMNS) 튜플 목록입니다.
+        """
+        with self._lock:
+            if market is None:
+                return self._conn.execute(SELECT_DECISIONS_SINCE, (last_id,)).fetchall()
+            return self._conn.execute(SELECT_MARKET_DECISIONS_SINCE, (last_id, market)).fetchall()
+
+    def markets(self):
+        """결정이 기록된 마켓 목록입니다. (마켓 인덱스만 읽음)"""
+        with self._lock:
+            return [market for market, in self._conn.execute(SELECT_MARKETS).fetchall()]
+
+    def max_id(self):
+        with self._lock:
+            return self._conn.execute('SELECT MAX(id) FROM decisions').fetchone()[0] or 0
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM decisions').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ReadOnlyDecisionStore:
+    """
+    대시보드처럼 읽기만 하는 프로세스용 저장소입니다.
+
+    읽기 전용(mode=ro)으로 열기 때문에 마이그레이션이나 저널 모드 변경 없이 봇이 관리하는 DB를 그대로 읽습니다.
+    DB 파일이 아직 없거나 봇이 아직 최신 버전으로 마이그레이션하지 않았으면 빈 결과를 돌려주고, 다음 조회 때 다시 엽니다.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            uri = f'{Path(self.db_path).absolute().as_uri()}?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=64)
+            try:
+                conn.execute('PRAGMA busy_timeout=5000')
+                if schema_version(conn) < MIGRATIONS[-1][0]:
+                    raise sqlite3.OperationalError('decisions 테이블이 아직 최신 버전이 아닙니다.')
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            try:
+                return self._connection().execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                return []
+
+    def fetch_since(self, last_id=0, market=None):
+        """DecisionStore.fetch_since와 같습니다."""
+        if market is None:
+            return self._query(SELECT_DECISIONS_SINCE, (last_id,))
+        return self._query(SELECT_MARKET_DECISIONS_SINCE, (last_id, market))
+
+    def markets(self):
+        return [market for market, in self._query(SELECT_MARKETS)]
+
+    def max_id(self):
+        rows = self._query('SELECT MAX(id) FROM decisions')
+        return (rows[0][0] or 0) if rows else 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_stores = {}
+_readers = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path=DB_PATH):
+    """경로별로 하나의 DecisionStore(연결)를 만들어 재사용합니다."""
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = DecisionStore(db_path)
+            _stores[db_path] = store
+            atexit.register(store.close)
+        return store
+
+
+def get_reader(db_path=DB_PATH):
+    """경로별로 하나의 ReadOnlyDecisionStore(읽기 전용 연결)를 만들어 재사용합니다."""
+    with _stores_lock:
+        reader = _readers.get(db_path)
+        if reader is None:
+            reader = ReadOnlyDecisionStore(db_path)
+            _readers[db_path] = reader
+            atexit.register(reader.close)
+        return reader
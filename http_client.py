@@ -0,0 +1,168 @@
+"""
+외부 HTTP 호출(슬랙, SerpApi 뉴스, 공포/탐욕 지수, DeepL)이 함께 쓰는 클라이언트 계층입니다.
+
+- 하나의 requests.Session을 공유해 호스트별 연결을 재사용(keep-alive)합니다.
+- 호스트별 (연결, 읽기) 타임아웃을 적용해 응답 없는 소켓이 프로세스 전체를 멈추지 않게 합니다.
+- 연결 오류와 429/5xx 응답은 상한이 있는 지수 백오프로 재시도합니다. (POST는 연결 단계 오류만 재시도)
+- connection_stats()로 호스트별 요청 수, 새 연결 수, 재사용 수, 재시도 수를 볼 수 있습니다.
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+DEFAULT_TIMEOUT = (3.05, 10)   # (연결, 읽기) 초
+HOST_TIMEOUTS = {
+    "slack.com": (3.05, 10),
+    "serpapi.com": (3.05, 20),
+    "api.alternative.me": (3.05, 10),
+}
+
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5   # 0.5, 1, 2초 ...
+BACKOFF_MAX = 8        # 재시도 간격 상한(초)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+POOL_CONNECTIONS = 10  # 유지할 호스트별 연결 풀 수
+POOL_MAXSIZE = 10      # 호스트당 최대 연결 수 (동시 실행 단계 수 이상)
+
+_lock = threading.Lock()
+_session = None
+_retry_counts = {}
+_deepl_translators = {}
+
+
+class _CountingRetry(Retry):
+    """재시도할 때마다 호스트별 재시도 횟수를 기록합니다."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        host = _pool.host if _pool is not None else "unknown"
+        with _lock:
+            _retry_counts[host] = _retry_counts.get(host, 0) + 1
+        metrics.inc("retries", host=host)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _build_session():
+    retry = _CountingRetry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_max=BACKOFF_MAX,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 Session을 돌려줍니다."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def timeout_for(url):
+    host = urlsplit(url).hostname or ""
+    for suffix, timeout in HOST_TIMEOUTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return timeout
+    return DEFAULT_TIMEOUT
+
+
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", timeout_for(url))
+    host = urlsplit(url).hostname or ""
+    metrics.inc("api_calls", service=host)
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except Exception:
+        metrics.inc("api_errors", service=host)
+        raise
+    if response.status_code >= 400:
+        metrics.inc("api_errors", service=host)
+    body = response.request.body
+    metrics.inc("bytes", len(body) if body else 0, service=host, direction="sent")
+    metrics.inc("bytes", len(response.content), service=host, direction="received")
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def connection_stats():
+    """
+    호스트별 연결 재사용 통계입니다.
+
+    반환값:
+    - dict: {호스트: {"requests", "new_connections", "reused", "retries"}}
+    """
+    stats = {}
+    session = _session
+    if session is not None:
+        adapter = session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            entry = stats.setdefault(pool.host, {"requests": 0, "new_connections": 0, "reused": 0, "retries": 0})
+            entry["requests"] += pool.num_requests
+            entry["new_connections"] += pool.num_connections
+            entry["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    with _lock:
+        for host, count in _retry_counts.items():
+            stats.setdefault(host, {"requests": 0, "new_connections": 0, "reused": 0, "retries": 0})["retries"] = count
+    return stats
+
+
+def format_connection_stats():
+    parts = [
+        f"{host} 요청 {s['requests']} / 새 연결 {s['new_connections']} / 재사용 {s['reused']} / 재시도 {s['retries']}"
+        for host, s in sorted(connection_stats().items())
+    ]
+    return "HTTP 연결: " + (", ".join(parts) if parts else "기록 없음")
+
+
+def get_deepl_translator(api_key):
+    """
+    API 키별로 하나의 deepl.Translator를 재사용합니다.
+
+    Translator는 내부에 자신의 requests.Session을 가지고 있으므로, 재사용하면 연결도 유지됩니다.
+    """
+    import deepl
+
+    with _lock:
+        translator = _deepl_translators.get(api_key)
+        if translator is None:
+            translator = deepl.Translator(api_key)
+            _deepl_translators[api_key] = translator
+        return translator
+
+
+def configure_deepl():
+    """
+    deepl 패키지의 재시도 횟수와 타임아웃을 이 모듈의 값으로 맞춥니다. 프로그램 시작 시 한 번 호출합니다.
+
+    deepl.Translator는 이 값들을 생성자 옵션으로 받지 않고 모듈 전역(deepl.http_client)에서 읽으므로
+    프로세스의 모든 deepl 사용에 적용됩니다. 그래서 번역기를 만들 때마다 바꾸지 않고 진입점에서만 설정합니다.
+    """
+    import deepl
+
+    deepl.http_client.max_network_retries = MAX_RETRIES
+    deepl.http_client.min_connection_timeout = DEFAULT_TIMEOUT[1]
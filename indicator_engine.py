@@ -0,0 +1,307 @@
+"""
+캔들이 하나 마감될 때마다 지표를 O(1)로 갱신하는 스트리밍 지표 엔진입니다.
+
+indicators.add_indicators가 매 사이클 전체 프레임을 다시 계산하는 대신,
+시리즈(마켓/캔들 간격)마다 이동 합계, 지수 가중 평균, 최고/최저 덱 등의 상태를 들고 있다가
+새 캔들 하나만 반영합니다. 같은 캔들을 처음부터 넣으면 add_indicators와 같은 값을 냅니다.
+(pandas_ta 0.3.14b 기준: EMA는 SMA로 초기화, RSI는 adjust=True RMA, 스토캐스틱은 SMA 평활)
+
+사용 예:
+    engine = IndicatorEngine()
+    for candle in candles:          # {'open', 'high', 'low', 'close', ...}
+        values = engine.update(candle)
+    preview = engine.peek(current_candle)  # 진행 중인 캔들: 상태를 바꾸지 않고 계산
+"""
+import copy
+import math
+from collections import deque
+
+import pandas as pd
+
+from indicators import INDICATOR_COLUMNS
+
+NAN = float('nan')
+
+
+class _RollingWindow:
+    """고정 길이 창의 합계와 편차 제곱합을 O(1)로 유지합니다."""
+
+    def __init__(self, length):
+        self.length = length
+        self.values = deque()
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.updates = 0
+
+    def update(self, value):
+        self.values.append(value)
+        if len(self.values) > self.length:
+            old = self.values.popleft()
+            old_mean = self.mean
+            self.mean += (value - old) / self.length
+            self.ssqdm += (value - old) * (value - self.mean + old - old_mean)
+        else:
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.ssqdm += delta * (value - self.mean)
+
+        # 부동소수점 오차 누적을 막기 위해 창 길이만큼 갱신할 때마다 다시 계산 (분할 상환 O(1))
+        self.updates += 1
+        if self.updates % self.length == 0:
+            self.mean = math.fsum(self.values) / len(self.values)
+            self.ssqdm = math.fsum((v - self.mean) ** 2 for v in self.values)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.length
+
+    def average(self):
+        return self.mean if self.ready else NAN
+
+    def std(self):
+        # pandas rolling().std() 와 같은 표본 표준편차(ddof=1)
+        if not self.ready or self.length < 2:
+            return NAN
+        return math.sqrt(max(self.ssqdm, 0.0) / (self.length - 1))
+
+
+class _RollingExtreme:
+    """고정 길이 창의 최고값(또는 최저값)을 단조 덱으로 분할 상환 O(1)에 유지합니다."""
+
+    def __init__(self, length, maximum=True):
+        self.length = length
+        self.maximum = maximum
+        self.window = deque()   # (순번, 값)
+        self.count = 0
+
+    def update(self, value):
+        if self.maximum:
+            while self.window and self.window[-1][1] <= value:
+                self.window.pop()
+        else:
+            while self.window and self.window[-1][1] >= value:
+                self.window.pop()
+        self.window.append((self.count, value))
+        if self.window[0][0] <= self.count - self.length:
+            self.window.popleft()
+        self.count += 1
+
+    def value(self):
+        return self.window[0][1] if self.count >= self.length else NAN
+
+
+class _Ewm:
+    """pandas Series.ewm(...).mean()과 같은 점화식의 지수 가중 평균입니다."""
+
+    def __init__(self, alpha, adjust=False, min_periods=0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.count = 0
+
+    def update(self, value):
+        if math.isnan(value):
+            return self.value()
+        self.count += 1
+        if self.count == 1:
+            self.weighted = value
+            self.old_wt = 1.0
+        else:
+            new_wt = 1.0 if self.adjust else self.alpha
+            self.old_wt *= 1.0 - self.alpha
+            if self.weighted != value:
+                self.weighted = (self.old_wt * self.weighted + new_wt * value) / (self.old_wt + new_wt)
+            self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        return self.value()
+
+    def value(self):
+        return self.weighted if self.count >= max(self.min_periods, 1) else NAN
+
+
+class _Ema:
+    """pandas_ta.ema (presma=True): 첫 length개의 SMA로 시작하는 EMA 입니다."""
+
+    def __init__(self, length):
+        self.length = length
+        self.seed = []
+        self.ewm = _Ewm(2.0 / (length + 1))
+
+    def update(self, value):
+        if self.seed is not None:
+            self.seed.append(value)
+            if len(self.seed) < self.length:
+                return NAN
+            value = sum(self.seed) / self.length
+            self.seed = None
+        return self.ewm.update(value)
+
+
+class _Rsi:
+    """pandas_ta.rsi: 상승/하락폭의 RMA(alpha=1/length, adjust=True, min_periods=length) 비율입니다."""
+
+    def __init__(self, length):
+        self.previous = None
+        self.positive = _Ewm(1.0 / length, adjust=True, min_periods=length)
+        self.negative = _Ewm(1.0 / length, adjust=True, min_periods=length)
+
+    def update(self, close):
+        if self.previous is None:
+            self.previous = close
+            return NAN
+        change = close - self.previous
+        self.previous = close
+        positive_avg = self.positive.update(max(change, 0.0))
+        negative_avg = abs(self.negative.update(min(change, 0.0)))
+        total = positive_avg + negative_avg
+        if math.isnan(total) or total == 0:
+            return NAN
+        return 100 * positive_avg / total
+
+
+class _Stoch:
+    """pandas_ta.stoch(k, d, smooth_k): %K는 원시 스토캐스틱의 SMA, %D는 %K의 SMA 입니다."""
+
+    def __init__(self, k, d, smooth_k):
+        self.highest = _RollingExtreme(k, maximum=True)
+        self.lowest = _RollingExtreme(k, maximum=False)
+        self.smooth_k = _RollingWindow(smooth_k)
+        self.smooth_d = _RollingWindow(d)
+
+    def update(self, high, low, close):
+        self.highest.update(high)
+        self.lowest.update(low)
+        hh, ll = self.highest.value(), self.lowest.value()
+        if math.isnan(hh):
+            return NAN, NAN
+        # pandas_ta non_zero_range: 범위가 0이면 아주 작은 값을 더해 0으로 나누는 것을 방지
+        value_range = hh - ll
+        stoch = 0.0 if value_range == 0 else 100 * (close - ll) / value_range
+
+        self.smooth_k.update(stoch)
+        stoch_k = self.smooth_k.average()
+        if math.isnan(stoch_k):
+            return NAN, NAN
+        self.smooth_d.update(stoch_k)
+        return stoch_k, self.smooth_d.average()
+
+
+class IndicatorEngine:
+    """하나의 캔들 시리즈에 대한 지표 상태를 유지합니다."""
+
+    def __init__(self):
+        self.sma = {length: _RollingWindow(length) for length in (3, 5, 10, 20)}
+        self.ema = {length: _Ema(length) for length in (3, 5, 10, 20)}
+        self.rsi = _Rsi(14)
+        self.stoch = _Stoch(k=14, d=3, smooth_k=3)
+        self.macd_fast = _Ewm(2.0 / (12 + 1))
+        self.macd_slow = _Ewm(2.0 / (26 + 1))
+        self.macd_signal = _Ewm(2.0 / (9 + 1))
+        self.bollinger = self.sma[20]   # SMA_20과 같은 창을 공유
+
+    def update(self, candle):
+        """마감된 캔들 하나를 반영하고 지표 값 dict를 돌려줍니다."""
+        close = float(candle['close'])
+        values = {}
+
+        for length, window in self.sma.items():
+            window.update(close)
+            values[f'SMA_{length}'] = window.average()
+        for length, ema in self.ema.items():
+            values[f'EMA_{length}'] = ema.update(close)
+
+        values['RSI_14'] = self.rsi.update(close)
+        values['STOCHk_14_3_3'], values['STOCHd_14_3_3'] = self.stoch.update(
+            float(candle['high']), float(candle['low']), close
+        )
+
+        macd = self.macd_fast.update(close) - self.macd_slow.update(close)
+        signal = self.macd_signal.update(macd)
+        values['MACD'] = macd
+        values['Signal_Line'] = signal
+        values['MACD_Histogram'] = macd - signal
+
+        middle = self.bollinger.average()
+        std_dev = self.bollinger.std()
+        values['Middle_Band'] = middle
+        values['Upper_Band'] = middle + (std_dev * 2)
+        values['Lower_Band'] = middle - (std_dev * 2)
+
+        return values
+
+    def peek(self, candle):
+        """상태를 바꾸지 않고 캔들을 반영했을 때의 지표 값을 계산합니다. (진행 중인 캔들용)"""
+        return copy.deepcopy(self).update(candle)
+
+
+class IndicatorSeries:
+    """
+    캔들 저장소에서 읽은 프레임에 지표를 붙이는 시리즈 단위 래퍼입니다.
+
+    상태는 처음 받은 프레임의 첫 캔들부터 이어지며, 이후에는 마지막으로 반영한 캔들(last_index)보다 새로 마감된 캔들만
+    엔진에 넣습니다. 프레임의 시작이 밀려도(고정 길이 창) 상태는 그대로 유지하므로 사이클당 비용은 새 캔들 수에만 비례합니다.
+    그래서 값은 add_indicators(처음부터 지금까지의 캔들)과 같고, 지수 가중 지표가 충분히 수렴하도록
+    처음에는 보낼 창보다 긴 이력(WARMUP_CANDLES)을 넘기는 것이 좋습니다.
+    프레임의 마지막 캔들은 진행 중일 수 있으므로 peek으로만 계산합니다.
+    """
+
+    def __init__(self, history=1000):
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        self.engine = IndicatorEngine()
+        self.rows = {}
+        self.last_index = None
+
+    def _is_continuous(self, df, window):
+        if self.last_index is None or df.empty:
+            return False
+        # 저장된 마지막 캔들과 이어지지 않거나(중단 후 재시작) 이미 반영한 캔들이 마지막(진행 중)이거나
+        # 돌려줄 창에 기억하지 못하는 과거 캔들이 있으면 다시 시작
+        if self.last_index not in df.index or df.index[-1] <= self.last_index:
+            return False
+        return all(index in self.rows for index in window.index[window.index <= self.last_index])
+
+    def apply(self, df, count=None):
+        """df에 지표 컬럼을 붙여 마지막 count개 행(없으면 전체)을 돌려줍니다."""
+        window = df if count is None else df.iloc[-count:]
+        if not self._is_continuous(df, window):
+            self.reset()
+        if df.empty:
+            return pd.concat([window, pd.DataFrame(columns=INDICATOR_COLUMNS, index=window.index)], axis=1)
+
+        start = 0 if self.last_index is None else df.index.searchsorted(self.last_index, side='right')
+        closed = df.iloc[start:-1]
+        for index, candle in zip(closed.index, closed.to_dict('records')):
+            self.rows[index] = self.engine.update(candle)
+            self.last_index = index
+
+        rows = [self.rows[index] for index in window.index[:-1]]
+        rows.append(self.engine.peek(df.iloc[-1].to_dict()))
+
+        # 오래된 값은 정리
+        if len(self.rows) > self.history:
+            for index in sorted(self.rows)[:len(self.rows) - self.history]:
+                del self.rows[index]
+
+        indicators = pd.DataFrame(rows, index=window.index, columns=INDICATOR_COLUMNS)
+        return pd.concat([window, indicators], axis=1)
+
+
+# 처음 상태를 만들 때 읽을 캔들 수 (업비트 요청 한 번 분량, EMA/RSI가 수렴하기에 충분한 길이)
+WARMUP_CANDLES = 200
+
+# (마켓, 캔들 간격)별 지표 상태
+_series = {}
+
+
+def add_indicators_incremental(df, key, count=None):
+    """
+    key(예: ("KRW-BTC", "day"))별로 상태를 유지하면서 df에 지표 컬럼을 붙여 마지막 count개 행을 돌려줍니다.
+    df에는 count개보다 긴 이력(예: WARMUP_CANDLES + count개)을 넘기고, 새로 마감된 캔들만 상태에 반영됩니다.
+    """
+    if key not in _series:
+        _series[key] = IndicatorSeries()
+    return _series[key].apply(df, count)
@@ -0,0 +1,203 @@
+"""
+OHLCV DataFrame에 기술적 지표 컬럼을 추가하는 함수들입니다.
+
+- compute_indicators: 연속된 NumPy 배열에서 모든 지표를 한 번에 계산하는 배치 커널
+- add_indicators: 위 커널로 DataFrame에 지표 컬럼을 붙임 (pandas_ta 불필요)
+- add_indicators_ta: 기존 pandas_ta 기반 구현. 정합성 테스트와 벤치마크의 기준으로만 사용
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# add_indicators가 추가하는 지표 컬럼 (순서 포함)
+INDICATOR_COLUMNS = [
+    'SMA_3', 'SMA_5', 'SMA_10', 'SMA_20',
+    'EMA_3', 'EMA_5', 'EMA_10', 'EMA_20',
+    'RSI_14',
+    'STOCHk_14_3_3', 'STOCHd_14_3_3',
+    'MACD', 'Signal_Line', 'MACD_Histogram',
+    'Middle_Band', 'Upper_Band', 'Lower_Band',
+]
+
+EWM_BLOCK = 64   # 지수 가중 평균을 블록 단위로 벡터화할 때의 블록 크기
+
+
+def _rolling(x, length, func, out):
+    # 창이 다 찬 위치부터 out에 기록 (앞부분은 NaN 유지)
+    if len(x) >= length:
+        out[length - 1:] = func(sliding_window_view(x, length), axis=1)
+    return out
+
+
+def _sma(x, length, out):
+    # 누적합의 차이로 이동 평균 계산 (첫 값을 빼서 누적합의 크기와 반올림 오차를 줄임)
+    if len(x) >= length:
+        shifted = np.concatenate(([0.0], np.cumsum(x - x[0])))
+        out[length - 1:] = (shifted[length:] - shifted[:-length]) / length + x[0]
+    return out
+
+
+def _ewm_filter(x, decay, gain, carry):
+    """
+    y[t] = decay * y[t-1] + gain * x[t] 를 블록 단위로 벡터화해 계산합니다. (carry = y[-1])
+
+    블록 안에서는 y[j] = gain * decay^j * cumsum(x[k] * decay^-k) + decay^(j+1) * (이전 블록의 마지막 값)
+    이므로, 모든 블록의 내부 값을 한 번에 구한 뒤 블록 경계의 값만 순서대로 이어 붙입니다.
+    """
+    n = len(x)
+    blocks = -(-n // EWM_BLOCK)
+    padded = np.zeros(blocks * EWM_BLOCK)
+    padded[:n] = x
+    padded = padded.reshape(blocks, EWM_BLOCK)
+
+    base = decay ** np.arange(EWM_BLOCK)
+    local = gain * base * np.cumsum(padded / base, axis=1)
+
+    carries = np.empty(blocks)
+    block_decay = decay ** EWM_BLOCK
+    for block in range(blocks):
+        carries[block] = carry
+        carry = block_decay * carry + local[block, -1]
+
+    return (local + np.outer(carries, decay * base)).ravel()[:n]
+
+
+def _ewm_mean(x, alpha):
+    """pandas Series.ewm(alpha=alpha, adjust=False).mean() (x에 NaN이 없다고 가정)"""
+    if len(x) == 0:
+        return x.copy()
+    # 첫 값을 기준으로 옮겨 계산하면 큰 가격 값에서도 반올림 오차가 줄어듦
+    return _ewm_filter(x - x[0], 1.0 - alpha, alpha, 0.0) + x[0]
+
+
+def _ewm_mean_adjusted(x, alpha):
+    """pandas Series.ewm(alpha=alpha, adjust=True).mean() (x에 NaN이 없다고 가정)"""
+    decay = 1.0 - alpha
+    numerator = _ewm_filter(x, decay, 1.0, 0.0)
+    denominator = (1.0 - decay ** np.arange(1, len(x) + 1)) / alpha   # 가중치 합 (등비수열)
+    return numerator / denominator
+
+
+def _ema(x, length, out):
+    # pandas_ta.ema(presma=True): 첫 length개의 평균으로 시작
+    if len(x) >= length:
+        seeded = x[length - 1:].copy()
+        seeded[0] = x[:length].mean()
+        out[length - 1:] = _ewm_mean(seeded, 2.0 / (length + 1))
+    return out
+
+
+def _rsi(close, length, out):
+    # pandas_ta.rsi: 상승/하락폭의 RMA(alpha=1/length, adjust=True, min_periods=length)
+    if len(close) > length:
+        change = np.diff(close)
+        positive = _ewm_mean_adjusted(np.maximum(change, 0.0), 1.0 / length)
+        negative = np.abs(_ewm_mean_adjusted(np.minimum(change, 0.0), 1.0 / length))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 * positive / (positive + negative)
+        out[length:] = rsi[length - 1:]
+    return out
+
+
+def _stoch(high, low, close, k, d, smooth_k, out_k, out_d):
+    # pandas_ta.stoch: 원시 스토캐스틱의 SMA(smooth_k)가 %K, %K의 SMA(d)가 %D
+    if len(close) < k:
+        return out_k, out_d
+    highest = np.max(sliding_window_view(high, k), axis=1)
+    lowest = np.min(sliding_window_view(low, k), axis=1)
+    value_range = highest - lowest
+    if (value_range == 0).any():
+        # pandas_ta non_zero_range와 같은 처리
+        value_range = value_range + sys.float_info.epsilon
+    stoch = 100 * (close[k - 1:] - lowest) / value_range
+
+    stoch_k = _sma(stoch, smooth_k, np.full(len(stoch), np.nan))
+    out_k[k - 1:] = stoch_k
+    first = k - 1 + smooth_k - 1
+    _sma(out_k[first:], d, out_d[first:])
+    return out_k, out_d
+
+
+def compute_indicators(high, low, close):
+    """
+    고가/저가/종가 배열로 INDICATOR_COLUMNS 순서의 (n, 17) float64 배열을 계산합니다.
+
+    값은 add_indicators_ta(pandas_ta 0.3.14b 기준)와 부동소수점 오차 범위 안에서 같습니다.
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+
+    # 컬럼 단위로 연속된 메모리에 기록한 뒤 한 번만 전치
+    result = np.full((len(INDICATOR_COLUMNS), len(close)), np.nan)
+    columns = dict(zip(INDICATOR_COLUMNS, result))
+
+    for length in (3, 5, 10, 20):
+        _sma(close, length, columns[f'SMA_{length}'])
+        _ema(close, length, columns[f'EMA_{length}'])
+
+    _rsi(close, 14, columns['RSI_14'])
+    _stoch(high, low, close, 14, 3, 3, columns['STOCHk_14_3_3'], columns['STOCHd_14_3_3'])
+
+    if len(close):
+        columns['MACD'][:] = _ewm_mean(close, 2.0 / (12 + 1)) - _ewm_mean(close, 2.0 / (26 + 1))
+        columns['Signal_Line'][:] = _ewm_mean(columns['MACD'], 2.0 / (9 + 1))
+        columns['MACD_Histogram'][:] = columns['MACD'] - columns['Signal_Line']
+
+    columns['Middle_Band'][:] = columns['SMA_20']
+    std_dev = _rolling(close, 20, lambda window, axis: np.std(window, axis=axis, ddof=1), np.full(len(close), np.nan))
+    columns['Upper_Band'][:] = columns['Middle_Band'] + (std_dev * 2)
+    columns['Lower_Band'][:] = columns['Middle_Band'] - (std_dev * 2)
+
+    return result.T
+
+
+def add_indicators(df):
+    values = compute_indicators(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+    indicators = pd.DataFrame(values, index=df.index, columns=INDICATOR_COLUMNS, copy=False)
+    return pd.concat([df, indicators], axis=1)
+
+
+def add_indicators_ta(df):
+    # pandas_ta는 import가 느려 정합성 확인이 필요할 때만 불러옴 (requirements에는 없으므로 따로 설치)
+    import pandas_ta as ta
+
+    # Moving Averages
+    # Calculate and add SMAs for 3, 5, 10, and 20-day periods
+    df['SMA_3'] = ta.sma(df['close'], length=3)
+    df['SMA_5'] = ta.sma(df['close'], length=5)
+    df['SMA_10'] = ta.sma(df['close'], length=10)
+    df['SMA_20'] = ta.sma(df['close'], length=20)
+
+    # Calculate and add EMAs for 3, 5, 10, and 20-day periods
+    df['EMA_3'] = ta.ema(df['close'], length=3)
+    df['EMA_5'] = ta.ema(df['close'], length=5)
+    df['EMA_10'] = ta.ema(df['close'], length=10)
+    df['EMA_20'] = ta.ema(df['close'], length=20)
+
+    # RSI
+    df['RSI_14'] = ta.rsi(df['close'], length=14)
+
+    # Stochastic Oscillator
+    stoch = ta.stoch(df['high'], df['low'], df['close'], k=14, d=3, smooth_k=3)
+    df = df.join(stoch)
+
+    # MACD
+    ema_fast = df['close'].ewm(span=12, adjust=False).mean()
+    ema_slow = df['close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = ema_fast - ema_slow
+    df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
+
+    # Bollinger Bands
+    df['Middle_Band'] = df['close'].rolling(window=20).mean()
+    # Calculate the standard deviation of closing prices over the last 20 days
+    std_dev = df['close'].rolling(window=20).std()
+    # Calculate the upper band (Middle Band + 2 * Standard Deviation)
+    df['Upper_Band'] = df['Middle_Band'] + (std_dev * 2)
+    # Calculate the lower band (Middle Band - 2 * Standard Deviation)
+    df['Lower_Band'] = df['Middle_Band'] - (std_dev * 2)
+
+    return df
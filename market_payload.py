@@ -0,0 +1,176 @@
+"""
+모델에 보내는 시장 분석 데이터(Data 2)를 문자열로 인코딩하는 함수들입니다.
+
+인코딩 종류:
+- split: 기존 형식. pd.concat([...]).to_json(orient='split')
+  지시문(Data 2)은 compact/relative만 설명하므로 모델에 보내지 않고 크기 비교(payload_size_report)의 기준으로만 씁니다.
+- compact: 워밍업(NaN) 행 제거, 프레임별 시작 시각 + 간격 단위 오프셋, 가격은 유효숫자 7자리로 반올림
+  (1원 이상 자릿수가 많은 가격은 원 단위 정수, 1원 미만 코인은 소수점 아래까지)
+- relative: compact와 같되, 가격류 컬럼을 기준가(일봉 마지막 종가) 대비 % 로 표시
+
+compact/relative 예:
+{"enc":"compact","columns":["t","open",...],
+ "frames":{"daily":{"start":"2024-04-01 09:00","step":"1d","rows":[[0,95000000,...],...]},
+           "hourly":{"start":"2024-04-21 13:00","step":"1h","rows":[[0,...],...]}}}
+"""
+import json
+import math
+
+ENCODINGS = ("split", "compact", "relative")
+PROMPT_ENCODINGS = ("compact", "relative")   # MARKET_DATA_ENCODING으로 고를 수 있는 형식
+
+# 컬럼 종류별 표현 방법
+PRICE_COLUMNS = {
+    'open', 'high', 'low', 'close',
+    'SMA_3', 'SMA_5', 'SMA_10', 'SMA_20', 'EMA_3', 'EMA_5', 'EMA_10', 'EMA_20',
+    'Middle_Band', 'Upper_Band', 'Lower_Band',
+}
+PRICE_DIFF_COLUMNS = {'MACD', 'Signal_Line', 'MACD_Histogram'}
+OSCILLATOR_COLUMNS = {'RSI_14', 'STOCHk_14_3_3', 'STOCHd_14_3_3'}
+COLUMN_RENAMES = {'value': 'value_1M'}   # 거래대금은 백만 원 단위
+PRICE_SIGNIFICANT_DIGITS = 7
+
+
+def _format_step(seconds):
+    if seconds % 86400 == 0:
+        return f"{seconds // 86400}d"
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 60}m"
+
+
+def _drop_warmup_rows(df):
+    """지표가 아직 계산되지 않은 앞쪽 행(NaN 포함)을 제거합니다."""
+    complete = df.notna().all(axis=1).to_numpy()
+    if not complete.any():
+        return df.iloc[0:0]
+    return df.iloc[complete.argmax():]
+
+
+def _round_price(value, significant=PRICE_SIGNIFICANT_DIGITS):
+    """
+    가격을 유효숫자 significant자리로 반올림합니다. 정수 자릿수가 그보다 많으면 원 단위 정수입니다.
+
+    예: 95,012,345.6 -> 95012346, 712.34567 -> 712.3457, 0.4512345678 -> 0.4512346
+    """
+    if value == 0 or not math.isfinite(value):
+        return 0
+    digits = significant - 1 - math.floor(math.log10(abs(value)))
+    if digits <= 0:
+        return int(round(value))
+    return round(value, digits)
+
+
+def _encode_value(column, value, reference):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if column in OSCILLATOR_COLUMNS:
+        return round(value, 2)
+    if column == 'volume':
+        return round(value, 3)
+    if column == 'value':
+        return int(round(value / 1e6))
+    if reference is not None and column in PRICE_COLUMNS:
+        return round((value / reference - 1) * 100, 3)
+    if reference is not None and column in PRICE_DIFF_COLUMNS:
+        return round(value / reference * 100, 4)
+    return _round_price(value)
+
+
+def _encode_compact(frames, relative):
+    columns = None
+    encoded_frames = {}
+    reference = None
+    if relative:
+        for df in frames.values():
+            if not df.empty:
+                reference = float(df['close'].iloc[-1])
+                break
+
+    for name, df in frames.items():
+        if columns is None:
+            columns = list(df.columns)
+        df = _drop_warmup_rows(df)
+        if df.empty:
+            encoded_frames[name] = {"rows": []}
+            continue
+
+        start = df.index[0]
+        steps = (df.index - start).total_seconds().astype(int)
+        step = int(min(steps[steps > 0])) if len(steps) > 1 else 0
+        offsets = steps // step if step else steps
+
+        rows = []
+        for offset, values in zip(offsets, df.itertuples(index=False, name=None)):
+            rows.append([int(offset)] + [_encode_value(column, value, reference) for column, value in zip(df.columns, values)])
+        encoded_frames[name] = {
+            "start": start.strftime("%Y-%m-%d %H:%M"),
+            "step": _format_step(step),
+            "rows": rows,
+        }
+
+    payload = {"enc": "relative" if relative else "compact"}
+    if reference is not None:
+        payload["ref_close"] = _round_price(reference)
+    payload["columns"] = ["t"] + [COLUMN_RENAMES.get(column, column) for column in columns or []]
+    payload["frames"] = encoded_frames
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def encode_market_data(frames, encoding="compact"):
+    """
+    {'daily': df_daily, 'hourly': df_hourly} 형태의 프레임들을 인코딩합니다.
+
+    매개변수:
+    - encoding (str): 'split', 'compact', 'relative' 중 하나입니다.
+    """
+    if encoding == "split":
+        import pandas as pd   # 기존 형식에서만 사용 (prompt_builder가 count_tokens만 쓸 때 pandas를 읽지 않음)
+
+        combined_df = pd.concat(list(frames.values()), keys=list(frames.keys()))
+        return combined_df.to_json(orient='split')
+    if encoding in ("compact", "relative"):
+        return _encode_compact(frames, relative=encoding == "relative")
+    raise ValueError(f"지원하지 않는 인코딩입니다: {encoding} (가능한 값: {', '.join(ENCODINGS)})")
+
+
+def count_tokens(text, model="gpt-4"):
+    """
+    모델 토큰 수를 셉니다. tiktoken이 없으면 약 4바이트당 1토큰으로 추정합니다.
+
+    반환값:
+    - (int, bool): 토큰 수와 정확한 값인지 여부입니다.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return math.ceil(len(text.encode("utf-8")) / 4), False
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(encoding.encode(text)), True
+
+
+def prompt_encoding(value):
+    """MARKET_DATA_ENCODING 값을 확인합니다. 지시문이 설명하지 않는 형식(split 등)이면 ValueError입니다."""
+    encoding = value.strip().lower()
+    if encoding not in PROMPT_ENCODINGS:
+        raise ValueError(f"모델에 보낼 수 없는 시장 데이터 형식입니다: {value} (가능한 값: {', '.join(PROMPT_ENCODINGS)})")
+    return encoding
+
+
+def payload_size_report(frames, selected="compact"):
+    """인코딩별 바이트 수와 토큰 수를 비교하는 문자열을 만듭니다."""
+    lines = []
+    baseline = None
+    for encoding in ENCODINGS:
+        text = encode_market_data(frames, encoding)
+        size = len(text.encode("utf-8"))
+        tokens, exact = count_tokens(text)
+        if baseline is None:
+            baseline = tokens
+        marker = "*" if encoding == selected else " "
+        approx = "" if exact else "~"
+        lines.append(f"{marker} {encoding:<8} {size:>7,} bytes  {approx}{tokens:>6,} tokens ({tokens / baseline * 100:.0f}%)")
+    return "시장 데이터 크기:\n" + "\n".join(lines)
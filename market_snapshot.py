@@ -0,0 +1,176 @@
+"""
+한 사이클 동안 모든 단계가 함께 보는 시세/계좌 스냅샷입니다.
+
+사이클을 시작할 때 invalidate()로 비워 두면 처음 읽는 단계에서 한 번만 업비트를 조회하고,
+이후 단계들(현재 상태, 매수/매도 수량 계산, DB 저장, 거래 전후 비교)은 같은 값을 재사용합니다.
+
+여러 마켓을 넘기면 호가창과 현재가를 모든 마켓에 대해 한 번의 묶음 요청으로 조회합니다.
+(마켓 수가 늘어도 사이클당 시세 요청 수는 거의 그대로이고, 잔고 조회는 항상 한 번입니다.)
+
+갱신 규칙:
+- 시세(호가창, 현재가): stream(market_stream.MarketStream)이 연결되어 있으면 네트워크 없이 그 값을 읽고,
+  아니면 REST로 조회한 뒤 max_age초가 지나면 다시 조회
+- 계좌(잔고, 평균 매수가): 주문의 체결 내역을 apply_fill()로 반영하면 다시 조회하지 않고,
+  체결을 확인하지 못해 invalidate_account()가 호출된 뒤에는 처음 읽을 때만 다시 조회
+"""
+import math
+import threading
+import time
+
+import metrics
+
+
+MAX_TICKERS_PER_PRICE_REQUEST = 200   # pyupbit.get_current_price가 한 번에 묶어 보내는 최대 마켓 수
+
+
+class MarketSnapshot:
+    def __init__(self, upbit, tickers="KRW-BTC", max_age=60, stream=None):
+        """
+        매개변수:
+        - upbit: pyupbit.Upbit 또는 처음 잔고를 조회할 때 그것을 만들어 돌려주는 함수입니다. (클라이언트 생성을 미룰 때)
+        """
+        self._upbit = upbit
+        self.stream = stream
+        self.tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        self.ticker = self.tickers[0]   # 마켓을 지정하지 않은 조회(orderbook, current_price, ask_price)의 기본 마켓
+        self.max_age = max_age
+        self.api_calls = 0
+        self._lock = threading.RLock()
+        self.invalidate()
+
+    @property
+    def upbit(self):
+        return self._upbit() if callable(self._upbit) else self._upbit
+
+    def invalidate(self):
+        """새 사이클 시작: 시세와 계좌를 모두 다음에 읽을 때 다시 조회합니다."""
+        with self._lock:
+            self.quotes_at = None
+            self.account_at = None
+            self._orderbooks = {}
+            self._prices = {}
+            self._balances = {}
+
+    def invalidate_account(self):
+        """주문 체결 후: 계좌 정보만 다음에 읽을 때 다시 조회합니다. (시세는 사이클 내내 같은 값 유지)"""
+        with self._lock:
+            self.account_at = None
+
+    def refresh_quotes(self):
+        import pyupbit   # pandas까지 읽으므로 처음 조회할 때 import
+
+        with self._lock:
+            # 모든 마켓을 한 번에 조회 (마켓이 하나면 pyupbit가 리스트 대신 단일 값을 돌려줌)
+            orderbooks = pyupbit.get_orderbook(ticker=self.tickers)
+            prices = pyupbit.get_current_price(self.tickers)
+            calls = 1 + math.ceil(len(self.tickers) / MAX_TICKERS_PER_PRICE_REQUEST)
+            self.api_calls += calls
+            metrics.inc("api_calls", calls, service="api.upbit.com")
+            if orderbooks is None or prices is None:
+                raise Exception(f"{', '.join(self.tickers)} 시세 조회 실패")
+            if isinstance(orderbooks, dict):
+                orderbooks = [orderbooks]
+            if not isinstance(prices, dict):
+                prices = {self.tickers[0]: prices}
+            self._orderbooks = {orderbook.get('market', self.tickers[0]): orderbook for orderbook in orderbooks}
+            self._prices = dict(prices)
+            self.quotes_at = time.monotonic()
+
+    def refresh_account(self):
+        with self._lock:
+            balances = self.upbit.get_balances()
+            self.api_calls += 1
+            metrics.inc("api_calls", service="api.upbit.com")
+            if not isinstance(balances, list):
+                raise Exception(f"잔고 조회 실패: {balances}")
+            self._balances = {
+                b['currency']: (float(b['balance']), float(b['avg_buy_price']))
+                for b in balances
+            }
+            self.account_at = time.monotonic()
+
+    def apply_fill(self, fill):
+        """
+        체결 내역(order_client.Fill)으로 잔고와 평균 매수가를 갱신합니다. (주문 후 잔고를 다시 조회하지 않음)
+
+        매수: 원화는 체결 금액 + 수수료만큼 줄고, 코인은 체결 수량만큼 늘며 평균 매수가는 체결 금액 기준으로 다시 계산
+        매도: 코인은 체결 수량만큼 줄고, 원화는 체결 금액 - 수수료만큼 늘어남 (모두 팔면 평균 매수가 0)
+        계좌를 아직 읽지 않았으면 아무것도 하지 않습니다. (다음에 읽을 때 체결이 반영된 잔고를 조회)
+        """
+        unit, currency = fill.market.split("-", 1)
+        with self._lock:
+            if self.account_at is None:
+                return
+            cash, cash_avg = self._balances.get(unit, (0.0, 0.0))
+            volume, avg = self._balances.get(currency, (0.0, 0.0))
+            if fill.side == "bid":
+                total = volume + fill.volume
+                avg = (avg * volume + fill.funds) / total if total else 0.0
+                self._balances[unit] = (cash - fill.funds - fill.paid_fee, cash_avg)
+                self._balances[currency] = (total, avg)
+            else:
+                remaining = max(volume - fill.volume, 0.0)
+                self._balances[unit] = (cash + fill.funds - fill.paid_fee, cash_avg)
+                self._balances[currency] = (remaining, avg if remaining > 1e-12 else 0.0)
+
+    def _ensure_quotes(self):
+        if self.quotes_at is None or time.monotonic() - self.quotes_at > self.max_age:
+            self.refresh_quotes()
+
+    def _ensure_account(self):
+        if self.account_at is None:
+            self.refresh_account()
+
+    def orderbook_for(self, ticker):
+        if self.stream is not None:
+            orderbook = self.stream.orderbook_for(ticker)
+            if orderbook is not None:
+                return orderbook
+        with self._lock:
+            self._ensure_quotes()
+            return self._orderbooks.get(ticker)
+
+    def price_for(self, ticker):
+        if self.stream is not None:
+            price = self.stream.price_for(ticker)
+            if price is not None:
+                return price
+        with self._lock:
+            self._ensure_quotes()
+            return self._prices.get(ticker)
+
+    def ask_price_for(self, ticker):
+        """최우선 매도 호가"""
+        return self.orderbook_for(ticker)['orderbook_units'][0]["ask_price"]
+
+    def prices(self):
+        """{마켓: 현재가} 전체"""
+        if self.stream is not None:
+            prices = self.stream.prices()
+            if prices is not None:
+                return prices
+        with self._lock:
+            self._ensure_quotes()
+            return dict(self._prices)
+
+    @property
+    def orderbook(self):
+        return self.orderbook_for(self.ticker)
+
+    @property
+    def current_price(self):
+        return self.price_for(self.ticker)
+
+    @property
+    def ask_price(self):
+        return self.ask_price_for(self.ticker)
+
+    def balance(self, currency):
+        with self._lock:
+            self._ensure_account()
+            return self._balances.get(currency, (0.0, 0.0))[0]
+
+    def avg_buy_price(self, currency):
+        with self._lock:
+            self._ensure_account()
+            return self._balances.get(currency, (0.0, 0.0))[1]
@@ -0,0 +1,197 @@
+"""
+업비트 WebSocket(ticker, orderbook)을 구독해 마켓별 최신 호가창과 현재가를 메모리에 유지합니다.
+
+- 백그라운드 스레드 하나가 연결을 유지하고, 받은 메시지로 마켓별 상태를 덮어씁니다.
+  (업비트 orderbook 메시지는 변경분이 아니라 매번 전체 호가이므로 받은 그대로 최신 상태가 됨)
+- 연결이 끊기면 지수 백오프로 다시 연결하고, 연결될 때마다 REST로 한 번 묶어 조회해 끊긴 동안의 상태를 맞춥니다. (resync)
+- 연결되어 있는 동안 orderbook_for/price_for는 네트워크 없이 메모리의 값을 돌려주고,
+  연결이 끊겼거나 아직 받은 값이 없으면 None을 돌려줘 MarketSnapshot이 REST 조회로 대신하게 합니다.
+
+호가창은 REST(pyupbit.get_orderbook)와 같은 모양({"market", "timestamp", "orderbook_units", ...})으로 저장합니다.
+"""
+import json
+import threading
+import time
+import uuid
+
+import metrics
+
+UPBIT_WEBSOCKET_URL = "wss://api.upbit.com/websocket/v1"
+RECONNECT_DELAY = 0.5      # 첫 재연결 대기(초)
+RECONNECT_DELAY_MAX = 30   # 재연결 대기 상한(초)
+RECV_TIMEOUT = 1.0         # stop()을 확인하는 주기(초)
+
+
+def orderbook_from_message(message):
+    """WebSocket orderbook 메시지를 REST 호가창 모양으로 바꿉니다."""
+    return {
+        "market": message["code"],
+        "timestamp": message["timestamp"],
+        "total_ask_size": message.get("total_ask_size"),
+        "total_bid_size": message.get("total_bid_size"),
+        "orderbook_units": [
+            {key: unit[key] for key in ("ask_price", "bid_price", "ask_size", "bid_size")}
+            for unit in message["orderbook_units"]
+        ],
+    }
+
+
+def rest_resync(tickers):
+    """REST로 모든 마켓의 호가창과 현재가를 한 번에 조회합니다. ({마켓: 호가창}, {마켓: 현재가})"""
+    import pyupbit   # pandas까지 읽으므로 처음 조회할 때 import
+
+    orderbooks = pyupbit.get_orderbook(ticker=list(tickers))
+    prices = pyupbit.get_current_price(list(tickers))
+    metrics.inc("api_calls", 2, service="api.upbit.com")
+    if isinstance(orderbooks, dict):
+        orderbooks = [orderbooks]
+    if prices is not None and not isinstance(prices, dict):
+        prices = {tickers[0]: prices}
+    return {orderbook["market"]: orderbook for orderbook in orderbooks or []}, dict(prices or {})
+
+
+class MarketStream:
+    def __init__(self, tickers, url=UPBIT_WEBSOCKET_URL, resync=rest_resync, max_age=None):
+        """
+        매개변수:
+        - tickers: 구독할 마켓 목록입니다.
+        - resync: 연결될 때마다 호출해 상태를 맞출 함수입니다. (tickers -> ({마켓: 호가창}, {마켓: 현재가})) None이면 하지 않습니다.
+        - max_age: 이 시간(초) 넘게 갱신되지 않은 마켓은 오래된 값으로 보고 None을 돌려줍니다. None이면 연결 중에는 항상 유효합니다.
+        """
+        self.tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        self.url = url
+        self.resync = resync
+        self.max_age = max_age
+        self.connected = False
+        self.disabled = False   # websockets 패키지가 없어 스트림을 쓰지 않음
+        self.connects = 0
+        self.messages = 0
+        self.resyncs = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._orderbooks = {}
+        self._prices = {}
+        self._updated = {}   # 마켓 -> 마지막 갱신 시각 (monotonic)
+        self._connection = None
+        self._thread = None
+
+    # ---- 수명 ----
+    def start(self):
+        """
+        백그라운드 연결 스레드를 시작합니다.
+        websockets 패키지가 없으면 한 줄 안내만 출력하고 스트림을 끈 채로 둡니다. (REST 조회로 동작)
+        """
+        try:
+            from websockets.sync.client import connect
+        except ImportError as e:
+            self.disabled = True
+            self.last_error = repr(e)
+            print(f"websockets 패키지를 불러올 수 없어 실시간 시세(WebSocket)를 끄고 REST로 조회합니다: {e}")
+            return self
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(connect,), name="market-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        connection = self._connection
+        if connection is not None:
+            connection.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_ready(self, timeout=None):
+        """연결되어 상태를 맞출 때까지 기다립니다. 준비되면 True입니다. (스트림이 꺼져 있으면 바로 False)"""
+        if self.disabled:
+            return False
+        return self._ready.wait(timeout)
+
+    def _subscription(self):
+        return [
+            {"ticket": uuid.uuid4().hex[:12]},
+            {"type": "ticker", "codes": self.tickers},
+            {"type": "orderbook", "codes": self.tickers},
+            {"format": "DEFAULT"},
+        ]
+
+    def _run(self, connect):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=10, ping_interval=60) as connection:
+                    self._connection = connection
+                    connection.send(json.dumps(self._subscription()))
+                    self.connects += 1
+                    if self.resync is not None:
+                        self._apply_resync(*self.resync(self.tickers))
+                    with self._lock:
+                        self.connected = True
+                    self._ready.set()
+                    delay = RECONNECT_DELAY
+                    while not self._stop.is_set():
+                        try:
+                            message = connection.recv(timeout=RECV_TIMEOUT)
+                        except TimeoutError:
+                            continue
+                        self.apply(json.loads(message))
+            except Exception as e:
+                if not self._stop.is_set():
+                    self.last_error = repr(e)
+                    metrics.inc("api_errors", service="upbit-websocket")
+            finally:
+                self._connection = None
+                with self._lock:
+                    self.connected = False
+                self._ready.clear()
+            self._stop.wait(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    # ---- 상태 갱신 ----
+    def _apply_resync(self, orderbooks, prices):
+        now = time.monotonic()
+        with self._lock:
+            self._orderbooks.update(orderbooks)
+            self._prices.update(prices)
+            for ticker in set(orderbooks) | set(prices):
+                self._updated[ticker] = now
+            self.resyncs += 1
+
+    def apply(self, message):
+        """WebSocket 메시지 하나를 상태에 반영합니다."""
+        kind = message.get("type") or message.get("ty")
+        code = message.get("code") or message.get("cd")
+        with self._lock:
+            if kind == "ticker":
+                self._prices[code] = message["trade_price"]
+            elif kind == "orderbook":
+                self._orderbooks[code] = orderbook_from_message(message)
+            else:
+                return
+            self._updated[code] = time.monotonic()
+            self.messages += 1
+
+    # ---- 읽기 (네트워크 없음) ----
+    def _usable(self, ticker):
+        if not self.connected:
+            return False
+        updated = self._updated.get(ticker)
+        return updated is not None and (self.max_age is None or time.monotonic() - updated <= self.max_age)
+
+    def orderbook_for(self, ticker):
+        with self._lock:
+            return self._orderbooks.get(ticker) if self._usable(ticker) else None
+
+    def price_for(self, ticker):
+        with self._lock:
+            return self._prices.get(ticker) if self._usable(ticker) else None
+
+    def prices(self):
+        """모든 구독 마켓의 현재가입니다. 하나라도 쓸 수 없으면 None입니다."""
+        with self._lock:
+            if not all(self._usable(ticker) and ticker in self._prices for ticker in self.tickers):
+                return None
+            return {ticker: self._prices[ticker] for ticker in self.tickers}
@@ -0,0 +1,250 @@
+"""
+사이클 단계별 시간(span)과 카운터(API 호출, 재시도, 바이트, 토큰)를 모아 OpenMetrics 형식으로 내보냅니다.
+
+사용 예:
+    with metrics.cycle():                    # 한 사이클 (끝나면 METRICS_DB가 있으면 SQLite에 저장)
+        with metrics.span("model_call"):     # autotrade_stage_seconds{stage="model_call"}
+            ...
+        metrics.inc("api_calls", service="api.upbit.com")
+
+- METRICS_PORT 환경 변수가 있으면 start_from_env()가 127.0.0.1:METRICS_PORT/metrics 에 스크레이프 엔드포인트를 엽니다.
+- METRICS_DB 환경 변수가 있으면 사이클마다 단계별 시간과 카운터 증가량을 그 SQLite 파일에 저장합니다.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "autotrade_"
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 카운터 이름 -> 도움말 (OpenMetrics HELP)
+COUNTER_HELP = {
+    "api_calls": "외부 API 호출 수",
+    "api_errors": "실패한 외부 API 호출 수",
+    "retries": "HTTP 재시도 수",
+    "bytes": "외부 API와 주고받은 바이트 수",
+    "tokens": "모델 토큰 수",
+    "cycles": "실행한 사이클 수",
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _format_number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}     # (이름, 라벨) -> 값
+        self._stages = {}       # 라벨 -> _Histogram
+        self._cycle = None      # 진행 중인 사이클의 span 목록
+        self._last_cycle = None
+        self.db_path = None
+
+    # ---- 기록 ----
+    def inc(self, name, amount=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_span(self, stage, seconds):
+        key = _labels_key({"stage": stage})
+        with self._lock:
+            histogram = self._stages.get(key)
+            if histogram is None:
+                histogram = self._stages[key] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+            if self._cycle is not None:
+                self._cycle.append((stage, seconds))
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(stage, time.perf_counter() - started)
+
+    @contextmanager
+    def cycle(self, name="cycle"):
+        """사이클 전체를 감쌉니다. 안에서 기록된 span은 last_cycle()로 볼 수 있고, db_path가 있으면 저장됩니다."""
+        with self._lock:
+            self._cycle = []
+            counters_before = dict(self._counters)
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with self.span(name):
+                yield
+        finally:
+            self.inc("cycles")
+            with self._lock:
+                spans, self._cycle = self._cycle, None
+                deltas = {key: value - counters_before.get(key, 0) for key, value in self._counters.items()
+                          if value != counters_before.get(key, 0)}
+                self._last_cycle = spans
+            if self.db_path:
+                try:
+                    save_cycle(self.db_path, started_at, spans, deltas)
+                except Exception as e:
+                    print(f"메트릭 저장 실패: {e}")
+
+    def last_cycle(self):
+        """마지막 사이클의 [(단계, 초), ...] 입니다."""
+        with self._lock:
+            return list(self._last_cycle or [])
+
+    # ---- 내보내기 ----
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _labels_key(labels)), 0)
+
+    def render(self):
+        """OpenMetrics 텍스트 형식으로 모든 지표를 돌려줍니다."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stages = sorted((labels, (list(h.counts), h.count, h.sum)) for labels, h in self._stages.items())
+
+        lines = []
+        names = sorted({name for (name, _), _ in counters})
+        for name in names:
+            metric = PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            if name in COUNTER_HELP:
+                lines.append(f"# HELP {metric} {COUNTER_HELP[name]}")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    lines.append(f"{metric}_total{_format_labels(labels)} {_format_number(value)}")
+
+        metric = PREFIX + "stage_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        lines.append(f"# UNIT {metric} seconds")
+        lines.append(f"# HELP {metric} 사이클 단계별 소요 시간")
+        for labels, (counts, count, total) in stages:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', _format_number(bound))])} {bucket_count}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_number(float(total))}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def initialize_metrics_db(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cycle_spans (
+                cycle_started_at DATETIME,
+                stage TEXT,
+                seconds REAL
+            );
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cycle_counters (
+                cycle_started_at DATETIME,
+                name TEXT,
+                labels TEXT,
+                value REAL
+            );
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cycle_spans_started_at ON cycle_spans (cycle_started_at)')
+        conn.commit()
+
+
+def save_cycle(db_path, started_at, spans, counter_deltas):
+    initialize_metrics_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany('INSERT INTO cycle_spans VALUES (?, ?, ?)', [(started_at, stage, seconds) for stage, seconds in spans])
+        conn.executemany('INSERT INTO cycle_counters VALUES (?, ?, ?, ?)', [
+            (started_at, name, _format_labels(labels), value) for (name, labels), value in counter_deltas.items()
+        ])
+        conn.commit()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1", registry=None):
+    """백그라운드 스레드에서 /metrics 스크레이프 엔드포인트를 엽니다. 서버 객체를 돌려줍니다."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or default_registry
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+default_registry = Registry()
+inc = default_registry.inc
+span = default_registry.span
+record_span = default_registry.record_span
+cycle = default_registry.cycle
+last_cycle = default_registry.last_cycle
+render = default_registry.render
+
+
+def format_cycle(spans):
+    """사이클 단계별 시간을 한 줄로 정리합니다."""
+    return "단계 시간: " + ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in spans)
+
+
+def start_from_env():
+    """METRICS_PORT / METRICS_DB 환경 변수에 따라 엔드포인트와 SQLite 저장을 켭니다."""
+    db_path = os.getenv("METRICS_DB")
+    if db_path:
+        default_registry.db_path = db_path
+    port = os.getenv("METRICS_PORT")
+    if port:
+        server = serve(int(port))
+        print(f"메트릭 엔드포인트: http://127.0.0.1:{server.server_address[1]}/metrics")
+        return server
+    return None
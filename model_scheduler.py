@@ -0,0 +1,220 @@
+"""
+모델 호출(chat.completions)을 우선순위 큐에 넣고 동시 실행 수와 분당 요청/토큰 한도 안에서 실행하는 스케줄러입니다.
+
+- 동시에 진행 중인 호출은 max_concurrency개를 넘지 않습니다.
+- 분당 요청 수(RPM)와 분당 토큰 수(TPM)는 각각 토큰 버킷으로 지키고, 버킷이 부족하면 큐에서 기다립니다.
+  요청 전에는 예상 토큰(프롬프트 + 응답 예약분)을 빼 두었다가, 응답의 usage로 실제 사용량과의 차이를 정산합니다.
+- 우선순위 숫자가 작은 요청부터 실행하고, 같은 우선순위는 먼저 들어온 순서대로 실행합니다.
+- retry_on에 해당하는 오류(429, 연결 오류 등)는 상한이 있는 지수 백오프로 다시 큐에 넣습니다.
+  Retry-After 헤더가 있으면 그만큼 모든 호출을 멈춥니다.
+- 큐 대기 시간과 모델 응답 시간을 따로 기록합니다. (metrics: model_queue_wait / model_call 단계)
+
+사용 예:
+    scheduler = ModelScheduler(client.chat.completions.create, max_concurrency=4, requests_per_minute=500, tokens_per_minute=30000)
+    future = scheduler.submit(priority=0, estimated_tokens=3000, model="gpt-4-turbo-preview", messages=messages)
+    response = future.result()
+    print(future.queue_wait, future.model_latency)
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1.0   # 1, 2, 4초 ...
+BACKOFF_MAX = 30       # 재시도 간격 상한(초)
+
+
+class TokenBucket:
+    """
+    분당 rate_per_minute만큼 채워지는 버킷입니다. 용량은 burst_seconds초 분량(기본 1분)입니다.
+
+    실제 사용량이 예상보다 많으면 잔량이 음수가 될 수 있고, 그만큼 다음 요청이 더 기다립니다.
+    """
+
+    def __init__(self, rate_per_minute, burst_seconds=60, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self.clock = clock
+        self.available = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """amount만큼 쓸 수 있을 때까지 남은 시간(초)입니다. 용량보다 큰 요청은 버킷이 가득 차면 허용합니다."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount):
+        """amount만큼 뺍니다. (음수면 돌려받음)"""
+        self._refill()
+        self.available = min(self.capacity, self.available - amount)
+
+
+class _Job:
+    def __init__(self, priority, sequence, estimated_tokens, request, enqueued_at):
+        self.priority = priority
+        self.sequence = sequence
+        self.estimated_tokens = estimated_tokens
+        self.request = request
+        self.enqueued_at = enqueued_at
+        self.attempts = 0
+        self.future = Future()
+        self.future.queue_wait = 0.0      # 큐에서 기다린 시간 합 (재시도 대기 포함)
+        self.future.model_latency = None  # 마지막 호출의 모델 응답 시간
+        self.future.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _total_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+class ModelScheduler:
+    def __init__(self, call, max_concurrency=DEFAULT_MAX_CONCURRENCY, requests_per_minute=None, tokens_per_minute=None,
+                 retry_on=(), max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, backoff_max=BACKOFF_MAX,
+                 burst_seconds=60, service="api.openai.com"):
+        """
+        매개변수:
+        - call: 요청 키워드 인자를 받아 응답을 돌려주는 함수입니다. (예: client.chat.completions.create)
+        - requests_per_minute / tokens_per_minute: 분당 한도입니다. None이면 제한하지 않습니다.
+        - retry_on: 다시 시도할 예외 타입들입니다. 그 외의 예외는 바로 future에 전달됩니다.
+        """
+        self.call = call
+        self.max_concurrency = max_concurrency
+        self.retry_on = tuple(retry_on)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.service = service
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._workers = []
+        self.running = 0
+        self.max_running = 0   # 지금까지 동시에 진행된 최대 호출 수
+
+    def submit(self, priority=0, estimated_tokens=0, **request):
+        """요청을 큐에 넣고 Future를 돌려줍니다. Future에는 queue_wait, model_latency, attempts가 기록됩니다."""
+        job = _Job(priority, next(self._sequence), estimated_tokens, request, time.monotonic())
+        with self._condition:
+            heapq.heappush(self._queue, job)
+            if len(self._workers) < self.max_concurrency:
+                worker = threading.Thread(target=self._work, name=f"model-call-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        return job.future
+
+    def complete(self, priority=0, estimated_tokens=0, **request):
+        """submit 후 응답을 기다립니다."""
+        return self.submit(priority, estimated_tokens, **request).result()
+
+    def pending(self):
+        with self._condition:
+            return len(self._queue)
+
+    def _wait_time(self, job):
+        # 호출자는 self._condition을 잡고 있어야 함
+        wait = self._paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(job.estimated_tokens))
+        return wait
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                job = self._queue[0]
+                wait = self._wait_time(job)
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._queue)
+                if self.requests is not None:
+                    self.requests.consume(1)
+                if self.tokens is not None:
+                    self.tokens.consume(job.estimated_tokens)
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+                return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self.running -= 1
+                    self._condition.notify_all()
+
+    def _run(self, job):
+        started = time.monotonic()
+        queue_wait = started - job.enqueued_at
+        job.future.queue_wait += queue_wait
+        metrics.record_span("model_queue_wait", queue_wait)
+        metrics.inc("api_calls", service=self.service)
+        job.attempts += 1
+        job.future.attempts = job.attempts
+        try:
+            response = self.call(**job.request)
+        except self.retry_on as e:
+            metrics.inc("api_errors", service=self.service)
+            if job.attempts > self.max_retries:
+                job.future.set_exception(e)
+                return
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(self.backoff_factor * (2 ** (job.attempts - 1)), self.backoff_max)
+            metrics.inc("retries", host=self.service)
+            with self._condition:
+                # 한도 초과/일시 오류는 다른 요청에도 해당하므로 모든 호출을 잠시 멈춤
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                job.enqueued_at = time.monotonic()
+                heapq.heappush(self._queue, job)
+            return
+        except Exception as e:
+            metrics.inc("api_errors", service=self.service)
+            job.future.set_exception(e)
+            return
+
+        latency = time.monotonic() - started
+        job.future.model_latency = latency
+        metrics.record_span("model_call", latency)
+        used = _total_tokens(response)
+        if used is not None and self.tokens is not None:
+            with self._condition:
+                self.tokens.consume(used - job.estimated_tokens)
+        job.future.set_result(response)
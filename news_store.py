@@ -0,0 +1,191 @@
+"""
+SerpApi 구글 뉴스 결과를 디스크(SQLite)에 쌓아 두는 증분 뉴스 저장소입니다.
+
+- 키: (정규화한 제목, 출처)의 SHA-256. 대소문자/공백만 다른 같은 기사는 한 번만 저장합니다.
+- 날짜 문자열은 기사를 처음 저장할 때 한 번만 파싱합니다. (이미 저장된 기사는 다시 파싱하지 않음)
+- select()는 지난 사이클 이후 새로 들어온 기사(최대 max_new개)와 이전에 보낸 기사 중 최신 top_k개만 돌려줍니다.
+- refresh()는 SerpApi 요청을 백그라운드에서 보내고 wait초까지만 기다립니다. 늦으면 저장된 기사를 그대로 쓰고,
+  늦게 도착한 결과는 저장해 두었다가 다음 사이클에 새 기사로 보냅니다.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+import http_client
+
+DB_PATH = 'news.sqlite'
+SERPAPI_URL = "https://serpapi.com/search.json"
+DATE_FORMAT = '%m/%d/%Y, %I:%M %p, %z %Z'   # 예: 05/28/2024, 07:00 PM, +0000 UTC
+MAX_NEW = 20          # 한 번에 보낼 새 기사 수
+TOP_K = 5             # 함께 보낼 이전 기사 수 (최신순)
+MAX_ENTRIES = 1000    # 저장해 둘 최대 기사 수 (오래된 기사부터 지움)
+WAIT_SECONDS = 5      # SerpApi 응답을 기다리는 시간(초)
+
+
+def normalize_title(title):
+    return " ".join(title.lower().split())
+
+
+def news_key(title, source):
+    return hashlib.sha256(f"{normalize_title(title)}\n{normalize_title(source)}".encode("utf-8")).hexdigest()
+
+
+def parse_date(text):
+    """SerpApi 날짜 문자열을 밀리초 타임스탬프로 바꿉니다. 없거나 형식이 다르면 None입니다."""
+    try:
+        return int(datetime.strptime(text, DATE_FORMAT).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_results(news_results):
+    """news_results의 기사와 묶음(stories) 안의 기사를 (제목, 출처, 날짜 문자열)로 펼칩니다."""
+    for news_item in news_results:
+        for story in news_item.get('stories') or [news_item]:
+            if story.get('title'):
+                yield story['title'], story.get('source', {}).get('name', 'Unknown source'), story.get('date')
+
+
+def fetch_google_news(api_key, query="btc"):
+    """SerpApi 구글 뉴스 검색 결과(news_results)를 가져옵니다."""
+    response = http_client.get(SERPAPI_URL, params={"engine": "google_news", "q": query, "api_key": api_key})
+    response.raise_for_status()
+    return response.json()['news_results']
+
+
+class NewsStore:
+    def __init__(self, db_path=DB_PATH, max_new=MAX_NEW, top_k=TOP_K, max_entries=MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_new = max_new
+        self.top_k = top_k
+        self.max_entries = max_entries
+        self.parsed = 0          # 날짜를 파싱한 기사 수 (새로 저장한 기사 수)
+        self.duplicates = 0      # 이미 저장돼 있어 건너뛴 기사 수
+        self._lock = threading.Lock()
+        self._pending = None     # 진행 중인 SerpApi 요청 (백그라운드 스레드)
+        self._error = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS news (
+                key TEXT PRIMARY KEY,
+                title TEXT,
+                source TEXT,
+                published INTEGER,
+                first_seen INTEGER,
+                sent INTEGER DEFAULT 0
+            );
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_news_sent ON news (sent)')
+        return conn
+
+    def add(self, news_results):
+        """
+        처음 보는 기사만 날짜를 파싱해 저장합니다.
+
+        반환값:
+        - int: 새로 저장한 기사 수입니다.
+        """
+        items = {}
+        for title, source, date_text in flatten_results(news_results):
+            items.setdefault(news_key(title, source), (title, source, date_text))
+        now = int(time.time() * 1000)
+        with self._lock, closing(self._connect()) as conn:
+            keys = list(items)
+            existing = set()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                cursor = conn.execute(f'SELECT key FROM news WHERE key IN ({",".join("?" * len(chunk))})', chunk)
+                existing.update(key for key, in cursor.fetchall())
+            rows = [
+                (key, title, source, parse_date(date_text), now)
+                for key, (title, source, date_text) in items.items() if key not in existing
+            ]
+            self.parsed += len(rows)
+            self.duplicates += len(existing)
+            conn.executemany('''
+                INSERT OR IGNORE INTO news (key, title, source, published, first_seen)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self._evict(conn)
+            conn.commit()
+        return len(rows)
+
+    def refresh(self, fetch, wait=WAIT_SECONDS):
+        """
+        fetch()로 새 결과를 가져와 저장합니다. 이전 요청이 아직 진행 중이면 새로 보내지 않고 그 요청을 기다립니다.
+
+        반환값:
+        - bool: wait초 안에 저장까지 끝났으면 True, 아직 진행 중이면(저장된 기사 사용) False입니다.
+        fetch()가 실패했으면 그 예외를 발생시킵니다.
+        """
+        with self._lock:
+            if self._pending is None or not self._pending.is_alive():
+                self._error = None
+                self._pending = threading.Thread(target=self._fetch_and_add, args=(fetch,), name="news-fetch", daemon=True)
+                self._pending.start()
+            pending = self._pending
+        pending.join(wait)
+        if pending.is_alive():
+            return False
+        if self._error is not None:
+            raise self._error
+        return True
+
+    def _fetch_and_add(self, fetch):
+        try:
+            self.add(fetch())
+        except Exception as e:
+            self._error = e
+
+    def select(self):
+        """
+        지난 select() 이후 새로 저장된 기사와 이전에 보낸 기사 중 최신 top_k개를 돌려주고, 새 기사를 보낸 것으로 표시합니다.
+        새 기사가 max_new개를 넘으면 최신 max_new개만 보내고 나머지도 보낸 것으로 표시합니다.
+
+        반환값:
+        - (list, list): 새 기사와 이전 기사의 (제목, 출처, 타임스탬프) 목록입니다. 최신순이며 타임스탬프가 없으면 None입니다.
+        """
+        # 날짜가 없는 기사는 처음 저장한 시각으로 정렬
+        order = 'ORDER BY COALESCE(published, first_seen) DESC'
+        with self._lock, closing(self._connect()) as conn:
+            new = conn.execute(f'SELECT title, source, published FROM news WHERE sent = 0 {order} LIMIT ?',
+                               (self.max_new,)).fetchall()
+            earlier = conn.execute(f'SELECT title, source, published FROM news WHERE sent = 1 {order} LIMIT ?',
+                                   (self.top_k,)).fetchall()
+            conn.execute('UPDATE news SET sent = 1 WHERE sent = 0')
+            conn.commit()
+        return new, earlier
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM news').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('''
+                DELETE FROM news WHERE key IN (
+                    SELECT key FROM news ORDER BY COALESCE(published, first_seen) ASC LIMIT ?
+                )
+            ''', (count - self.max_entries,))
+
+
+def format_news(new, earlier):
+    """모델에 보낼 Data 1 문자열입니다. 기사가 하나도 없으면 기존과 같은 안내 문장입니다."""
+    if not new and not earlier:
+        return "No news data available."
+    return json.dumps({"new": [list(item) for item in new], "earlier": [list(item) for item in earlier]},
+                      ensure_ascii=False)
+
+
+news_store = NewsStore()
+
+
+def refresh(fetch, wait=WAIT_SECONDS):
+    return news_store.refresh(fetch, wait)
+
+
+def select():
+    return news_store.select()
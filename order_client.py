@@ -0,0 +1,161 @@
+"""
+결정이 나온 뒤 추가 조회 없이 한 번의 요청으로 시장가 주문을 보내는 주문 경로입니다.
+
+- 주문 금액/수량과 최소 주문 금액 확인은 이미 가지고 있는 잔고와 호가(MarketSnapshot, WebSocket)로 계산합니다.
+  (size_buy, size_sell: 주문 전에 잔고나 호가창을 다시 조회하지 않음)
+- 주문은 http_client의 공유 Session으로 보내 api.upbit.com 연결(TCP/TLS)을 재사용합니다.
+  pyupbit의 주문 함수는 요청마다 새 연결을 맺으므로, 서명(JWT)만 pyupbit.Upbit에서 만들고 요청은 직접 보냅니다.
+  warm_up()으로 모델 분석을 기다리는 동안 연결을 미리 열어 둘 수 있습니다.
+- 주문마다 결정부터 주문 응답까지의 시간(decision_to_order)과 주문 요청 시간(order_request)을 metrics에 기록합니다.
+- wait_for_fill()은 주문 uuid로 체결될 때까지 상한이 있는 지수 백오프로 주문을 조회하고 실제 체결 내역(Fill)을 돌려줍니다.
+  잔고를 다시 조회하는 대신 이 결과로 잔고/평균 매수가를 갱신하고 보고합니다. (MarketSnapshot.apply_fill)
+"""
+import threading
+import time
+
+import http_client
+import metrics
+
+UPBIT_API_URL = "https://api.upbit.com"
+MIN_TRADE_AMOUNT = 5000  # 업비트 최소 거래가능 금액(원)
+FEE_RATE = 0.0005        # 업비트 수수료 0.05%
+FILL_TIMEOUT = 5.0       # 체결을 기다리는 최대 시간(초)
+FILL_POLL_DELAY = 0.05   # 첫 주문 조회 간격(초), 매번 두 배
+FILL_POLL_MAX = 1.0      # 주문 조회 간격 상한(초)
+FINAL_STATES = ("done", "cancel")   # 시장가 매수는 남은 금액이 취소되며 cancel로 끝날 수 있음
+
+
+class OrderRejected(Exception):
+    """최소 주문 금액 미달 등으로 주문을 보내지 않았습니다."""
+
+
+class OrderFailed(Exception):
+    """거래소가 주문을 거절했거나 응답이 올바르지 않습니다."""
+
+
+def size_buy(krw_balance, percentage, min_trade_amount=MIN_TRADE_AMOUNT, fee_rate=FEE_RATE):
+    """
+    보유 원화의 percentage%로 시장가 매수할 주문 금액(원)입니다. 수수료만큼 빼서 주문합니다.
+
+    최소 주문 금액에 못 미치면 OrderRejected를 발생시킵니다.
+    """
+    amount_to_invest = krw_balance * (percentage / 100)
+    if amount_to_invest <= min_trade_amount:
+        raise OrderRejected(f"매수 최소 금액 미달: 필요 : {min_trade_amount}, 매수 금액 : {amount_to_invest}")
+    return amount_to_invest * (1 - fee_rate)
+
+
+def size_sell(coin_balance, percentage, price, min_trade_amount=MIN_TRADE_AMOUNT):
+    """
+    보유 코인의 percentage%를 시장가 매도할 수량입니다. price(최우선 매도 호가)로 평가한 금액이 최소 주문 금액을 넘어야 합니다.
+
+    최소 주문 금액에 못 미치면 OrderRejected를 발생시킵니다.
+    """
+    amount_to_sell = coin_balance * (percentage / 100)
+    if price * amount_to_sell <= min_trade_amount:
+        raise OrderRejected(f"매도 최소 금액 미달: 필요 : {min_trade_amount}, 현재 : {amount_to_sell * price}")
+    return amount_to_sell
+
+
+class Fill:
+    """주문 조회(GET /v1/order) 결과에서 읽은 체결 내역입니다."""
+
+    def __init__(self, order):
+        self.uuid = order["uuid"]
+        self.market = order["market"]
+        self.side = order["side"]
+        self.state = order["state"]
+        self.volume = float(order.get("executed_volume") or 0)
+        self.funds = sum(float(trade["funds"]) for trade in order.get("trades") or [])
+        self.paid_fee = float(order.get("paid_fee") or 0)
+
+    @property
+    def done(self):
+        return self.state in FINAL_STATES
+
+    @property
+    def avg_price(self):
+        return self.funds / self.volume if self.volume else 0.0
+
+    def __repr__(self):
+        currency = self.market.split("-", 1)[1]
+        return f"{self.volume:.8f} {currency} @ {self.avg_price:,.0f} KRW (체결 금액 {self.funds:,.0f} KRW, 수수료 {self.paid_fee:,.0f} KRW)"
+
+
+class OrderClient:
+    def __init__(self, upbit, base_url=UPBIT_API_URL):
+        """
+        매개변수:
+        - upbit: 주문 서명에 쓰는 pyupbit.Upbit 또는 그것을 돌려주는 함수입니다.
+        """
+        self._upbit = upbit
+        self.base_url = base_url
+        self.orders = 0
+        self.last_latency = None   # 마지막 주문의 결정부터 주문 응답까지 시간(초)
+        self._lock = threading.Lock()
+
+    @property
+    def upbit(self):
+        return self._upbit() if callable(self._upbit) else self._upbit
+
+    def warm_up(self, ticker="KRW-BTC"):
+        """가벼운 시세 조회로 api.upbit.com 연결을 미리 맺어 둡니다. 실패해도 주문 때 다시 연결하므로 무시합니다."""
+        try:
+            http_client.get(f"{self.base_url}/v1/ticker", params={"markets": ticker})
+        except Exception as e:
+            print(f"주문 연결 준비 실패 (주문 때 다시 연결): {e}")
+
+    def buy_market(self, ticker, price, decided_at=None):
+        """price원만큼 시장가 매수합니다. decided_at은 결정이 나온 시각(time.perf_counter)입니다."""
+        return self._place({"market": ticker, "side": "bid", "price": str(price), "ord_type": "price"}, decided_at)
+
+    def sell_market(self, ticker, volume, decided_at=None):
+        """volume만큼 시장가 매도합니다. decided_at은 결정이 나온 시각(time.perf_counter)입니다."""
+        return self._place({"market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market"}, decided_at)
+
+    def get_order(self, order_uuid):
+        """주문 하나를 조회합니다. (체결 내역 trades 포함)"""
+        query = {"uuid": order_uuid}
+        response = http_client.get(f"{self.base_url}/v1/order", params=query, headers=self.upbit._request_headers(query))
+        result = response.json()
+        if response.status_code >= 400 or 'error' in result:
+            raise OrderFailed(f"주문 조회 실패: HTTP {response.status_code}\n{result}")
+        return result
+
+    def wait_for_fill(self, order_uuid, timeout=FILL_TIMEOUT, delay=FILL_POLL_DELAY, max_delay=FILL_POLL_MAX):
+        """
+        주문이 끝날(done/cancel) 때까지 조회 간격을 두 배씩 늘리며(max_delay까지) 기다립니다.
+
+        반환값:
+        - Fill: 마지막으로 조회한 체결 내역입니다. timeout 안에 끝나지 않았으면 done이 False입니다.
+        """
+        deadline = time.monotonic() + timeout
+        with metrics.span("fill_wait"):
+            while True:
+                fill = Fill(self.get_order(order_uuid))
+                remaining = deadline - time.monotonic()
+                if fill.done or remaining <= 0:
+                    return fill
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, max_delay)
+
+    def _place(self, data, decided_at):
+        headers = self.upbit._request_headers(data)   # pyupbit와 같은 query_hash 서명
+        started = time.perf_counter()
+        response = http_client.post(f"{self.base_url}/v1/orders", json=data, headers=headers)
+        finished = time.perf_counter()
+
+        metrics.record_span("order_request", finished - started)
+        with self._lock:
+            self.orders += 1
+            if decided_at is not None:
+                self.last_latency = finished - decided_at
+                metrics.record_span("decision_to_order", self.last_latency)
+
+        try:
+            result = response.json()
+        except ValueError:
+            raise OrderFailed(f"주문 응답을 읽을 수 없습니다: HTTP {response.status_code}")
+        if response.status_code >= 400 or not isinstance(result, dict) or 'error' in result:
+            raise OrderFailed(f"HTTP {response.status_code}\n{result}")
+        return result
@@ -0,0 +1,70 @@
+"""
+호가창 전체(orderbook_units) 대신 모델에 보내는 몇 개의 호가창 요약 값입니다.
+
+- mid: (최우선 매도호가 + 최우선 매수호가) / 2
+- spread_bps: 최우선 매도호가 - 최우선 매수호가를 mid 대비 bp로 나타낸 값 (원 단위 spread는 mid × spread_bps로 알 수 있어 생략)
+- imbalance: 상위 N개 호가의 (매수 잔량 - 매도 잔량) / (매수 잔량 + 매도 잔량). -1 ~ 1, 양수면 매수 우위
+- depth_1M: mid에서 ±d bp 안에 있는 [매수, 매도] 잔량의 누적 금액 (백만 원)
+  range_bps를 처음 넘는 거리까지만 넣습니다. 그보다 먼 거리는 같은 값(받은 호가창 전체)이 반복되기 때문입니다.
+- range_bps: 받은 호가창이 mid에서 양쪽으로 뻗어 있는 거리 중 짧은 쪽 (이보다 먼 depth는 호가창 밖이라 잘려 있음)
+
+호가 단위를 한 번 NumPy 배열로 바꾼 뒤 누적합과 (거리 × 호가 단위) 마스크로 한꺼번에 계산하므로
+틱마다(WebSocket 메시지마다) 계산해도 비용이 작습니다.
+"""
+import numpy as np
+
+IMBALANCE_LEVELS = (1, 5, 15)
+DEPTH_BPS = (2, 10, 25, 100)
+
+
+def _price(value):
+    # 가격 자릿수가 마켓마다 달라(BTC 1억 원, XRP 700원) 원 단위 대신 유효숫자 7자리로 반올림
+    value = float(f"{value:.7g}")
+    return int(value) if value.is_integer() else value
+
+
+def orderbook_levels(orderbook):
+    """orderbook_units를 [ask_price, ask_size, bid_price, bid_size] 열을 가진 (호가 수, 4) 배열로 바꿉니다."""
+    units = orderbook["orderbook_units"]
+    return np.array(
+        [(unit["ask_price"], unit["ask_size"], unit["bid_price"], unit["bid_size"]) for unit in units], dtype=float,
+    ).reshape(-1, 4)
+
+
+def orderbook_features(orderbook, imbalance_levels=IMBALANCE_LEVELS, depth_bps=DEPTH_BPS):
+    """
+    호가창(pyupbit.get_orderbook / WebSocket과 같은 모양)을 요약 값 dict로 바꿉니다.
+
+    반환값:
+    - dict: mid, spread_bps, imbalance({"top1": ...}), depth_1M({"10bp": [매수, 매도]}), range_bps 입니다.
+    """
+    levels = orderbook_levels(orderbook)
+    if not len(levels):
+        raise ValueError("호가창이 비어 있습니다.")
+    ask_price, ask_size, bid_price, bid_size = levels.T
+    mid = (ask_price[0] + bid_price[0]) / 2
+    spread = ask_price[0] - bid_price[0]
+
+    # 상위 N개 호가의 잔량 불균형 (누적합 한 번으로 모든 N 계산, 호가가 N개보다 적으면 전체)
+    last = np.minimum(np.asarray(imbalance_levels), len(levels)) - 1
+    bid_cum, ask_cum = np.cumsum(bid_size)[last], np.cumsum(ask_size)[last]
+    total = bid_cum + ask_cum
+    imbalance = np.divide(bid_cum - ask_cum, total, out=np.zeros_like(total), where=total > 0)
+
+    # mid에서 ±d bp 안의 누적 잔량 금액: (거리 수, 호가 수) 마스크 × 호가별 금액
+    distance = np.asarray(depth_bps, dtype=float)[:, None] / 10_000
+    bid_depth = ((bid_price >= mid * (1 - distance)) * (bid_price * bid_size)).sum(axis=1)
+    ask_depth = ((ask_price <= mid * (1 + distance)) * (ask_price * ask_size)).sum(axis=1)
+    range_bps = min(ask_price.max() / mid - 1, 1 - bid_price.min() / mid) * 10_000
+    shown = int(np.searchsorted(np.asarray(depth_bps), range_bps)) + 1
+
+    return {
+        "mid": _price(mid),
+        "spread_bps": round(spread / mid * 10_000, 2),
+        "imbalance": {f"top{n}": round(float(value), 3) for n, value in zip(imbalance_levels, imbalance)},
+        "depth_1M": {
+            f"{bps}bp": [round(float(bid) / 1e6, 1), round(float(ask) / 1e6, 1)]
+            for bps, bid, ask in list(zip(depth_bps, bid_depth, ask_depth))[:shown]
+        },
+        "range_bps": round(float(range_bps), 1),
+    }
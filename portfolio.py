@@ -0,0 +1,79 @@
+"""
+여러 마켓을 함께 운용할 때의 마켓 설정과 사이클별 분석 대상 선정입니다.
+
+- 마켓 목록은 MARKETS 환경 변수(쉼표 구분, 예: "KRW-BTC,KRW-ETH,KRW-XRP")로 정합니다.
+- 시세와 잔고는 MarketSnapshot이 모든 마켓에 대해 한 번씩만 조회하지만, 캔들 조회와 모델 분석은 마켓마다 비용이 듭니다.
+  AnalysisScheduler는 사이클마다 최대 max_per_cycle개 마켓만 골라 분석하므로 마켓이 50개를 넘어도
+  사이클당 API 호출 수와 모델 호출 수가 마켓 수에 비례해 늘지 않습니다.
+"""
+import re
+
+DEFAULT_MARKETS = ("KRW-BTC",)
+MARKET_PATTERN = re.compile(r"^[A-Z]{3,4}-[A-Z0-9]{1,10}$")
+URGENT_MOVE = 0.03   # 마지막 분석 이후 가격이 3% 넘게 움직이면 순서와 관계없이 먼저 분석
+
+
+def parse_markets(value):
+    """
+    "KRW-BTC, krw-eth" 같은 문자열을 중복 없는 마켓 코드 목록으로 바꿉니다. 비어 있으면 DEFAULT_MARKETS입니다.
+
+    잘못된 마켓 코드가 있으면 ValueError를 발생시킵니다.
+    """
+    markets = []
+    for item in (value or "").split(","):
+        market = item.strip().upper()
+        if not market or market in markets:
+            continue
+        if not MARKET_PATTERN.match(market):
+            raise ValueError(f"마켓 코드 형식이 올바르지 않습니다: {item.strip()} (예: KRW-BTC)")
+        markets.append(market)
+    return markets or list(DEFAULT_MARKETS)
+
+
+def currency_of(market):
+    """마켓 코드의 코인 단위입니다. (KRW-BTC -> BTC)"""
+    return market.split("-", 1)[1]
+
+
+class AnalysisScheduler:
+    """
+    사이클마다 분석할 마켓을 최대 max_per_cycle개 고릅니다.
+
+    - 가장 오래 분석하지 않은 마켓부터 고릅니다. (한 번도 분석하지 않은 마켓이 가장 먼저, 결국 모든 마켓을 돌아가며 분석)
+    - 마지막 분석 이후 가격이 URGENT_MOVE 넘게 움직인 마켓은 순서를 건너뛰어 먼저 분석합니다.
+    - 순서가 같으면 가격 변동이 큰 마켓, 그다음은 설정 순서입니다.
+    """
+
+    def __init__(self, markets, max_per_cycle=None, urgent_move=URGENT_MOVE):
+        self.markets = list(markets)
+        self.max_per_cycle = max_per_cycle or len(self.markets)
+        self.urgent_move = urgent_move
+        self.cycle = 0
+        self._analyzed_at = {}   # 마켓 -> 마지막으로 분석한 사이클 번호
+        self._price_at = {}      # 마켓 -> 마지막으로 분석할 때의 가격
+
+    def move(self, market, prices):
+        before, now = self._price_at.get(market), (prices or {}).get(market)
+        if not before or now is None:
+            return 0.0
+        return abs(now / before - 1)
+
+    def select(self, prices=None, urgent=()):
+        """
+        이번 사이클에 분석할 마켓 목록을 우선순위 순서로 돌려주고, 분석한 것으로 기록합니다.
+
+        urgent에 넘긴 마켓(예: 트리거 조건이 맞은 마켓)은 가격이 크게 움직인 마켓처럼 먼저 고릅니다.
+        """
+        self.cycle += 1
+
+        def priority(item):
+            index, market = item
+            move = self.move(market, prices)
+            return (move <= self.urgent_move and market not in urgent, self._analyzed_at.get(market, 0), -move, index)
+
+        chosen = [market for _, market in sorted(enumerate(self.markets), key=priority)[:self.max_per_cycle]]
+        for market in chosen:
+            self._analyzed_at[market] = self.cycle
+            if prices and prices.get(market) is not None:
+                self._price_at[market] = prices[market]
+        return chosen
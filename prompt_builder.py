@@ -0,0 +1,104 @@
+"""
+모델에 보내는 프롬프트(메시지 목록)를 만드는 함수들입니다.
+
+OpenAI 등 제공자의 프롬프트 캐싱은 요청 앞부분이 바이트 단위로 같을 때만 적용되므로,
+- 지시문(instructions*.md)은 한 번 읽은 뒤 파일 수정 시각과 내용 해시로 캐시하고
+- 항상 같은 지시문을 맨 앞에 두고, 입력 데이터는 잘 바뀌지 않는 것부터 자주 바뀌는 순서로 뒤에 붙입니다.
+각 입력 블록에는 고정된 제목을 붙여 순서를 바꿔도 모델이 어떤 데이터인지 알 수 있게 합니다.
+"""
+import hashlib
+import os
+import threading
+
+import metrics
+from market_payload import count_tokens
+
+COMPLETION_TOKEN_RESERVE = 1000   # 요청 전에 미리 잡아 두는 응답 토큰 수 (분당 토큰 한도 계산용)
+
+_lock = threading.Lock()
+_instructions_cache = {}   # 절대 경로 -> (mtime_ns, size, sha256, text)
+
+
+def load_instructions(file_path):
+    """
+    지시문 파일을 읽습니다. 파일의 수정 시각과 크기가 그대로면 디스크를 다시 읽지 않습니다.
+
+    수정 시각이 바뀌었더라도 내용 해시가 같으면 이전과 같은 문자열 객체를 돌려줍니다.
+    파일이 없으면 FileNotFoundError 를 그대로 발생시킵니다.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    with _lock:
+        cached = _instructions_cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[3]
+
+        with open(path, "r", encoding="utf-8") as file:
+            text = file.read()
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if cached and cached[2] == digest:
+            text = cached[3]
+        _instructions_cache[path] = (stat.st_mtime_ns, stat.st_size, digest, text)
+        return text
+
+
+def instructions_digest(file_path):
+    """캐시된 지시문의 내용 해시(앞 12자리)를 돌려줍니다. 아직 읽지 않았다면 None 입니다."""
+    cached = _instructions_cache.get(os.path.abspath(file_path))
+    return cached[2][:12] if cached else None
+
+
+def _as_text(content):
+    if content is None:
+        return "No data available."
+    return content if isinstance(content, str) else str(content)
+
+
+def build_messages(instructions, blocks):
+    """
+    지시문을 시스템 메시지로 맨 앞에 두고, 입력 블록들을 주어진 순서대로 붙인 메시지 목록을 만듭니다.
+
+    매개변수:
+    - instructions (str): 항상 같은 정적 지시문입니다.
+    - blocks (list): [(제목, 내용), ...] 자주 바뀌지 않는 것부터 자주 바뀌는 순서로 넘겨야 합니다.
+    """
+    messages = [{"role": "system", "content": instructions}]
+    for title, content in blocks:
+        messages.append({"role": "user", "content": f"### {title}\n{_as_text(content)}"})
+    return messages
+
+
+def estimate_request_tokens(messages, completion_tokens=COMPLETION_TOKEN_RESERVE):
+    """메시지 목록의 프롬프트 토큰 수에 응답 예약분을 더한 예상 토큰 수입니다. (메시지당 약 4토큰의 형식 비용 포함)"""
+    prompt_tokens = sum(count_tokens(message["content"])[0] + 4 for message in messages)
+    return prompt_tokens + completion_tokens
+
+
+def _usage_counts(usage):
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    return prompt_tokens, cached_tokens, completion_tokens
+
+
+def record_usage(usage):
+    """응답의 토큰 수를 메트릭 카운터(autotrade_tokens_total{kind=...})에 더합니다."""
+    if usage is None:
+        return
+    prompt_tokens, cached_tokens, completion_tokens = _usage_counts(usage)
+    metrics.inc("tokens", prompt_tokens - cached_tokens, kind="prompt_uncached")
+    metrics.inc("tokens", cached_tokens, kind="prompt_cached")
+    metrics.inc("tokens", completion_tokens, kind="completion")
+
+
+def prompt_usage_message(usage):
+    """응답의 usage에서 캐시된/캐시되지 않은 프롬프트 토큰 수를 정리한 문자열을 만듭니다."""
+    if usage is None:
+        return "프롬프트 토큰 정보 없음"
+    prompt_tokens, cached_tokens, completion_tokens = _usage_counts(usage)
+    hit_rate = cached_tokens / prompt_tokens * 100 if prompt_tokens else 0
+    return (
+        f"프롬프트 토큰: {prompt_tokens:,} (캐시 {cached_tokens:,} / 비캐시 {prompt_tokens - cached_tokens:,}, "
+        f"캐시 적중 {hit_rate:.0f}%), 응답 토큰: {completion_tokens:,}"
+    )
@@ -1,25 +1,154 @@
-import requests
+import atexit
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
+import http_client
 
 load_dotenv()
 SLACK_BOT_TOKEN = os.getenv("SLACK_TOKEN")
 SLACK_CHANNEL="#bitcoin-gpt"
 
+SLACK_MIN_INTERVAL = 1.1        # 채널당 초당 1건 제한 (chat.postMessage)
+SLACK_COALESCE_WINDOW = 0.5     # 이 시간 안에 들어온 메시지는 한 번에 전송 (초)
+SLACK_MAX_BATCH_CHARS = 3500    # 한 번에 합쳐 보낼 최대 글자 수
+SLACK_FLUSH_TIMEOUT = 10        # 종료 시 남은 메시지를 보내기 위해 기다리는 최대 시간 (초)
+
+
+def _post_slack_message(text):
+    """
+    슬랙에 메시지를 한 건 전송합니다.
+
+    반환값:
+    - float 또는 None: 요청 제한에 걸렸다면 다시 시도하기까지 기다릴 시간(초), 아니면 None
+    """
+    response = http_client.post("https://slack.com/api/chat.postMessage",
+        headers={"Authorization": "Bearer "+SLACK_BOT_TOKEN},
+        data={"channel": SLACK_CHANNEL,"text": text}
+    )
+    if response.status_code == 429:
+        return float(response.headers.get("Retry-After", 1))
+    return None
+
+
 def send_slack_message(text):
     try:
-        response = requests.post("https://slack.com/api/chat.postMessage",
-            headers={"Authorization": "Bearer "+SLACK_BOT_TOKEN},
-            data={"channel": SLACK_CHANNEL,"text": text}
-        )
+        _post_slack_message(text)
     except Exception as e:
         print(f"슬랙 메시지 전송 실패: {str(e)}")
         print(f"전송하려던 텍스트: {text}")
 
 
+class SlackNotifier:
+    """
+    슬랙 메시지를 백그라운드 스레드에서 보내는 알림기입니다.
+
+    notify()는 큐에 넣고 바로 반환하며, 전송 스레드는 짧은 시간 안에 몰린 메시지를 하나로 합치고
+    채널당 전송 간격과 429 응답의 Retry-After를 지킵니다. 프로세스 종료 시 남은 메시지를 보냅니다.
+    """
+
+    def __init__(self, sender=_post_slack_message, min_interval=SLACK_MIN_INTERVAL,
+                 coalesce_window=SLACK_COALESCE_WINDOW, max_batch_chars=SLACK_MAX_BATCH_CHARS):
+        self.sender = sender
+        self.min_interval = min_interval
+        self.coalesce_window = coalesce_window
+        self.max_batch_chars = max_batch_chars
+        self.posts = 0
+        self.messages = 0
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._sending = False
+        self._closed = False
+        self._thread = None
+        self._next_post_at = 0.0
+
+    def notify(self, text):
+        with self._condition:
+            if self._closed:
+                send_slack_message(text)
+                return
+            self._queue.append(text)
+            self.messages += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slack-notifier", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _take_batch(self):
+        # 첫 메시지 이후 coalesce_window 동안 들어오는 메시지를 모아 최대 길이까지 합침
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return None
+            deadline = time.monotonic() + self.coalesce_window
+            while not self._closed and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+
+            batch = [self._queue.popleft()]
+            size = len(batch[0])
+            while self._queue and size + 1 + len(self._queue[0]) <= self.max_batch_chars:
+                text = self._queue.popleft()
+                batch.append(text)
+                size += 1 + len(text)
+            self._sending = True
+            return "\n".join(batch)
+
+    def _run(self):
+        while True:
+            text = self._take_batch()
+            if text is None:
+                return
+            try:
+                while True:
+                    wait = self._next_post_at - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    retry_after = self.sender(text)
+                    self._next_post_at = time.monotonic() + self.min_interval
+                    if retry_after is None:
+                        self.posts += 1
+                        break
+                    self._next_post_at = time.monotonic() + retry_after
+            except Exception as e:
+                print(f"슬랙 메시지 전송 실패: {str(e)}")
+                print(f"전송하려던 텍스트: {text}")
+            finally:
+                with self._condition:
+                    self._sending = False
+                    self._condition.notify_all()
+
+    def flush(self, timeout=SLACK_FLUSH_TIMEOUT):
+        """큐에 남은 메시지가 모두 전송될 때까지 최대 timeout초 기다립니다. 다 보냈으면 True"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=SLACK_FLUSH_TIMEOUT):
+        """남은 메시지를 보내고 전송 스레드를 멈춥니다. 이후 notify()는 바로 전송합니다."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        flushed = self.flush(timeout)
+        if self._thread is not None:
+            self._thread.join(max(timeout, 0.1))
+        return flushed
+
+
+notifier = SlackNotifier()
+atexit.register(notifier.close)
+
+
 def print_and_slack_message(text):
     print(text)
-    send_slack_message(text)
+    notifier.notify(text)
 
 
 
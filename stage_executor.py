@@ -0,0 +1,101 @@
+"""
+매매 사이클의 각 단계를 작은 의존성 그래프로 보고 실행하는 모듈입니다.
+
+서로 의존하지 않는 단계(뉴스, 시세, 과거 결정, 공포/탐욕 지수, 현재 상태 등)는
+스레드 풀에서 동시에 실행되므로, 사이클 소요 시간은 각 단계 시간의 합이 아니라
+가장 느린 경로의 시간에 가까워집니다.
+
+사용 예:
+    results, timings = run_stages({
+        "news_data": (get_news_data, ()),
+        "data_json": (fetch_and_prepare_data, ()),
+        "advice":    (lambda news_data, data_json: ..., ("news_data", "data_json")),
+    })
+
+각 단계 함수는 자신이 의존하는 단계의 결과를 같은 이름의 키워드 인자로 받습니다.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+def _check_graph(stages):
+    # 존재하지 않는 의존성 확인
+    for name, (_, deps) in stages.items():
+        for dep in deps:
+            if dep not in stages:
+                raise ValueError(f"단계 '{name}'이(가) 알 수 없는 단계 '{dep}'에 의존합니다.")
+
+    # 순환 의존성 확인 (위상 정렬)
+    remaining = {name: set(deps) for name, (_, deps) in stages.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"단계 간 순환 의존성이 있습니다: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def _timed(func, kwargs):
+    started = time.perf_counter()
+    try:
+        return func(**kwargs), time.perf_counter() - started
+    except Exception as e:
+        e.stage_elapsed = time.perf_counter() - started
+        raise
+
+
+def run_stages(stages, max_workers=None):
+    """
+    의존성 그래프에 따라 단계들을 실행합니다.
+
+    매개변수:
+    - stages (dict): {단계 이름: (함수, 의존 단계 이름 튜플)}
+    - max_workers (int): 동시에 실행할 최대 단계 수입니다. 기본값은 단계 수입니다.
+
+    반환값:
+    - (results, timings): 단계별 결과와 단계별 소요 시간(초) dict 입니다.
+
+    어느 단계에서든 예외가 발생하면 아직 시작하지 않은 단계는 실행하지 않고,
+    이미 실행 중인 단계가 끝난 뒤 그 예외를 그대로 다시 발생시킵니다.
+    """
+    _check_graph(stages)
+
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(stages), 1)) as executor:
+        while running or (pending and error is None):
+            if error is None:
+                ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    func, deps = pending.pop(name)
+                    future = executor.submit(_timed, func, {dep: results[dep] for dep in deps})
+                    running[future] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception as e:
+                    timings[name] = getattr(e, "stage_elapsed", 0.0)
+                    if error is None:
+                        error = e
+
+    if error is not None:
+        raise error
+    return results, timings
+
+
+def format_stage_timings(timings, total=None):
+    """단계별 소요 시간을 보기 좋은 한 줄 문자열로 만듭니다."""
+    parts = [f"{name} {elapsed:.2f}s" for name, elapsed in sorted(timings.items(), key=lambda item: -item[1])]
+    message = "단계별 소요 시간: " + ", ".join(parts)
+    if total is not None:
+        message += f" (전체 {total:.2f}s / 합계 {sum(timings.values()):.2f}s)"
+    return message
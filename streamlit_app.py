@@ -1,18 +1,85 @@
+import math
+import threading
+import time
+
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime
-import pyupbit
 
+from decisions_store import DECISION_COLUMNS, DEFAULT_MARKET, get_reader
+
+PAGE_SIZES = (50, 100, 500)
+
+
+class DecisionHistory:
+    """
+    다시 실행(rerun)되어도 유지되는 결정 기록 DataFrame입니다.
+
+    refresh()는 마지막으로 읽은 id 이후의 새 행만 조회해 뒤에 붙입니다.
+    DB 파일이 새로 만들어져 id가 줄어들면 처음부터 다시 읽습니다.
+    market을 지정하면 그 마켓의 결정만 읽습니다. (잔고/평균가 컬럼은 마켓마다 다른 코인의 값)
+    """
+
+    def __init__(self, store, market=None):
+        self.store = store
+        self.market = market
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.frame = pd.DataFrame(columns=list(DECISION_COLUMNS), index=pd.Index([], name='id'))
+        self.last_id = 0
+
+    def refresh(self):
+        """새로 추가된 행 수를 돌려줍니다."""
+        with self._lock:
+            if self.store.max_id() < self.last_id:
+                self.reset()
+            rows = self.store.fetch_since(self.last_id, market=self.market)
+            if not rows:
+                return 0
+            new_df = pd.DataFrame(rows, columns=['id', *DECISION_COLUMNS]).set_index('id')
+            self.frame = new_df if self.frame.empty else pd.concat([self.frame, new_df])
+            self.last_id = rows[-1][0]
+            return len(rows)
+
+
+@st.cache_resource
+def get_history(db_path='trading_decisions.sqlite', market=DEFAULT_MARKET):
+    return DecisionHistory(get_reader(db_path), market)
 
-def load_data():
-    db_path = 'trading_decisions.sqlite'
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price FROM decisions ORDER BY timestamp")
-        decisions = cursor.fetchall()
-        df = pd.DataFrame(decisions, columns=['timestamp', 'decision', 'percentage', 'reason', 'btc_balance', 'krw_balance', 'btc_avg_buy_price', 'btc_krw_price'])
-        return df
+
+def select_market(db_path='trading_decisions.sqlite'):
+    """결정이 기록된 마켓이 여러 개면 선택 상자를 보여 주고 선택한 마켓을 돌려줍니다."""
+    markets = get_reader(db_path).markets() or [DEFAULT_MARKET]
+    if len(markets) == 1:
+        return markets[0]
+    return st.selectbox("마켓", markets, index=markets.index(DEFAULT_MARKET) if DEFAULT_MARKET in markets else 0)
+
+
+def load_data(market=DEFAULT_MARKET):
+    """
+    캐시된 market의 결정 기록에 새 행만 더해 돌려줍니다.
+
+    반환값:
+    - (DataFrame, int, float): 전체 기록, 이번에 새로 읽은 행 수, 걸린 시간(ms)입니다.
+    """
+    started = time.perf_counter()
+    history = get_history(market=market)
+    new_rows = history.refresh()
+    return history.frame, new_rows, (time.perf_counter() - started) * 1000
+
+
+def page_bounds(total, page, page_size):
+    """최신 행이 첫 페이지에 오도록 page(1부터)에 해당하는 iloc 범위를 돌려줍니다."""
+    end = max(total - (page - 1) * page_size, 0)
+    return max(end - page_size, 0), end
+
+
+def current_ask_price(ticker="KRW-BTC"):
+    import pyupbit   # 현재가 하나를 읽을 때만 필요하므로 기록이 있을 때 import
+
+    return pyupbit.get_orderbook(ticker=ticker)['orderbook_units'][0]["ask_price"]
 
 
 def main():
@@ -20,10 +87,12 @@ def main():
     st.title("실시간 비트코인 GPT 자동매매 기록")
     st.write("by 유튜버 [조코딩](https://youtu.be/MgatVqXXoeA) - [Github](https://github.com/youtube-jocoding/gpt-bitcoin)")
     st.write("---")
-    df = load_data()
+    market = select_market()
+    currency = market.split("-", 1)[1]
+    df, new_rows, load_ms = load_data(market)
     if not df.empty:
         start_value = 1000000
-        current_price = pyupbit.get_orderbook(ticker="KRW-BTC")['orderbook_units'][0]["ask_price"]
+        current_price = current_ask_price(market)
         latest_row = df.iloc[-1]
         btc_balance = latest_row['btc_balance']
         krw_balance = latest_row['krw_balance']
@@ -41,14 +110,22 @@ def main():
         st.write("현재 시각:"+str(datetime.now()))
         st.write("투자기간:", days, "일", hours, "시간", minutes, "분")
         st.write("시작 원금", start_value, "원")
-        st.write("현재 비트코인 가격:", current_price, "원")
+        st.write(f"현재 {currency} 가격:", current_price, "원")
         st.write("현재 보유 현금:", krw_balance, "원")
-        st.write("현재 보유 비트코인:", btc_balance, "BTC")
-        st.write("BTC 매수 평균가격:", btc_avg_buy_price, "원")
+        st.write(f"현재 보유 {currency}:", btc_balance, currency)
+        st.write(f"{currency} 매수 평균가격:", btc_avg_buy_price, "원")
         st.write("현재 원화 가치 평가:", current_value, "원")
 
 
-        st.dataframe(df, use_container_width=True)
+        # 전체 기록 대신 한 페이지만 표에 넘김 (최신순)
+        page_col, size_col = st.columns(2)
+        page_size = size_col.selectbox("페이지당 행 수", PAGE_SIZES)
+        pages = max(math.ceil(len(df) / page_size), 1)
+        page = page_col.number_input("페이지 (1 = 최신)", min_value=1, max_value=pages, value=1)
+        start, end = page_bounds(len(df), page, page_size)
+        st.dataframe(df.iloc[start:end].iloc[::-1], use_container_width=True)
+
+    st.caption(f"데이터 로드: {load_ms:.1f} ms (새 행 {new_rows:,}개 / 전체 {len(df):,}개)")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,124 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from backtester import run_backtest, rsi_strategy, decisions_from_store, FEE_RATE, FRACTION
+from decisions_store import DecisionStore
+
+
+def make_candles(prices, start="2024-04-01 09:00", freq="h"):
+    prices = np.asarray(prices, dtype=float)
+    return pd.DataFrame({
+        'open': prices, 'high': prices * 1.01, 'low': prices * 0.99, 'close': prices,
+        'volume': 1.0, 'value': prices,
+    }, index=pd.date_range(start, periods=len(prices), freq=freq))
+
+
+def make_decisions(rows):
+    frame = pd.DataFrame(rows, columns=['timestamp', 'decision', 'percentage'])
+    return frame.set_index(pd.to_datetime(frame.pop('timestamp')))
+
+
+def test_buy_then_sell_applies_fees_like_execute_buy_and_sell():
+    candles = make_candles([100_000_000, 100_000_000, 110_000_000, 110_000_000])
+    decisions = make_decisions([
+        ("2024-04-01 09:30", "buy", 50),    # 다음 캔들(10:00) 시가 100,000,000에 체결
+        ("2024-04-01 11:10", "sell", 100),  # 다음 캔들(12:00) 시가 110,000,000에 체결
+    ])
+
+    result = run_backtest(candles, decisions)
+
+    order = 500_000 * (1 - FEE_RATE)
+    btc = order / 100_000_000
+    assert result.trades['executed'].tolist() == [True, True]
+    assert result.trades['btc'].iloc[0] == pytest.approx(btc)
+    assert result.trades['krw'].iloc[0] == pytest.approx(1_000_000 - order * (1 + FEE_RATE))
+    final_krw = 1_000_000 - order * (1 + FEE_RATE) + btc * 110_000_000 * (1 - FEE_RATE)
+    assert result.summary['final_equity'] == pytest.approx(final_krw, abs=0.01)
+    assert result.equity['btc'].tolist() == pytest.approx([0, btc, btc, 0])
+
+
+def test_orders_below_minimum_amount_are_skipped():
+    candles = make_candles([100_000_000] * 3)
+    decisions = make_decisions([("2024-04-01 09:00", "buy", 0.4), ("2024-04-01 10:00", "sell", 100)])
+
+    result = run_backtest(candles, decisions, initial_krw=1_000_000)   # 0.4% = 4,000원 < 5,000원
+
+    assert result.summary['trades'] == 0
+    assert result.summary['skipped_below_minimum'] == 2
+    assert result.summary['final_equity'] == 1_000_000
+
+
+def test_fraction_scale_matches_percent_scale():
+    candles = make_candles(np.linspace(90_000_000, 110_000_000, 48))
+    percent = make_decisions([("2024-04-01 12:00", "buy", 30), ("2024-04-02 12:00", "sell", 50)])
+    fraction = percent.assign(percentage=percent['percentage'] / 100)
+
+    a = run_backtest(candles, percent).summary
+    b = run_backtest(candles, fraction, percentage_scale=FRACTION).summary
+    assert a == b
+
+
+def test_close_fill_uses_decision_candle_close():
+    candles = make_candles([100, 200, 300]).assign(open=[1, 2, 3])
+    decisions = make_decisions([("2024-04-01 10:20", "buy", 100)])
+
+    assert run_backtest(candles, decisions, fill="close", min_trade_amount=0).trades['fill_price'].iloc[0] == 200
+    assert run_backtest(candles, decisions, min_trade_amount=0).trades['fill_price'].iloc[0] == 3
+    with pytest.raises(ValueError):
+        run_backtest(candles, decisions, fill="vwap")
+
+
+def test_decisions_outside_candle_range_are_ignored():
+    candles = make_candles([100_000_000] * 3)
+    decisions = make_decisions([("2024-03-01 09:00", "buy", 100), ("2024-04-01 11:30", "buy", 100)])
+
+    result = run_backtest(candles, decisions)
+    assert result.summary['decisions'] == 0
+    assert result.summary['final_equity'] == 1_000_000
+
+
+def test_recorded_decisions_are_replayed(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    store = DecisionStore(db_path)
+    store.save("buy", 50, "이유", 0, 1_000_000, 0, 100_000_000, timestamp="2024-04-01 09:10:00")
+    store.save("hold", 0, "이유", 0, 0, 0, 0, timestamp="2024-04-01 10:10:00")
+    store.save("sell", 100, "다른 마켓", 0, 0, 0, 0, timestamp="2024-04-01 09:40:00", market="KRW-XRP")
+
+    decisions = decisions_from_store(db_path)   # KRW-BTC 결정만 (KRW-XRP 결정은 다른 캔들로 재생해야 함)
+    assert decisions['decision'].tolist() == ["buy", "hold"]
+    assert decisions_from_store(db_path, market="KRW-XRP")['decision'].tolist() == ["sell"]
+
+    result = run_backtest(make_candles([100_000_000] * 4), decisions)
+    assert result.summary['trades'] == 1
+    assert result.summary['exposure_pct'] == 75.0
+
+
+def test_years_of_hourly_candles_run_in_seconds():
+    rng = np.random.default_rng(0)
+    n = 24 * 365 * 5
+    prices = 50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    candles = make_candles(prices, start="2019-01-01 00:00")
+
+    started = time.perf_counter()
+    result = run_backtest(candles, rsi_strategy(candles, hour_interval=1))
+    elapsed = time.perf_counter() - started
+
+    assert result.summary['candles'] == n
+    assert result.summary['trades'] > 0
+    assert elapsed < 5
+
+
+def test_reading_recorded_decisions_does_not_create_the_database(tmp_path):
+    db_path = tmp_path / "missing.sqlite"
+
+    assert decisions_from_store(str(db_path)).empty
+    assert not db_path.exists()
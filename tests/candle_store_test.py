@@ -0,0 +1,120 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import candle_store
+
+NOW = datetime(2024, 4, 1, 3, 30)   # UTC (= KST 12:30)
+
+
+class FakeUpbit:
+    """업비트 캔들 API처럼 동작하는 로컬 대역 (to 미포함, 최신 count개, 오름차순)."""
+
+    def __init__(self, hours=1000, missing=()):
+        latest = datetime(2024, 4, 1, 12)   # KST 현재 진행 중인 시간봉
+        self.index = [latest - timedelta(hours=i) for i in range(hours)][::-1]
+        self.index = [ts for ts in self.index if ts not in set(missing)]
+        self.calls = []
+        self.now = NOW
+
+    def get_ohlcv(self, ticker, interval="day", count=200, to=None):
+        assert count <= candle_store.MAX_CANDLES_PER_REQUEST
+        self.calls.append((count, to))
+        to_kst = min(to or self.now, self.now) + timedelta(hours=9)
+        index = [ts for ts in self.index if ts < to_kst][-count:]
+        closes = [float(ts.timestamp()) for ts in index]
+        return pd.DataFrame({
+            'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': 1.0, 'value': closes,
+        }, index=pd.DatetimeIndex(index))
+
+
+def _sync(monkeypatch, fake, db_path, count, now=NOW):
+    fake.now = now
+    monkeypatch.setattr(candle_store.pyupbit, "get_ohlcv", fake.get_ohlcv)
+    monkeypatch.setattr(candle_store, "REQUEST_PERIOD", 0)
+    return candle_store.sync_candles("KRW-BTC", "minute60", count, str(db_path), now=now)
+
+
+def test_initial_sync_pages_past_request_limit(monkeypatch, tmp_path):
+    fake = FakeUpbit()
+    db_path = tmp_path / "candles.sqlite"
+
+    assert _sync(monkeypatch, fake, db_path, 450) == 450
+    assert [count for count, _ in fake.calls] == [200, 200, 50]
+
+    df = candle_store.load_candles("KRW-BTC", "minute60", 450, str(db_path))
+    assert len(df) == 450
+    assert df.index[-1] == datetime(2024, 4, 1, 12)
+    assert df.index.is_monotonic_increasing
+
+
+def test_incremental_sync_only_fetches_new_candles(monkeypatch, tmp_path):
+    fake = FakeUpbit()
+    db_path = tmp_path / "candles.sqlite"
+    _sync(monkeypatch, fake, db_path, 24, now=NOW - timedelta(hours=3))
+
+    fake.calls.clear()
+    # 3시간 뒤: 진행 중이던 캔들 1개 + 새 캔들 3개
+    assert _sync(monkeypatch, fake, db_path, 24) == 4
+    assert fake.calls == [(4, None)]
+
+    fake.calls.clear()
+    _sync(monkeypatch, fake, db_path, 24)
+    assert fake.calls == [(1, None)]
+
+
+def test_gaps_are_backfilled_and_empty_slots_remembered(monkeypatch, tmp_path):
+    db_path = tmp_path / "candles.sqlite"
+    empty_slot = datetime(2024, 4, 1, 2)
+    fake = FakeUpbit(missing=[empty_slot])
+    _sync(monkeypatch, fake, db_path, 24)
+
+    # 저장소에서 캔들 몇 개를 지워 갭을 만듦
+    with candle_store.sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM candles WHERE ts IN (?, ?)", (
+            candle_store._to_ts(datetime(2024, 4, 1, 5)),
+            candle_store._to_ts(datetime(2024, 4, 1, 6)),
+        ))
+
+    fake.calls.clear()
+    _sync(monkeypatch, fake, db_path, 24)
+    # 최신 캔들 1개 + 갭 구간 2개 한 번에
+    assert [count for count, _ in fake.calls] == [1, 2]
+
+    df = candle_store.load_candles("KRW-BTC", "minute60", 23, str(db_path))
+    assert datetime(2024, 4, 1, 5) in df.index
+    assert empty_slot not in df.index
+
+    # 실제로 없는 캔들은 다시 요청하지 않음
+    fake.calls.clear()
+    _sync(monkeypatch, fake, db_path, 24)
+    assert fake.calls == [(1, None)]
+
+
+def test_failed_backfill_is_retried_instead_of_recorded_as_gap(monkeypatch, tmp_path):
+    db_path = tmp_path / "candles.sqlite"
+    fake = FakeUpbit()
+    _sync(monkeypatch, fake, db_path, 24)
+    hole = [datetime(2024, 4, 1, 5), datetime(2024, 4, 1, 6)]
+    with candle_store.sqlite3.connect(db_path) as conn:
+        conn.executemany("DELETE FROM candles WHERE ts = ?", [(candle_store._to_ts(ts),) for ts in hole])
+
+    # 네트워크 오류: pyupbit.get_ohlcv는 예외 대신 None을 돌려줌
+    get_ohlcv = fake.get_ohlcv
+    fake.get_ohlcv = lambda *args, **kwargs: None
+    _sync(monkeypatch, fake, db_path, 24)
+    with candle_store.sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM candle_gaps").fetchone()[0] == 0
+
+    fake.get_ohlcv = get_ohlcv
+    fake.calls.clear()
+    _sync(monkeypatch, fake, db_path, 24)
+    assert [count for count, _ in fake.calls] == [1, 2]
+    df = candle_store.load_candles("KRW-BTC", "minute60", 24, str(db_path))
+    assert all(ts in df.index for ts in hole)
@@ -0,0 +1,267 @@
+"""
+autotrade_v2.make_decision_and_execute를 외부 서비스의 로컬 대역(fake_services) 위에서 반복 실행하는 부하 측정 도구입니다.
+
+- 네트워크 없이 실제 사이클 코드를 그대로 실행합니다. (업비트/OpenAI/슬랙/DeepL/SerpApi/공포탐욕 지수 모두 대역)
+- 사이클 전체와 단계(함수)별 p50/p95/p99 지연 시간, 서비스별 요청/오류 수를 보고합니다.
+- --json으로 결과를 저장하고 --baseline으로 이전 결과와 비교해 p95가 허용치 이상 느려지면 실패(종료 코드 1)합니다.
+
+실행 예:
+  python tests/cycle_load_harness.py --cycles 20 --realistic
+  python tests/cycle_load_harness.py --cycles 10 --latency api.openai.com=2.0 --error serpapi.com=0.3
+  python tests/cycle_load_harness.py --cycles 20 --realistic --baseline baseline.json --tolerance 0.2
+  python tests/cycle_load_harness.py --cycles 10 --markets 50 --max-analyses 2
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+from fake_services import FakeServices, REALISTIC_LATENCY
+
+# 단계별 시간을 재는 autotrade_v2의 함수들 (사이클에서 호출되는 순서)
+STAGE_FUNCTIONS = (
+    "get_news_data", "fetch_and_prepare_data", "fetch_last_decisions", "fetch_fear_and_greed_index", "get_current_status",
+    "analyze_data_with_gpt4", "execute_buy", "execute_sell", "translate_to_korean", "compare_trade_status",
+    "save_decision_to_db",
+)
+PERCENTILES = (50, 95, 99)
+
+FAKE_ENV = {
+    "OPENAI_API_KEY": "sk-fake",
+    "UPBIT_ACCESS_KEY": "fake-upbit-access-key-0000000000000000",
+    "UPBIT_SECRET_KEY": "fake-upbit-secret-key-0000000000000000",
+    "SERPAPI_API_KEY": "fake-serpapi-key",
+    "SLACK_TOKEN": "xoxb-fake",
+    "DEEPL_API_KEY": "fake-deepl-key:fx",
+    "NO_PROXY": "127.0.0.1,localhost",
+}
+
+
+class StageRecorder:
+    """사이클마다 단계 함수들의 실행 시간을 모읍니다. (단계 실행기의 작업 스레드에서도 호출됨)"""
+
+    def __init__(self):
+        self.cycles = []
+        self._lock = threading.Lock()
+
+    def start_cycle(self):
+        with self._lock:
+            self.cycles.append({})
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    current = self.cycles[-1]
+                    current[name] = current.get(name, 0.0) + elapsed
+        return timed
+
+
+@contextlib.contextmanager
+def _patched(module, names, recorder):
+    originals = {name: getattr(module, name) for name in names}
+    for name, func in originals.items():
+        setattr(module, name, recorder.wrap(name, func))
+    try:
+        yield
+    finally:
+        for name, func in originals.items():
+            setattr(module, name, func)
+
+
+@contextlib.contextmanager
+def _environment(values):
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def percentiles(values):
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def run_cycles(cycles=10, latency=None, errors=None, seed=0, verbose=False, markets=("KRW-BTC",), max_analyses=None):
+    """
+    대역 서비스 위에서 사이클을 cycles번 실행하고 결과 보고서(dict)를 돌려줍니다.
+
+    markets를 여러 개 넘기면 포트폴리오 모드로 실행하고, 사이클마다 최대 max_analyses개 마켓을 분석합니다.
+
+    작업 디렉터리를 임시 디렉터리로 바꿔 실행하므로 저장소의 SQLite 파일들은 건드리지 않습니다.
+    """
+    services = FakeServices(latency=latency, errors=errors, seed=seed).start()
+    workdir = tempfile.mkdtemp(prefix="cycle-harness-")
+    shutil.copy(root_directory / "instructions_v2.md", workdir)
+    previous_cwd = os.getcwd()
+    recorder = StageRecorder()
+    cycle_times, failures = [], []
+    output = None if verbose else io.StringIO()
+
+    try:
+        os.chdir(workdir)
+        with _environment(FAKE_ENV), services.redirect(), \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(output)):
+            import decisions_store
+            import pyupbit
+            import slack_bot
+            from market_snapshot import MarketSnapshot
+            from openai import OpenAI
+            from portfolio import AnalysisScheduler
+            autotrade_v2 = importlib.import_module("autotrade_v2")
+
+            # 모듈이 이미 다른 설정으로 import되었을 수 있으므로 클라이언트를 대역 기준으로 다시 만듦
+            autotrade_v2.client = OpenAI(api_key=FAKE_ENV["OPENAI_API_KEY"], base_url=services.openai_base_url, max_retries=0)
+            autotrade_v2.upbit = pyupbit.Upbit(FAKE_ENV["UPBIT_ACCESS_KEY"], FAKE_ENV["UPBIT_SECRET_KEY"])
+            autotrade_v2.MARKETS = list(markets)
+            autotrade_v2.snapshot = MarketSnapshot(autotrade_v2.upbit, autotrade_v2.MARKETS)
+            autotrade_v2.scheduler = AnalysisScheduler(autotrade_v2.MARKETS, max_analyses)
+            autotrade_v2.pre_trade_status = {}
+            autotrade_v2.post_trade_status = {}
+            slack_bot.SLACK_BOT_TOKEN = FAKE_ENV["SLACK_TOKEN"]
+            autotrade_v2.initialize_db()
+
+            with _patched(autotrade_v2, STAGE_FUNCTIONS, recorder):
+                for _ in range(cycles):
+                    recorder.start_cycle()
+                    started = time.perf_counter()
+                    try:
+                        autotrade_v2.make_decision_and_execute()
+                    except Exception as e:
+                        failures.append(repr(e))
+                    cycle_times.append(time.perf_counter() - started)
+
+            slack_bot.notifier.flush()
+            saved = decisions_store.get_store().count()
+            decisions_store._stores.pop(decisions_store.DB_PATH).close()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        services.stop()
+
+    stages = {}
+    for name in STAGE_FUNCTIONS:
+        values = [cycle[name] for cycle in recorder.cycles if name in cycle]
+        if values:
+            stages[name] = {"calls": len(values), **percentiles(values)}
+    return {
+        "cycles": cycles,
+        "markets": len(markets),
+        "failed": len(failures),
+        "failures": failures[:5],
+        "saved_decisions": saved,
+        "orders": len(services.exchange.orders),
+        "slack_messages": len(services.messages),
+        "cycle": percentiles(cycle_times),
+        "stages": stages,
+        "services": services.stats,
+    }
+
+
+def format_report(report):
+    def ms(value):
+        return "     -   " if value is None else f"{value * 1000:9.1f}"
+
+    lines = [
+        f"사이클 {report['cycles']}회, 마켓 {report.get('markets', 1)}개 (실패 {report['failed']}, 저장된 결정 {report['saved_decisions']}, "
+        f"주문 {report['orders']}, 슬랙 전송 {report['slack_messages']})",
+        f"{'':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+        f"{'cycle':<28}" + "".join(ms(report['cycle'][f'p{p}']) for p in PERCENTILES),
+    ]
+    for name, stage in report["stages"].items():
+        lines.append(f"  {name:<26}" + "".join(ms(stage[f'p{p}']) for p in PERCENTILES))
+    lines.append("서비스별 요청 (오류 주입):")
+    for host, entry in sorted(report["services"].items()):
+        lines.append(f"  {host:<26}{entry['requests']:>6} ({entry['errors']})")
+    for failure in report["failures"]:
+        lines.append(f"  실패: {failure}")
+    return "\n".join(lines)
+
+
+def compare_with_baseline(report, baseline, tolerance, min_delta=0.01):
+    """
+    사이클과 단계별 p95가 기준보다 tolerance(비율) 이상 느려진 항목 목록을 돌려줍니다.
+
+    수 ms 단위 단계의 흔들림은 무시하도록 min_delta초 이하의 차이는 저하로 보지 않습니다.
+    """
+    regressions = []
+    pairs = [("cycle", report["cycle"], baseline.get("cycle", {}))]
+    pairs += [(name, stage, baseline.get("stages", {}).get(name, {})) for name, stage in report["stages"].items()]
+    for name, current, previous in pairs:
+        now, before = current.get("p95"), previous.get("p95")
+        if now is not None and before and now > before * (1 + tolerance) and now - before > min_delta:
+            regressions.append(f"{name}: p95 {before * 1000:.1f} ms -> {now * 1000:.1f} ms")
+    return regressions
+
+
+def _host_values(items, convert):
+    values = {}
+    for item in items or []:
+        host, _, value = item.partition("=")
+        values[host] = convert(value)
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 대역 서비스로 자동매매 사이클 부하 측정")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--realistic", action="store_true", help="실제 서비스와 비슷한 응답 지연 사용")
+    parser.add_argument("--latency", action="append", metavar="HOST=SECONDS", help="서비스 응답 지연 (초)")
+    parser.add_argument("--error", action="append", metavar="HOST=RATE", help="서비스 오류 응답 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p95 허용 증가 비율 (기본 0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="사이클 출력 그대로 보기")
+    parser.add_argument("--markets", type=int, default=1, help="운용할 마켓 수 (KRW-BTC, KRW-C001, KRW-C002, ...)")
+    parser.add_argument("--max-analyses", type=int, default=None, help="사이클당 분석할 최대 마켓 수")
+    args = parser.parse_args(argv)
+
+    latency = dict(REALISTIC_LATENCY) if args.realistic else {}
+    latency.update(_host_values(args.latency, float))
+    markets = ["KRW-BTC"] + [f"KRW-C{i:03d}" for i in range(1, args.markets)]
+    report = run_cycles(args.cycles, latency, _host_values(args.error, float), args.seed, args.verbose,
+                        markets, args.max_analyses)
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare_with_baseline(report, json.load(file), args.tolerance)
+        if regressions:
+            print("성능 저하:\n  " + "\n  ".join(regressions))
+            return 1
+        print("기준 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+import http_client
+from cycle_load_harness import run_cycles, compare_with_baseline, format_report
+from fake_services import SERPAPI
+
+
+def test_cycles_run_end_to_end_against_fake_services():
+    report = run_cycles(cycles=3)
+
+    assert report["failed"] == 0
+    assert report["saved_decisions"] == 3
+    assert report["orders"] == 2   # buy, hold, sell 순서로 응답
+    for stage in ("fetch_and_prepare_data", "analyze_data_with_gpt4", "execute_buy", "save_decision_to_db"):
+        assert stage in report["stages"]
+    assert report["cycle"]["p50"] <= report["cycle"]["p95"] <= report["cycle"]["p99"]
+    assert "cycle" in format_report(report)
+
+
+def test_injected_errors_are_absorbed_by_the_cycle(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_client, "BACKOFF_FACTOR", 0.01)
+
+    report = run_cycles(cycles=2, errors={SERPAPI: 1.0}, latency={SERPAPI: 0.01})
+
+    assert report["failed"] == 0
+    assert report["saved_decisions"] == 2
+    assert report["services"][SERPAPI]["errors"] == report["services"][SERPAPI]["requests"] > 2   # 재시도 포함
+    monkeypatch.setattr(http_client, "_session", None)
+
+
+def test_baseline_comparison_flags_slower_p95():
+    baseline = {"cycle": {"p95": 1.0}, "stages": {"analyze_data_with_gpt4": {"p95": 0.5}, "save_decision_to_db": {"p95": 0.001}}}
+    report = {"cycle": {"p95": 1.1}, "stages": {"analyze_data_with_gpt4": {"p95": 0.8}, "save_decision_to_db": {"p95": 0.003}}}
+
+    regressions = compare_with_baseline(report, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("analyze_data_with_gpt4")
+
+
+def test_upbit_requests_do_not_grow_with_market_count():
+    single = run_cycles(cycles=3)
+    many = run_cycles(cycles=3, markets=["KRW-BTC"] + [f"KRW-C{i:03d}" for i in range(1, 60)], max_analyses=1)
+
+    assert many["failed"] == 0
+    assert many["saved_decisions"] == 3
+    # 시세는 모든 마켓을 한 번에, 잔고는 사이클당 한 번 조회하므로 마켓이 60개여도 요청 수가 거의 같음
+    assert many["services"]["api.upbit.com"]["requests"] <= single["services"]["api.upbit.com"]["requests"] + 3
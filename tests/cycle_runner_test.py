@@ -0,0 +1,145 @@
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from cycle_runner import CycleRunner, daily_times
+
+
+class Recorder:
+    """사이클 대역: 실행 기록과 최대 동시 실행 수를 남기고, release 될 때까지 기다릴 수 있음"""
+
+    def __init__(self, block=False):
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, urgent_markets, reason):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.calls.append((list(urgent_markets), reason))
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def serve_in_thread(runner):
+    thread = threading.Thread(target=runner.run_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_daily_times():
+    next_run_after = daily_times(range(0, 24, 8))
+    ts = lambda *args: datetime(*args).timestamp()
+    assert next_run_after(ts(2024, 4, 1, 0, 0)) == ts(2024, 4, 1, 0, 1)
+    assert next_run_after(ts(2024, 4, 1, 0, 1)) == ts(2024, 4, 1, 8, 1)
+    assert next_run_after(ts(2024, 4, 1, 16, 30)) == ts(2024, 4, 2, 0, 1)
+
+
+def test_overlapping_requests_are_coalesced_into_one_run():
+    cycle = Recorder(block=True)
+    runner = CycleRunner(cycle, ["KRW-BTC", "KRW-ETH"])
+
+    assert runner.submit("정기 실행") is True
+    assert wait_until(lambda: cycle.running == 1)
+    assert runner.submit("트리거", ["KRW-ETH"]) is False
+    assert runner.submit("트리거", ["KRW-BTC"]) is False
+    assert runner.status()["running"] == ["KRW-BTC", "KRW-ETH"]
+
+    cycle.release.set()
+    assert wait_until(lambda: runner.status()["runs"] == 2)
+    runner.stop()
+
+    assert cycle.max_running == 1
+    assert cycle.calls == [([], "정기 실행"), (["KRW-ETH", "KRW-BTC"], "트리거, 트리거")]
+    assert runner.status()["coalesced"] == 2
+
+
+def test_different_markets_can_run_at_the_same_time():
+    cycle = Recorder(block=True)
+    runner = CycleRunner(cycle, ["KRW-BTC", "KRW-ETH"])
+    assert runner.submit("a", markets=["KRW-BTC"])
+    assert runner.submit("b", markets=["KRW-ETH"])
+    assert wait_until(lambda: cycle.running == 2)
+    cycle.release.set()
+    runner.stop()
+
+
+def test_slow_cycle_does_not_block_trigger_checks(tmp_path):
+    cycle = Recorder(block=True)
+    checks = []
+
+    def check():
+        checks.append(time.monotonic())
+        return (["KRW-BTC"], "RSI") if len(checks) == 1 else None
+
+    runner = CycleRunner(cycle, ["KRW-BTC"], check=check, check_interval=0.02, state_path=str(tmp_path / "state.json"))
+    serve_in_thread(runner)
+    assert wait_until(lambda: cycle.running == 1)
+    count = len(checks)
+    assert wait_until(lambda: len(checks) >= count + 5)   # 사이클이 끝나지 않아도 확인은 계속됨
+    cycle.release.set()
+    assert wait_until(lambda: runner.status()["runs"] == 1)
+    runner.stop()
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["runs"] == 1 and state["last_reason"] == "RSI" and state["last_duration"] > 0
+
+
+@pytest.mark.parametrize("policy, expected_calls", [("once", ["놓친 실행 3회 보충"]), ("skip", [])])
+def test_missed_runs_after_downtime(tmp_path, policy, expected_calls):
+    now = datetime(2024, 4, 2, 9, 0).timestamp()
+    state_path = tmp_path / "state.json"
+    state_path.write_text(json.dumps({"last_started": datetime(2024, 4, 1, 8, 1).timestamp(), "runs": 5}))
+
+    cycle = Recorder()
+    runner = CycleRunner(cycle, ["KRW-BTC"], next_run_after=daily_times(range(0, 24, 8)),
+                         state_path=str(state_path), missed_policy=policy, clock=lambda: now)
+    serve_in_thread(runner)
+    assert wait_until(lambda: runner.next_run is not None)
+    if expected_calls:
+        assert wait_until(lambda: runner.status()["runs"] == 6)
+    else:
+        time.sleep(0.1)
+    runner.stop()
+
+    # 4/1 16:01, 4/2 00:01, 4/2 08:01 세 번을 놓침
+    assert [reason for _, reason in cycle.calls] == expected_calls
+    status = runner.status()
+    assert status["missed"] == 3
+    assert status["next_run"] == "2024-04-02 16:01:00"
+
+
+def test_first_start_runs_immediately_and_rejects_unknown_policy():
+    cycle = Recorder()
+    runner = CycleRunner(cycle, ["KRW-BTC"], next_run_after=daily_times([0]))
+    serve_in_thread(runner)
+    assert wait_until(lambda: runner.status()["runs"] == 1)
+    runner.stop()
+    assert cycle.calls == [([], "첫 실행")]
+
+    with pytest.raises(ValueError):
+        CycleRunner(cycle, ["KRW-BTC"], missed_policy="all")
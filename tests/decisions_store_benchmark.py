@@ -0,0 +1,60 @@
+"""
+결정 저장소 벤치마크: 테이블이 커질 때 최근 결정 조회와 단건 저장 지연 시간
+
+인덱스를 쓰는 조회(현재)와 NOT INDEXED로 인덱스를 끈 조회(기존과 같은 전체 스캔 + 정렬)를 함께 측정합니다.
+
+실행: python tests/decisions_store_benchmark.py [행 수 ...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from decisions_store import DecisionStore, SELECT_LAST_DECISIONS
+
+SELECT_LAST_DECISIONS_NOT_INDEXED = SELECT_LAST_DECISIONS.replace("FROM decisions", "FROM decisions NOT INDEXED")
+START = datetime(2020, 1, 1)
+
+
+def make_rows(start, stop):
+    for i in range(start, stop):
+        timestamp = (START + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+        yield (timestamp, "hold", 0.0, "benchmark", 0.01, 1_000_000.0, 90_000_000.0, 95_000_000.0)
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        store = DecisionStore(os.path.join(directory, "bench.sqlite"))
+        conn = store._conn
+        rows = 0
+        for size in sorted(sizes):
+            store.save_many(make_rows(rows, size))
+            rows = size
+
+            indexed = median_ms(lambda: store.last_decisions(10), 50)
+            scan_repeat = 3 if size >= 1_000_000 else 10
+            scan = median_ms(lambda: conn.execute(SELECT_LAST_DECISIONS_NOT_INDEXED, (10,)).fetchall(), scan_repeat)
+            insert = median_ms(lambda: store.save("hold", 0.0, "benchmark", 0, 0, 0, 0), 50)
+            rows += 50
+            print(f"{size:>9,} rows | last 10 (index) {indexed:7.3f} ms | last 10 (full scan) {scan:9.2f} ms | insert {insert:6.3f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000, 3_000_000])
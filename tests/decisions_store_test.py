@@ -0,0 +1,183 @@
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import decisions_store
+from decisions_store import DecisionStore, MIGRATIONS, ReadOnlyDecisionStore, SELECT_LAST_DECISIONS
+
+
+def row(i, decision="hold"):
+    return (f"2024-04-{1 + i // 24:02d} {i % 24:02d}:00:00", decision, 10.0, f"reason {i}", 0.01, 1_000_000.0, 90_000_000.0, 95_000_000.0)
+
+
+def test_new_database_is_migrated_to_latest_version_in_wal_mode(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+
+    assert store.version == MIGRATIONS[-1][0]
+    assert store.journal_mode == "wal"
+    with sqlite3.connect(tmp_path / "d.sqlite") as conn:
+        assert decisions_store.schema_version(conn) == store.version
+        indexes = {r[1] for r in conn.execute("PRAGMA index_list(decisions)")}
+    assert "idx_decisions_timestamp" in indexes
+
+
+def test_legacy_database_keeps_rows_and_gets_index(tmp_path):
+    db_path = str(tmp_path / "legacy.sqlite")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(MIGRATIONS[0][1][0])
+        conn.execute("INSERT INTO decisions (timestamp, decision) VALUES ('2024-04-01 09:00:00', 'buy')")
+
+    store = DecisionStore(db_path)
+
+    assert store.count() == 1
+    assert store.last_decisions(1)[0][:2] == ('2024-04-01 09:00:00', 'buy')
+    # 이미 적용된 마이그레이션은 다시 실행하지 않음
+    store.close()
+    assert DecisionStore(db_path).version == MIGRATIONS[-1][0]
+
+
+def test_last_decisions_are_newest_first_and_use_index(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    store.save_many([row(i) for i in range(50)])
+    store.save("buy", 30.0, "새 결정", 0.02, 500_000.0, 91_000_000.0, 96_000_000.0, timestamp="2024-05-01 09:00:00")
+
+    last = store.last_decisions(3)
+    assert [r[0] for r in last] == ["2024-05-01 09:00:00", row(49)[0], row(48)[0]]
+    assert last[0][1:4] == ("buy", 30.0, "새 결정")
+
+    plan = " ".join(str(r) for r in store._conn.execute("EXPLAIN QUERY PLAN " + SELECT_LAST_DECISIONS, (10,)))
+    assert "idx_decisions_timestamp" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_save_without_timestamp_uses_local_time(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    store.save("hold", 0, "이유", 0, 0, 0, 0)
+    assert len(store.last_decisions(1)[0][0]) == len("2024-04-01 09:00:00")
+
+
+def test_one_connection_is_shared_across_threads(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    store = decisions_store.get_store(db_path)
+    assert decisions_store.get_store(db_path) is store
+
+    threads = [threading.Thread(target=lambda i=i: store.save_many([row(i * 10 + k) for k in range(10)])) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.count() == 80
+
+
+def test_reader_connection_sees_writes_while_store_is_open(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    store = DecisionStore(db_path)
+    reader = sqlite3.connect(db_path)
+    reader.execute("BEGIN")
+    assert reader.execute("SELECT COUNT(*) FROM decisions").fetchone()[0] == 0
+
+    # 읽기 트랜잭션이 열려 있어도 WAL 모드에서는 쓰기가 막히지 않음
+    store.save("buy", 10.0, "이유", 0, 0, 0, 0)
+    reader.execute("COMMIT")
+    assert reader.execute("SELECT COUNT(*) FROM decisions").fetchone()[0] == 1
+
+
+def test_decisions_are_recorded_per_market(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    store.save_many([row(i) for i in range(5)])                               # market 없이 저장하면 KRW-BTC
+    store.save_many([(*row(i + 5), "KRW-ETH") for i in range(3)])
+    store.save("sell", 50.0, "이더리움 매도", 0.5, 1_000_000.0, 4_000_000.0, 4_100_000.0, market="KRW-ETH")
+
+    assert [r[1] for r in store.last_decisions(2, market="KRW-ETH")] == ["sell", "hold"]
+    assert len(store.last_decisions(10, market="KRW-BTC")) == 5
+    assert len(store.last_decisions(10)) == 9
+    assert [r[-1] for r in store.fetch_since(0)] == ["KRW-BTC"] * 5 + ["KRW-ETH"] * 4
+
+
+def test_version_2_database_gets_market_column_with_default(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    with sqlite3.connect(db_path) as conn:
+        for _, statements in MIGRATIONS[:2]:
+            for statement in statements:
+                conn.execute(statement)
+        conn.execute("PRAGMA user_version = 2")
+        conn.execute("INSERT INTO decisions (timestamp, decision) VALUES ('2024-04-01 09:00:00', 'buy')")
+
+    store = DecisionStore(db_path)
+    assert store.version == MIGRATIONS[-1][0]
+    assert store.last_decisions(1, market="KRW-BTC")[0][1] == "buy"
+
+
+def test_concurrent_migration_skips_steps_applied_by_another_process(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "d.sqlite")
+    with sqlite3.connect(db_path) as conn:
+        for _, statements in MIGRATIONS[:2]:
+            for statement in statements:
+                conn.execute(statement)
+        conn.execute("PRAGMA user_version = 2")
+
+    # 대시보드가 버전 2를 읽은 직후 봇이 먼저 마이그레이션을 끝낸 상황
+    dashboard = sqlite3.connect(db_path, isolation_level=None)
+    real_schema_version = decisions_store.schema_version
+    reads = []
+
+    def stale_schema_version(conn):
+        reads.append(conn)
+        return 2 if len(reads) == 1 else real_schema_version(conn)
+
+    DecisionStore(db_path).close()
+    monkeypatch.setattr(decisions_store, "schema_version", stale_schema_version)
+
+    assert decisions_store.migrate(dashboard) == MIGRATIONS[-1][0]
+    assert real_schema_version(dashboard) == MIGRATIONS[-1][0]
+    assert not dashboard.in_transaction
+    dashboard.close()
+
+
+def test_reader_does_not_migrate_or_change_journal_mode(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    with sqlite3.connect(db_path) as conn:
+        for _, statements in MIGRATIONS[:2]:
+            for statement in statements:
+                conn.execute(statement)
+        conn.execute("PRAGMA user_version = 2")
+        conn.execute("INSERT INTO decisions (timestamp, decision) VALUES ('2024-04-01 09:00:00', 'buy')")
+
+    reader = ReadOnlyDecisionStore(db_path)
+    # 봇이 아직 마이그레이션하지 않은 DB는 빈 결과
+    assert reader.fetch_since(0, market="KRW-BTC") == []
+    assert reader.markets() == []
+    assert reader.max_id() == 0
+    with sqlite3.connect(db_path) as conn:
+        assert decisions_store.schema_version(conn) == 2
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    store = DecisionStore(db_path)
+    store.save("sell", 10.0, "r", 0.0, 1.0, 0.0, 1.0, market="KRW-XRP")
+    assert reader.max_id() == 2
+    assert [r[2] for r in reader.fetch_since(0, market="KRW-XRP")] == ["sell"]
+    assert reader.markets() == ["KRW-BTC", "KRW-XRP"]
+    with pytest.raises(sqlite3.OperationalError):
+        reader._connection().execute("DELETE FROM decisions")
+    store.close()
+    reader.close()
+
+
+def test_reader_on_missing_database_is_empty_and_creates_nothing(tmp_path):
+    db_path = tmp_path / "missing.sqlite"
+    reader = ReadOnlyDecisionStore(str(db_path))
+
+    assert reader.fetch_since(0) == []
+    assert reader.markets() == []
+    assert not db_path.exists()
+
+    DecisionStore(str(db_path)).save("buy", 10.0, "r", 0.0, 1.0, 0.0, 1.0)
+    assert len(reader.fetch_since(0)) == 1
+    reader.close()
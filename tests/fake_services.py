@@ -0,0 +1,457 @@
+"""
+자동매매 사이클이 호출하는 외부 서비스(업비트, OpenAI, 슬랙, DeepL, SerpApi, 공포/탐욕 지수)의 로컬 대역입니다.
+
+하나의 로컬 HTTP 서버가 /<원래 호스트>/<경로> 로 들어온 요청을 서비스별로 처리합니다.
+- redirect(): requests(pyupbit, http_client, deepl이 모두 사용)의 요청 중 대상 호스트로 가는 것을 로컬 서버로 돌립니다.
+- OpenAI SDK(httpx)는 base_url을 openai_base_url로 지정해 연결합니다.
+- 서비스별 응답 지연(latency)과 오류 주입(errors)을 설정할 수 있습니다.
+
+FakeUpbitWebSocket은 업비트 WebSocket(wss://api.upbit.com/websocket/v1)의 로컬 대역입니다. (ticker, orderbook)
+"""
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+UPBIT = "api.upbit.com"
+OPENAI = "api.openai.com"
+SLACK = "slack.com"
+DEEPL = "api-free.deepl.com"
+SERPAPI = "serpapi.com"
+FEAR_GREED = "api.alternative.me"
+FAKE_HOSTS = (UPBIT, OPENAI, SLACK, DEEPL, "api.deepl.com", SERPAPI, FEAR_GREED)
+
+# 실제 서비스와 비슷한 기본 응답 지연 (초): (기본, 추가 무작위 최대값)
+REALISTIC_LATENCY = {
+    UPBIT: (0.03, 0.02),
+    OPENAI: (1.5, 1.0),
+    SLACK: (0.1, 0.05),
+    DEEPL: (0.2, 0.1),
+    SERPAPI: (0.8, 0.4),
+    FEAR_GREED: (0.15, 0.05),
+}
+
+DEFAULT_DECISIONS = (
+    {"decision": "buy", "percentage": 20, "reason": "Oversold on the hourly RSI with improving sentiment."},
+    {"decision": "hold", "percentage": 0, "reason": "No clear direction; waiting for confirmation."},
+    {"decision": "sell", "percentage": 50, "reason": "Price reached the upper Bollinger Band on rising volume."},
+)
+
+REMAINING_REQ = "group=default; min=1800; sec=29"
+FEE_RATE = 0.0005
+CANDLE_SECONDS = {"days": 86400, "minutes/60": 3600}
+
+
+def fake_price(ts):
+    """UTC 초 단위 시각에 대한 결정적인 가상 BTC 가격"""
+    days = ts / 86400
+    return round(95_000_000 * (1 + 0.06 * math.sin(days / 5) + 0.01 * math.sin(days * 7)), -3)
+
+
+class FakeExchange:
+    """
+    업비트 계좌 대역. 시장가 주문은 최우선 호가에 즉시 체결됩니다.
+
+    주문 조회(GET /v1/order)는 pending_polls번까지는 미체결(wait)로, 그 뒤에는 체결 내역(trades)과 함께 done으로 답합니다.
+    """
+
+    def __init__(self, krw=1_000_000.0, btc=0.0, pending_polls=0):
+        self.krw = krw
+        self.btc = btc
+        self.avg_buy_price = 0.0
+        self.pending_polls = pending_polls
+        self.orders = []
+        self.order_polls = 0
+        self._details = {}   # uuid -> (주문 응답, 체결 내역, 남은 미체결 응답 수)
+        self._lock = threading.Lock()
+
+    def price(self):
+        return fake_price(time.time())
+
+    def orderbook(self, market):
+        price = self.price()
+        units = [{
+            "ask_price": price + 1000 * (i + 1), "bid_price": price - 1000 * i,
+            "ask_size": round(0.1 + 0.05 * i, 8), "bid_size": round(0.12 + 0.04 * i, 8),
+        } for i in range(15)]
+        return {
+            "market": market, "timestamp": int(time.time() * 1000),
+            "total_ask_size": round(sum(u["ask_size"] for u in units), 8),
+            "total_bid_size": round(sum(u["bid_size"] for u in units), 8),
+            "orderbook_units": units,
+        }
+
+    def accounts(self):
+        with self._lock:
+            return [
+                {"currency": "KRW", "balance": f"{self.krw:.8f}", "locked": "0", "avg_buy_price": "0",
+                 "avg_buy_price_modified": True, "unit_currency": "KRW"},
+                {"currency": "BTC", "balance": f"{self.btc:.8f}", "locked": "0", "avg_buy_price": f"{self.avg_buy_price:.8f}",
+                 "avg_buy_price_modified": False, "unit_currency": "KRW"},
+            ]
+
+    def place_order(self, order):
+        with self._lock:
+            ask = self.orderbook(order["market"])["orderbook_units"][0]["ask_price"]
+            bid = self.orderbook(order["market"])["orderbook_units"][0]["bid_price"]
+            if order["side"] == "bid":
+                spend = float(order["price"])
+                if spend * (1 + FEE_RATE) > self.krw:
+                    return 400, {"error": {"name": "insufficient_funds_bid", "message": "주문가능한 금액(KRW)이 부족합니다."}}
+                volume = round(spend / ask, 8)   # 업비트와 같이 소수점 8자리
+                self.avg_buy_price = (self.avg_buy_price * self.btc + spend) / (self.btc + volume)
+                self.krw -= spend * (1 + FEE_RATE)
+                self.btc += volume
+                trade_price, funds = ask, spend
+            else:
+                volume = float(order["volume"])
+                if volume > self.btc + 1e-12:
+                    return 400, {"error": {"name": "insufficient_funds_ask", "message": "주문가능한 금액(BTC)이 부족합니다."}}
+                self.btc -= volume
+                self.krw += volume * bid * (1 - FEE_RATE)
+                if self.btc <= 1e-12:
+                    self.btc, self.avg_buy_price = 0.0, 0.0
+                trade_price, funds = bid, volume * bid
+            result = {
+                "uuid": str(uuid.uuid4()), "side": order["side"], "ord_type": order["ord_type"],
+                "price": order.get("price"), "volume": order.get("volume"), "state": "wait",
+                "market": order["market"], "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            fill = {
+                "state": "done", "executed_volume": f"{volume:.8f}", "paid_fee": f"{funds * FEE_RATE:.8f}",
+                "trades_count": 1,
+                "trades": [{"market": order["market"], "uuid": str(uuid.uuid4()), "price": str(trade_price),
+                            "volume": f"{volume:.8f}", "funds": f"{funds:.8f}", "side": order["side"]}],
+            }
+            self.orders.append(result)
+            self._details[result["uuid"]] = (result, fill, self.pending_polls)
+            return 201, result
+
+    def order(self, order_uuid):
+        with self._lock:
+            self.order_polls += 1
+            if order_uuid not in self._details:
+                return 404, {"error": {"name": "order_not_found", "message": "주문을 찾지 못했습니다."}}
+            result, fill, pending = self._details[order_uuid]
+            if pending:
+                self._details[order_uuid] = (result, fill, pending - 1)
+                return 200, dict(result, executed_volume="0", paid_fee="0", trades_count=0, trades=[])
+            return 200, dict(result, **fill)
+
+
+class FakeUpbitWebSocket:
+    """
+    구독 메시지를 받으면 구독한 마켓의 ticker/orderbook 메시지를 interval초마다 보냅니다. (업비트처럼 bytes로 전송)
+
+    drop_connections()로 연결을 끊어 재연결을 시험할 수 있습니다.
+    """
+
+    def __init__(self, exchange=None, interval=0.02):
+        self.exchange = exchange or FakeExchange()
+        self.interval = interval
+        self.subscriptions = []   # 받은 구독 메시지
+        self.sent = 0
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        from websockets.sync.server import serve
+
+        self._server = serve(self._handle, "127.0.0.1", 0)
+        threading.Thread(target=self._server.serve_forever, name="fake-upbit-websocket", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self._server.socket.getsockname()[1]}/websocket/v1"
+
+    def drop_connections(self):
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+    def messages_for(self, kind, market):
+        if kind == "ticker":
+            return {"type": "ticker", "code": market, "trade_price": self.exchange.price(),
+                    "timestamp": int(time.time() * 1000), "stream_type": "REALTIME"}
+        orderbook = self.exchange.orderbook(market)
+        return {"type": "orderbook", "code": market, "timestamp": orderbook["timestamp"],
+                "total_ask_size": orderbook["total_ask_size"], "total_bid_size": orderbook["total_bid_size"],
+                "orderbook_units": orderbook["orderbook_units"], "stream_type": "REALTIME"}
+
+    def _handle(self, connection):
+        from websockets.exceptions import ConnectionClosed
+
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            request = json.loads(connection.recv())
+            self.subscriptions.append(request)
+            topics = [(item["type"], code) for item in request if "type" in item for code in item["codes"]]
+            while True:
+                for kind, market in topics:
+                    connection.send(json.dumps(self.messages_for(kind, market)).encode("utf-8"))
+                    self.sent += 1
+                time.sleep(self.interval)
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+
+
+def _candles(unit, market, count, to):
+    step = CANDLE_SECONDS[unit]
+    end = int(to.replace(tzinfo=timezone.utc).timestamp()) if to else int(time.time())
+    latest = (end - 1) // step * step   # to 시각(미포함) 이전에 시작한 마지막 캔들
+    rows = []
+    for i in range(count):
+        start = latest - i * step
+        open_, close = fake_price(start), fake_price(start + step)
+        utc = datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None)
+        rows.append({
+            "market": market,
+            "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+            "candle_date_time_kst": (utc + timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "opening_price": open_, "high_price": max(open_, close) * 1.004, "low_price": min(open_, close) * 0.996,
+            "trade_price": close, "timestamp": (start + step) * 1000,
+            "candle_acc_trade_volume": 120.0, "candle_acc_trade_price": 120.0 * close,
+        })
+    return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        services = self.server.services
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        # 같은 이름이 여러 번 오면 쉼표로 합침 (pyupbit는 마켓 목록을 markets=A&markets=B 로 보냄)
+        query = {key: ",".join(values) for key, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        injected = services.before_request(host)
+        if injected:
+            self._reply(injected, {"error": {"name": "injected_error", "message": "fake service error"}})
+            return
+        try:
+            status, payload = services.handle(host, method, path, query, body)
+        except Exception as e:   # 대역 자체의 버그는 500으로 드러나게
+            status, payload = 500, {"error": {"name": "fake_service_bug", "message": repr(e)}}
+        self._reply(status, payload)
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Remaining-Req", REMAINING_REQ)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass   # 타임아웃으로 클라이언트가 먼저 끊은 요청은 무시
+
+
+class FakeServices:
+    """
+    매개변수:
+    - latency (dict): {호스트: 초 또는 (기본 초, 추가 무작위 최대 초)}
+    - errors (dict): {호스트: 오류 응답 비율(0~1)}
+    - decisions (list): 모델 응답으로 돌아가며 사용할 결정 dict 목록
+    """
+
+    def __init__(self, latency=None, errors=None, decisions=DEFAULT_DECISIONS, seed=0, error_status=503):
+        self.latency = dict(latency or {})
+        self.errors = dict(errors or {})
+        self.decisions = list(decisions)
+        self.error_status = error_status
+        self.exchange = FakeExchange()
+        self.stats = {}
+        self.messages = []   # 슬랙으로 보낸 메시지
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._model_calls = 0
+        self.news_step = 2   # 뉴스 검색마다 새로 올라오는 기사 수
+        self._news_calls = 0
+        self._news_epoch = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(days=1)
+        self._httpd = None
+
+    # ---- 서버 수명 ----
+    def start(self):
+        self._httpd = _Server(("127.0.0.1", 0), _Handler)
+        self._httpd.services = self
+        threading.Thread(target=self._httpd.serve_forever, name="fake-services", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/{OPENAI}/v1"
+
+    @contextmanager
+    def redirect(self):
+        """requests로 나가는 FAKE_HOSTS 요청을 로컬 서버로 보냅니다."""
+        original = HTTPAdapter.send
+        base_url = self.base_url
+
+        def send(adapter, request, **kwargs):
+            parts = urlsplit(request.url)
+            if parts.hostname in FAKE_HOSTS:
+                request.url = f"{base_url}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+                kwargs["proxies"] = {}
+            return original(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+        try:
+            yield self
+        finally:
+            HTTPAdapter.send = original
+
+    # ---- 지연/오류 주입 ----
+    def before_request(self, host):
+        """지연을 적용하고, 오류를 주입해야 하면 상태 코드를 돌려줍니다."""
+        if host == "api.deepl.com":
+            host = DEEPL
+        latency = self.latency.get(host, 0)
+        base, jitter = latency if isinstance(latency, tuple) else (latency, 0)
+        with self._lock:
+            delay = base + (self._random.uniform(0, jitter) if jitter else 0)
+            fail = self._random.random() < self.errors.get(host, 0)
+            entry = self.stats.setdefault(host, {"requests": 0, "errors": 0, "delay": 0.0})
+            entry["requests"] += 1
+            entry["errors"] += int(fail)
+            entry["delay"] += delay
+        if delay:
+            time.sleep(delay)
+        return self.error_status if fail else None
+
+    # ---- 서비스별 응답 ----
+    def handle(self, host, method, path, query, body):
+        if host == UPBIT:
+            return self._upbit(method, path, query, body)
+        if host == OPENAI and path == "/v1/chat/completions":
+            return 200, self._chat_completion(json.loads(body))
+        if host == SLACK and path == "/api/chat.postMessage":
+            self.messages.append(parse_qs(body.decode("utf-8")).get("text", [""])[0])
+            return 200, {"ok": True}
+        if host in (DEEPL, "api.deepl.com") and path == "/v2/translate":
+            request = json.loads(body)
+            texts = request["text"] if isinstance(request["text"], list) else [request["text"]]
+            return 200, {"translations": [
+                {"detected_source_language": "EN", "text": f"[{request['target_lang']}] {text}"} for text in texts
+            ]}
+        if host == SERPAPI and path == "/search.json":
+            return 200, self._news()
+        if host == FEAR_GREED and path.rstrip("/") == "/fng":
+            return 200, self._fear_and_greed(int(query.get("limit", 1)))
+        return 404, {"error": {"name": "not_found", "message": f"{method} {host}{path}"}}
+
+    def _upbit(self, method, path, query, body):
+        if path.startswith("/v1/candles/"):
+            to = datetime.strptime(query["to"], "%Y-%m-%d %H:%M:%S") if query.get("to") else None
+            return 200, _candles(path[len("/v1/candles/"):], query["market"], int(query.get("count", 1)), to)
+        if path == "/v1/orderbook":
+            return 200, [self.exchange.orderbook(market) for market in query["markets"].split(",")]
+        if path == "/v1/ticker":
+            return 200, [{"market": market, "trade_price": self.exchange.price()} for market in query["markets"].split(",")]
+        if path == "/v1/accounts":
+            return 200, self.exchange.accounts()
+        if path == "/v1/orders" and method == "POST":
+            return self.exchange.place_order(json.loads(body))
+        if path == "/v1/order" and method == "GET":
+            return self.exchange.order(query["uuid"])
+        return 404, {"error": {"name": "not_found", "message": path}}
+
+    def _chat_completion(self, request):
+        with self._lock:
+            decision = self.decisions[self._model_calls % len(self.decisions)]
+            self._model_calls += 1
+        prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages", []))
+        prompt_tokens = prompt_chars // 4
+        content = json.dumps(decision)
+        return {
+            "id": f"chatcmpl-{self._model_calls}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+                "prompt_tokens_details": {"cached_tokens": prompt_tokens // 2 // 128 * 128},
+            },
+        }
+
+    def _news(self):
+        # 호출마다 news_step개의 기사가 새로 올라옴 (기사 i는 항상 같은 제목/시각). 같은 기사가 대소문자/공백만 바꿔 한 번 더,
+        # 묶음(stories) 안에 한 번 더 나오는 SerpApi 응답 모양을 흉내 냄
+        with self._lock:
+            first = self._news_calls * self.news_step
+            self._news_calls += 1
+
+        def item(i):
+            published = self._news_epoch + timedelta(minutes=10 * i)
+            return {"title": f"Bitcoin market update #{i}", "source": {"name": "Fake News"},
+                    "date": published.strftime("%m/%d/%Y, %I:%M %p, +0000 UTC")}
+
+        latest = [item(i) for i in range(first + 9, first - 1, -1)]
+        duplicate = dict(latest[0], title=f"  BITCOIN market   update #{first + 9}")
+        return {"news_results": latest + [duplicate, {"title": "Top stories", "stories": latest[:2]}]}
+
+    def _fear_and_greed(self, limit):
+        now = int(time.time()) // 86400 * 86400
+        return {"name": "Fear and Greed Index", "metadata": {"error": None}, "data": [{
+            "value": str(50 + (i * 7) % 40), "value_classification": "Neutral",
+            "timestamp": str(now - i * 86400),
+        } for i in range(limit)]}
@@ -0,0 +1,96 @@
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    failures = {}
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(1)
+        remaining = self.failures.get(self.path, 0)
+        if remaining:
+            self.failures[self.path] = remaining - 1
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass   # 타임아웃으로 클라이언트가 먼저 끊은 요청은 무시
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    monkeypatch.setattr(http_client, "_retry_counts", {})
+    monkeypatch.setattr(http_client, "BACKOFF_FACTOR", 0.01)
+    httpd = _Server(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connections_are_reused(server):
+    for _ in range(5):
+        assert http_client.get(server + "/ok").json() == {"ok": True}
+
+    stats = http_client.connection_stats()["127.0.0.1"]
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused"] == 4
+    assert "재사용 4" in http_client.format_connection_stats()
+
+
+def test_retries_server_errors_with_backoff(server):
+    _Handler.failures["/flaky"] = 2
+    assert http_client.get(server + "/flaky").status_code == 200
+    assert http_client.connection_stats()["127.0.0.1"]["retries"] == 2
+
+
+def test_per_host_timeout(server, monkeypatch):
+    monkeypatch.setitem(http_client.HOST_TIMEOUTS, "127.0.0.1", (1, 0.2))
+    assert http_client.timeout_for(server + "/slow") == (1, 0.2)
+    assert http_client.timeout_for("https://hooks.slack.com/x") == http_client.HOST_TIMEOUTS["slack.com"]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        # 읽기 타임아웃도 재시도 후 실패
+        http_client.get(server + "/slow")
+
+
+def test_building_a_deepl_translator_leaves_deepl_settings_alone(monkeypatch):
+    import deepl
+    monkeypatch.setattr(deepl.http_client, "max_network_retries", 7)
+    monkeypatch.setattr(deepl.http_client, "min_connection_timeout", 1.5)
+    monkeypatch.setattr(http_client, "_deepl_translators", {})
+
+    http_client.get_deepl_translator("test-key:fx")
+    assert (deepl.http_client.max_network_retries, deepl.http_client.min_connection_timeout) == (7, 1.5)
+
+    # 진입점에서 한 번만 설정
+    http_client.configure_deepl()
+    assert deepl.http_client.max_network_retries == http_client.MAX_RETRIES
+    assert deepl.http_client.min_connection_timeout == http_client.DEFAULT_TIMEOUT[1]
@@ -0,0 +1,101 @@
+"""
+시작 시간 벤치마크: 진입점 모듈마다 새 파이썬 프로세스에서 import에 걸리는 시간과 읽힌 무거운 모듈
+
+import는 한 번만 일어나므로 매번 새 프로세스(콜드 스타트)로 측정하고, 중앙값을 출력합니다.
+프로세스 전체 시간에는 인터프리터 시작 시간이 포함됩니다.
+
+실행: python tests/import_time_benchmark.py [모듈 ...] [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+ENTRY_POINTS = ("autotrade_v2", "autotrade", "streamlit_app", "backtester", "slack_bot")
+HEAVY_MODULES = ("pandas", "numpy", "openai", "deepl", "pyupbit", "websockets", "streamlit")
+# 모듈 수준에서 클라이언트를 만드는 진입점이 실패하지 않도록 넣는 가짜 설정
+DUMMY_ENV = {
+    "OPENAI_API_KEY": "sk-benchmark",
+    "UPBIT_ACCESS_KEY": "benchmark-access",
+    "UPBIT_SECRET_KEY": "benchmark-secret",
+    "SERPAPI_API_KEY": "benchmark",
+}
+
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+try:
+    import {module}
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "error": error,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module, cwd):
+    """
+    새 프로세스에서 module을 한 번 import합니다.
+
+    반환값:
+    - dict: import 시간(seconds), 프로세스 전체 시간(process_seconds), 실패 사유(error), 읽힌 무거운 모듈(heavy)입니다.
+    """
+    env = dict(os.environ, PYTHONPATH=str(root_directory), **DUMMY_ENV)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120,
+    )
+    process_seconds = time.perf_counter() - started
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {"seconds": None, "process_seconds": process_seconds, "error": completed.stderr.strip()[-200:], "heavy": []}
+    result = json.loads(lines[-1])
+    result["process_seconds"] = process_seconds
+    return result
+
+
+def benchmark(module, repeat=5):
+    # .env나 DB 파일을 읽거나 만들지 않도록 빈 임시 디렉터리에서 실행
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [measure(module, workdir) for _ in range(repeat)]
+    ok = [r for r in results if r["seconds"] is not None and r["error"] is None]
+    return {
+        "module": module,
+        "import_ms": statistics.median(r["seconds"] for r in ok) * 1000 if ok else None,
+        "process_ms": statistics.median(r["process_seconds"] for r in results) * 1000,
+        "heavy": results[-1]["heavy"],
+        "error": None if ok else results[-1]["error"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        result = benchmark(module, args.repeat)
+        if result["error"]:
+            print(f"{module:<15} | import 실패: {result['error']}")
+            continue
+        print(f"{module:<15} | import {result['import_ms']:8.1f} ms | 프로세스 {result['process_ms']:8.1f} ms"
+              f" | 무거운 모듈: {', '.join(result['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
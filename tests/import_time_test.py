@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+from import_time_benchmark import measure
+
+
+def test_autotrade_v2_import_loads_no_heavy_modules(tmp_path):
+    result = measure("autotrade_v2", tmp_path)
+    assert result["error"] is None
+    assert result["heavy"] == []
+
+
+def test_streamlit_app_does_not_import_pyupbit(tmp_path):
+    result = measure("streamlit_app", tmp_path)
+    assert result["error"] is None
+    assert "pyupbit" not in result["heavy"]
+
+
+def test_lazy_clients_are_created_once_and_keep_injected_values(monkeypatch):
+    import autotrade_v2
+
+    monkeypatch.setattr(autotrade_v2, "upbit", None)
+    created = []
+    monkeypatch.setattr(autotrade_v2, "_create_upbit", lambda: created.append(1) or object())
+    first = autotrade_v2.get_upbit()
+    assert autotrade_v2.get_upbit() is first
+    assert created == [1]
+
+    injected = object()
+    monkeypatch.setattr(autotrade_v2, "upbit", injected)
+    assert autotrade_v2.get_upbit() is injected
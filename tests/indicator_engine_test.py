@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from indicators import INDICATOR_COLUMNS, add_indicators
+from indicator_engine import IndicatorEngine, IndicatorSeries
+
+
+def _make_candles(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1e8 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    # 가격 변동이 없는 구간 (스토캐스틱 범위 0, RSI 0/0)
+    flat = slice(n // 5, n // 5 + 30)
+    close[flat] = high[flat] = low[flat] = close[n // 5]
+    return pd.DataFrame({
+        'open': close, 'high': high, 'low': low, 'close': close, 'volume': 1.0, 'value': close,
+    }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def _stream(df):
+    engine = IndicatorEngine()
+    rows = [engine.update(candle) for candle in df.to_dict('records')]
+    return pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+
+
+def _assert_close(expected, actual):
+    expected, actual = np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)
+    assert (np.isnan(expected) == np.isnan(actual)).all()
+    np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=1e-9)
+
+
+def test_matches_add_indicators():
+    df = _make_candles()
+    expected = add_indicators(df.copy())
+    assert list(expected.columns[len(df.columns):]) == INDICATOR_COLUMNS
+
+    actual = _stream(df)
+    for column in INDICATOR_COLUMNS:
+        # 값이 모두 같은 구간은 계산 순서에 따라 0 대신 1e-13 수준의 잔차가 남을 수 있음 (스토캐스틱, 볼린저 밴드)
+        scale = 100 if column.startswith(('RSI', 'STOCH')) else df['close'].max()
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=scale * 5e-8, equal_nan=True)
+
+
+def test_pandas_only_columns_match():
+    df = _make_candles()
+    actual = _stream(df)
+
+    close = df['close']
+    _assert_close(close.rolling(3).mean(), actual['SMA_3'])
+    _assert_close(close.rolling(20).mean(), actual['Middle_Band'])
+    _assert_close(close.rolling(20).mean() + close.rolling(20).std() * 2, actual['Upper_Band'])
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    _assert_close(macd, actual['MACD'])
+    _assert_close(macd.ewm(span=9, adjust=False).mean(), actual['Signal_Line'])
+
+
+def _assert_matches_history(history, actual):
+    # 상태를 시작한 캔들부터 지금까지의 이력(history)에 add_indicators를 적용한 값의 마지막 행들이 기준
+    expected = add_indicators(history)[INDICATOR_COLUMNS].to_numpy()[-len(actual):]
+    actual = actual[INDICATOR_COLUMNS].to_numpy()
+    assert (np.isnan(expected) == np.isnan(actual)).all()
+    # 값이 모두 같은 구간의 볼린저 밴드는 계산 순서에 따라 가격의 1e-8 수준 잔차가 생김
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=history['close'].max() * 5e-8, equal_nan=True)
+
+
+def test_series_keeps_its_state_while_the_window_slides():
+    df = _make_candles(400)
+    series = IndicatorSeries()
+
+    # 봇처럼 매 사이클 마지막 230개(마지막은 진행 중)를 읽고 30개를 보냄: 창이 밀려도 상태는 이어짐
+    for end in (230, 231, 234, 234, 260, 261, 400):
+        actual = series.apply(df.iloc[end - 230:end], count=30)
+        assert list(actual.index) == list(df.index[end - 30:end])
+        _assert_matches_history(df.iloc[:end], actual)
+
+
+def test_series_only_feeds_new_candles():
+    df = _make_candles(300)
+    series = IndicatorSeries()
+    series.apply(df.iloc[:230], count=30)
+    engine, before = series.engine, dict(series.rows)
+
+    # 다음 사이클: 진행 중이던 마지막 캔들이 마감되고 새 캔들 3개가 추가됨 (창의 시작도 3개 밀림)
+    actual = series.apply(df.iloc[3:233], count=30)
+    assert series.engine is engine and series.last_index == df.index[231]
+    # 이미 반영한 캔들은 다시 계산하지 않고, 새로 마감된 3개만 엔진에 들어감
+    assert all(series.rows[index] is values for index, values in before.items())
+    assert sorted(set(series.rows) - set(before)) == list(df.index[229:232])
+    _assert_matches_history(df.iloc[:233], actual)
+
+
+def test_series_restarts_after_gap():
+    df = _make_candles(100)
+    series = IndicatorSeries()
+    series.apply(df.iloc[:30])
+
+    # 중단 후 재시작: 이전 상태와 이어지지 않으면 새 프레임 기준으로 다시 계산
+    resumed = series.apply(df.iloc[60:90])
+    _assert_close(_stream(df.iloc[60:90]).to_numpy(), resumed[INDICATOR_COLUMNS].to_numpy())
@@ -0,0 +1,56 @@
+"""
+지표 계산 벤치마크: NumPy 배치 커널(add_indicators) vs 기존 pandas_ta 구현(add_indicators_ta)
+
+실행: python tests/indicators_benchmark.py [캔들 수 ...]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+from indicators import INDICATOR_COLUMNS, add_indicators
+from indicators_test import make_candles
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(sizes):
+    started = time.perf_counter()
+    try:
+        from indicators import add_indicators_ta
+        import pandas_ta  # noqa: F401
+        print(f"pandas_ta import: {time.perf_counter() - started:.3f}s")
+    except ImportError:
+        add_indicators_ta = None
+        print("pandas_ta가 설치되어 있지 않아 NumPy 커널만 측정합니다.")
+
+    for n in sizes:
+        df = make_candles(n)
+        numpy_time, actual = best_of(lambda: add_indicators(df))
+        line = f"{n:>8} candles | numpy {numpy_time * 1000:8.2f} ms"
+
+        if add_indicators_ta is not None:
+            ta_time, expected = best_of(lambda: add_indicators_ta(df.copy()))
+            diff = max(
+                np.nanmax(np.abs(expected[column].to_numpy(dtype=float) - actual[column].to_numpy()))
+                for column in INDICATOR_COLUMNS
+            )
+            line += f" | pandas_ta {ta_time * 1000:8.2f} ms | x{ta_time / numpy_time:5.1f} | max diff {diff:.3g}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [54, 1000, 10000, 100000])
@@ -0,0 +1,133 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from indicators import INDICATOR_COLUMNS, add_indicators, compute_indicators
+from indicator_engine import IndicatorEngine
+
+
+def make_candles(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1e8 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    # 가격 변동이 없는 구간 (스토캐스틱 범위 0, RSI 0/0)
+    flat = slice(n // 5, n // 5 + 30)
+    close[flat] = high[flat] = low[flat] = close[n // 5]
+    return pd.DataFrame({
+        'open': close, 'high': high, 'low': low, 'close': close, 'volume': 1.0, 'value': close,
+    }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def assert_same_column(expected, actual, scale):
+    expected, actual = np.asarray(expected, dtype=float), np.asarray(actual, dtype=float)
+    assert (np.isnan(expected) == np.isnan(actual)).all()
+    # pandas rolling().std()는 값이 모두 같은 구간에서 0 대신 가격의 1e-8 수준의 잔차를 냄 (볼린저 밴드)
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=scale * 5e-8, equal_nan=True)
+
+
+def _scale(df, column):
+    return 100 if column.startswith(('RSI', 'STOCH')) else df['close'].abs().max()
+
+
+def reference_indicators(df):
+    """
+    pandas_ta 0.3.14b의 sma/ema/rsi/stoch 구현을 pandas 연산으로 옮긴 기준 구현입니다.
+
+    pandas_ta는 requirements에서 빠져 설치되어 있지 않으므로, add_indicators_ta 대신 이 구현과 비교합니다.
+    """
+    close, high, low = df['close'], df['high'], df['low']
+    result = pd.DataFrame(index=df.index)
+    for length in (3, 5, 10, 20):
+        result[f'SMA_{length}'] = close.rolling(length, min_periods=length).mean()
+    for length in (3, 5, 10, 20):
+        # ema(presma=True): 첫 length개의 SMA를 시작값으로 하는 adjust=False EWM
+        seeded = close.copy()
+        seeded.iloc[:length - 1] = np.nan
+        seeded.iloc[length - 1] = close.iloc[:length].mean()
+        result[f'EMA_{length}'] = seeded.ewm(span=length, adjust=False).mean()
+
+    # rsi: 상승/하락폭의 rma(ewm(alpha=1/length, min_periods=length), adjust=True)
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = positive.ewm(alpha=1 / 14, min_periods=14).mean()
+    negative_avg = negative.ewm(alpha=1 / 14, min_periods=14).mean()
+    result['RSI_14'] = 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+    # stoch: non_zero_range는 범위에 0이 하나라도 있으면 전체에 epsilon을 더함
+    lowest, highest = low.rolling(14).min(), high.rolling(14).max()
+    value_range = highest - lowest
+    if value_range.eq(0).any():
+        value_range = value_range + sys.float_info.epsilon
+    stoch = 100 * (close - lowest) / value_range
+    stoch_k = stoch.loc[stoch.first_valid_index():].rolling(3, min_periods=3).mean()
+    stoch_d = stoch_k.loc[stoch_k.first_valid_index():].rolling(3, min_periods=3).mean()
+    result['STOCHk_14_3_3'] = stoch_k.reindex(df.index)
+    result['STOCHd_14_3_3'] = stoch_d.reindex(df.index)
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    result['MACD'] = macd
+    result['Signal_Line'] = macd.ewm(span=9, adjust=False).mean()
+    result['MACD_Histogram'] = macd - result['Signal_Line']
+    result['Middle_Band'] = close.rolling(window=20).mean()
+    std_dev = close.rolling(window=20).std()
+    result['Upper_Band'] = result['Middle_Band'] + (std_dev * 2)
+    result['Lower_Band'] = result['Middle_Band'] - (std_dev * 2)
+    return result
+
+
+@pytest.mark.parametrize("n", [24, 30, 3000, 50000])
+def test_matches_pandas_ta_reference(n):
+    df = make_candles(n)
+    expected = reference_indicators(df)
+    actual = add_indicators(df)
+
+    assert list(actual.columns) == list(df.columns) + INDICATOR_COLUMNS
+    for column in INDICATOR_COLUMNS:
+        assert_same_column(expected[column], actual[column], _scale(df, column))
+
+
+def test_matches_streaming_engine():
+    df = make_candles()
+    engine = IndicatorEngine()
+    expected = pd.DataFrame([engine.update(candle) for candle in df.to_dict('records')], columns=INDICATOR_COLUMNS)
+    actual = compute_indicators(df['high'], df['low'], df['close'])
+
+    assert actual.shape == (len(df), len(INDICATOR_COLUMNS))
+    for position, column in enumerate(INDICATOR_COLUMNS):
+        assert_same_column(expected[column], actual[:, position], _scale(df, column))
+
+
+def test_pandas_only_columns_match():
+    df = make_candles()
+    actual = add_indicators(df)
+
+    close = df['close']
+    assert_same_column(close.rolling(10).mean(), actual['SMA_10'], close.max())
+    assert_same_column(close.rolling(20).mean() - close.rolling(20).std() * 2, actual['Lower_Band'], close.max())
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    assert_same_column(macd, actual['MACD'], close.max())
+    assert_same_column(macd.ewm(span=9, adjust=False).mean(), actual['Signal_Line'], close.max())
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 14, 16, 18, 19])
+def test_short_history_is_nan_padded(n):
+    values = compute_indicators(np.ones(n), np.ones(n), np.arange(n, dtype=float))
+    assert values.shape == (n, len(INDICATOR_COLUMNS))
+    assert np.isnan(values[:, INDICATOR_COLUMNS.index('SMA_20')]).all()
+
+
+def test_does_not_modify_input():
+    df = make_candles(100)
+    before = df.copy()
+    add_indicators(df)
+    pd.testing.assert_frame_equal(df, before)
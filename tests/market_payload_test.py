@@ -0,0 +1,91 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from indicators import add_indicators
+from market_payload import encode_market_data, payload_size_report, prompt_encoding
+
+
+def _frame(n, freq, start, price=95_000_000):
+    rng = np.random.default_rng(n)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    df = pd.DataFrame({
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': rng.uniform(100, 5000, n), 'value': rng.uniform(1e10, 5e11, n),
+    }, index=pd.date_range(start, periods=n, freq=freq))
+    return add_indicators(df)
+
+
+@pytest.fixture
+def frames():
+    return {
+        'daily': _frame(30, 'D', '2024-03-23 09:00'),
+        'hourly': _frame(24, 'h', '2024-04-21 13:00'),
+    }
+
+
+def test_split_is_unchanged(frames):
+    expected = pd.concat([frames['daily'], frames['hourly']], keys=['daily', 'hourly']).to_json(orient='split')
+    assert encode_market_data(frames, "split") == expected
+
+
+def test_compact_layout(frames):
+    payload = json.loads(encode_market_data(frames, "compact"))
+    assert payload["columns"][:7] == ["t", "open", "high", "low", "close", "volume", "value_1M"]
+
+    daily = payload["frames"]["daily"]
+    # SMA_20/볼린저 밴드가 계산되기 전의 워밍업 행(19개)은 제거됨
+    assert daily["start"] == "2024-04-11 09:00"
+    assert daily["step"] == "1d"
+    assert [row[0] for row in daily["rows"]] == list(range(11))
+    assert daily["rows"][-1][4] == int(round(frames['daily']['close'].iloc[-1]))
+    assert payload["frames"]["hourly"]["step"] == "1h"
+
+
+def test_prices_below_one_won_keep_significant_digits():
+    frames = {'daily': _frame(30, 'D', '2024-03-23 09:00', price=0.45), 'hourly': _frame(24, 'h', '2024-04-21 13:00', price=0.45)}
+    payload = json.loads(encode_market_data(frames, "compact"))
+    close = frames['daily']['close'].iloc[-1]
+    row = payload["frames"]["daily"]["rows"][-1]
+    assert row[4] == pytest.approx(close, rel=1e-6) and row[4] != 0
+    assert all(value != 0 for value in row[1:5])
+
+    payload = json.loads(encode_market_data(frames, "relative"))
+    assert payload["ref_close"] == pytest.approx(close, rel=1e-6)
+
+
+def test_relative_prices(frames):
+    payload = json.loads(encode_market_data(frames, "relative"))
+    reference = frames['daily']['close'].iloc[-1]
+    assert payload["ref_close"] == int(round(reference))
+    close = payload["frames"]["daily"]["rows"][-1][4]
+    assert close == 0.0
+
+
+def test_compact_is_smaller(frames):
+    split = encode_market_data(frames, "split")
+    for encoding in ("compact", "relative"):
+        assert len(encode_market_data(frames, encoding)) < len(split) / 2
+
+    report = payload_size_report(frames, "compact")
+    assert "* compact" in report and "split" in report
+
+
+def test_unknown_encoding(frames):
+    with pytest.raises(ValueError):
+        encode_market_data(frames, "xml")
+
+
+def test_only_encodings_described_by_the_instructions_can_be_sent():
+    assert prompt_encoding("compact") == "compact"
+    assert prompt_encoding(" Relative ") == "relative"
+    with pytest.raises(ValueError):
+        prompt_encoding("split")
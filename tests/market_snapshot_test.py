@@ -0,0 +1,137 @@
+import sys
+from pathlib import Path
+
+import pytest
+import pyupbit
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import market_snapshot
+from market_snapshot import MarketSnapshot
+
+
+class FakeUpbit:
+    def __init__(self):
+        self.krw = 1_000_000.0
+        self.calls = 0
+
+    def get_balances(self):
+        self.calls += 1
+        return [
+            {'currency': 'KRW', 'balance': str(self.krw), 'avg_buy_price': '0'},
+            {'currency': 'BTC', 'balance': '0.01', 'avg_buy_price': '90000000'},
+        ]
+
+
+PRICES = {"KRW-BTC": 95_005_000, "KRW-ETH": 4_500_000, "KRW-XRP": 700}
+
+
+def _orderbook(market):
+    price = PRICES[market]
+    return {'market': market, 'timestamp': 1, 'orderbook_units': [{'ask_price': price + 5_000, 'bid_price': price - 5_000}]}
+
+
+@pytest.fixture
+def quotes(monkeypatch):
+    # pyupbit와 같이 마켓이 하나면 리스트 대신 단일 값을 돌려줌
+    calls = []
+
+    def get_orderbook(ticker):
+        calls.append("orderbook")
+        books = [_orderbook(market) for market in ticker]
+        return books[0] if len(books) == 1 else books
+
+    def get_current_price(ticker):
+        calls.append("price")
+        return PRICES[ticker[0]] if len(ticker) == 1 else {market: PRICES[market] for market in ticker}
+
+    monkeypatch.setattr(pyupbit, "get_orderbook", get_orderbook)
+    monkeypatch.setattr(pyupbit, "get_current_price", get_current_price)
+    return calls
+
+
+def test_reads_share_one_fetch_per_cycle(quotes):
+    upbit = FakeUpbit()
+    snapshot = MarketSnapshot(upbit)
+
+    for _ in range(3):
+        assert snapshot.ask_price == 95_010_000
+        assert snapshot.current_price == 95_005_000
+        assert snapshot.balance("KRW") == 1_000_000
+        assert snapshot.avg_buy_price("BTC") == 90_000_000
+    assert snapshot.balance("ETH") == 0
+
+    assert quotes == ["orderbook", "price"]
+    assert upbit.calls == 1
+    assert snapshot.api_calls == 3
+
+
+def test_order_refreshes_only_account(quotes):
+    upbit = FakeUpbit()
+    snapshot = MarketSnapshot(upbit)
+    snapshot.balance("KRW")
+    snapshot.current_price
+
+    upbit.krw = 500_000.0
+    snapshot.invalidate_account()
+    assert snapshot.balance("KRW") == 500_000
+    assert snapshot.current_price == 95_005_000
+    assert upbit.calls == 2
+    assert quotes == ["orderbook", "price"]
+
+
+def test_new_cycle_and_stale_quotes(quotes, monkeypatch):
+    snapshot = MarketSnapshot(FakeUpbit(), max_age=60)
+    clock = [1000.0]
+    monkeypatch.setattr(market_snapshot.time, "monotonic", lambda: clock[0])
+
+    snapshot.current_price
+    clock[0] += 30
+    snapshot.current_price
+    assert len(quotes) == 2
+
+    clock[0] += 31
+    snapshot.current_price
+    assert len(quotes) == 4
+
+    snapshot.invalidate()
+    snapshot.orderbook
+    assert len(quotes) == 6
+
+
+def test_failed_balance_lookup_raises(quotes):
+    upbit = FakeUpbit()
+    upbit.get_balances = lambda: {'error': {'message': 'invalid key'}}
+    with pytest.raises(Exception):
+        MarketSnapshot(upbit).balance("KRW")
+
+
+def test_many_markets_share_one_batched_quote_request(quotes):
+    upbit = FakeUpbit()
+    snapshot = MarketSnapshot(upbit, ["KRW-BTC", "KRW-ETH", "KRW-XRP"])
+
+    assert snapshot.price_for("KRW-ETH") == 4_500_000
+    assert snapshot.ask_price_for("KRW-XRP") == 5_700
+    assert snapshot.current_price == 95_005_000   # 첫 마켓이 기본 마켓
+    assert snapshot.prices() == PRICES
+    assert snapshot.balance("KRW") == 1_000_000
+
+    assert quotes == ["orderbook", "price"]
+    assert upbit.calls == 1
+
+
+def test_upbit_factory_is_called_only_when_balances_are_needed(quotes):
+    created = []
+
+    def create_upbit():
+        created.append(1)
+        return FakeUpbit()
+
+    snapshot = MarketSnapshot(create_upbit)
+
+    assert snapshot.price_for("KRW-BTC") == 95_005_000
+    assert created == []
+    assert snapshot.balance("KRW") == 1_000_000
+    assert created == [1]
@@ -0,0 +1,119 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+import market_stream
+from fake_services import FakeUpbitWebSocket
+from market_snapshot import MarketSnapshot
+from market_stream import MarketStream
+
+MARKETS = ["KRW-BTC", "KRW-ETH"]
+
+
+class Resync:
+    """연결될 때마다 호출되는 REST 재동기화 대역"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, tickers):
+        self.calls += 1
+        return {t: {"market": t, "timestamp": 0, "orderbook_units": [{"ask_price": 1.0}]} for t in tickers}, {t: 1.0 for t in tickers}
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    monkeypatch.setattr(market_stream, "RECONNECT_DELAY", 0.05)
+    monkeypatch.setattr(market_stream, "RECV_TIMEOUT", 0.1)
+    with FakeUpbitWebSocket(interval=0.01) as server:
+        yield server
+
+
+def test_stream_keeps_live_orderbook_and_ticker(feed):
+    resync = Resync()
+    stream = MarketStream(MARKETS, url=feed.url, resync=resync).start()
+    try:
+        assert stream.wait_ready(5)
+        assert resync.calls == 1
+        assert wait_until(lambda: stream.messages >= 8)
+
+        subscription = feed.subscriptions[0]
+        assert {item["type"]: item["codes"] for item in subscription if "type" in item} == {"ticker": MARKETS, "orderbook": MARKETS}
+
+        orderbook = stream.orderbook_for("KRW-ETH")
+        assert orderbook["market"] == "KRW-ETH"
+        assert len(orderbook["orderbook_units"]) == 15
+        assert set(orderbook["orderbook_units"][0]) == {"ask_price", "bid_price", "ask_size", "bid_size"}
+        assert stream.price_for("KRW-BTC") == pytest.approx(feed.exchange.price(), rel=0.01)
+        assert set(stream.prices()) == set(MARKETS)
+        assert stream.price_for("KRW-XRP") is None   # 구독하지 않은 마켓
+    finally:
+        stream.stop()
+
+
+def test_stream_reconnects_and_resyncs_after_disconnect(feed):
+    resync = Resync()
+    stream = MarketStream(MARKETS, url=feed.url, resync=resync).start()
+    try:
+        assert stream.wait_ready(5)
+        assert wait_until(lambda: feed.subscriptions)   # 대역 쪽에서도 연결을 등록한 뒤에 끊음
+        feed.drop_connections()
+        assert wait_until(lambda: stream.connects == 2 and stream.connected)
+        assert resync.calls == 2
+        assert len(feed.subscriptions) == 2
+        assert stream.orderbook_for("KRW-BTC") is not None
+    finally:
+        stream.stop()
+    assert not stream.connected
+    assert stream.orderbook_for("KRW-BTC") is None   # 끊긴 상태의 값은 쓰지 않음
+
+
+def test_snapshot_reads_stream_without_network(feed):
+    stream = MarketStream(MARKETS, url=feed.url, resync=None).start()
+    try:
+        assert stream.wait_ready(5)
+        assert wait_until(lambda: stream.prices() is not None and stream.orderbook_for("KRW-ETH") is not None)
+        snapshot = MarketSnapshot(upbit=None, tickers=MARKETS, stream=stream)
+        for _ in range(100):
+            assert snapshot.ask_price_for("KRW-ETH") > snapshot.price_for("KRW-ETH") * 0.99
+            assert snapshot.orderbook["market"] == "KRW-BTC"
+            assert set(snapshot.prices()) == set(MARKETS)
+        assert snapshot.api_calls == 0
+        assert snapshot.quotes_at is None
+    finally:
+        stream.stop()
+
+
+def test_stale_values_are_not_used():
+    stream = MarketStream(["KRW-BTC"], url="ws://unused", max_age=0.05)
+    stream.connected = True
+    stream.apply({"type": "ticker", "code": "KRW-BTC", "trade_price": 100.0})
+    assert stream.price_for("KRW-BTC") == 100.0
+    time.sleep(0.1)
+    assert stream.price_for("KRW-BTC") is None
+
+
+def test_missing_websockets_package_disables_the_stream(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "websockets.sync.client", None)
+    stream = MarketStream(["KRW-BTC"], url="ws://unused").start()
+
+    assert stream.disabled and stream._thread is None
+    assert stream.wait_ready(timeout=5) is False
+    assert stream.price_for("KRW-BTC") is None
+    assert "websockets" in capsys.readouterr().out
@@ -0,0 +1,92 @@
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import metrics
+from metrics import Registry, CONTENT_TYPE
+
+
+def test_counters_render_as_openmetrics_totals():
+    registry = Registry()
+    registry.inc("api_calls", service="api.upbit.com")
+    registry.inc("api_calls", 2, service="api.upbit.com")
+    registry.inc("tokens", 120, kind="prompt_cached")
+
+    text = registry.render()
+    assert "# TYPE autotrade_api_calls counter" in text
+    assert 'autotrade_api_calls_total{service="api.upbit.com"} 3' in text
+    assert 'autotrade_tokens_total{kind="prompt_cached"} 120' in text
+    assert text.endswith("# EOF\n")
+    assert registry.counter_value("api_calls", service="api.upbit.com") == 3
+
+
+def test_spans_fill_cumulative_histogram_buckets():
+    registry = Registry(buckets=(0.1, 1, metrics.math.inf))
+    registry.record_span("model_call", 0.05)
+    registry.record_span("model_call", 0.5)
+    registry.record_span("model_call", 5)
+
+    text = registry.render()
+    assert 'autotrade_stage_seconds_bucket{stage="model_call",le="0.1"} 1' in text
+    assert 'autotrade_stage_seconds_bucket{stage="model_call",le="1"} 2' in text
+    assert 'autotrade_stage_seconds_bucket{stage="model_call",le="+Inf"} 3' in text
+    assert 'autotrade_stage_seconds_count{stage="model_call"} 3' in text
+    assert 'autotrade_stage_seconds_sum{stage="model_call"} 5.55' in text
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.inc("api_errors", service='a"b\\c\nd')
+    assert 'service="a\\"b\\\\c\\nd"' in registry.render()
+
+
+def test_cycle_collects_spans_and_saves_counter_deltas(tmp_path):
+    registry = Registry()
+    registry.db_path = str(tmp_path / "metrics.sqlite")
+    registry.inc("api_calls", 5, service="slack.com")   # 사이클 이전 값은 저장하지 않음
+
+    with registry.cycle():
+        with registry.span("data_fetch"):
+            time.sleep(0.01)
+        registry.record_span("data_fetch.news_data", 0.2)
+        registry.inc("api_calls", service="slack.com")
+
+    stages = [stage for stage, _ in registry.last_cycle()]
+    assert stages == ["data_fetch", "data_fetch.news_data", "cycle"]
+    with sqlite3.connect(registry.db_path) as conn:
+        saved = conn.execute("SELECT stage FROM cycle_spans").fetchall()
+        counters = dict(conn.execute("SELECT name || labels, value FROM cycle_counters").fetchall())
+    assert [row[0] for row in saved] == stages
+    assert counters == {'api_calls{service="slack.com"}': 1, "cycles": 1}
+
+
+def test_span_is_recorded_when_stage_raises():
+    registry = Registry()
+    with pytest.raises(ValueError):
+        with registry.span("json_parse"):
+            raise ValueError("bad json")
+    assert 'autotrade_stage_seconds_count{stage="json_parse"} 1' in registry.render()
+
+
+def test_scrape_endpoint_serves_registry():
+    registry = Registry()
+    registry.inc("retries", host="serpapi.com")
+    server = metrics.serve(0, registry=registry)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        response = requests.get(base + "/metrics", timeout=5)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert 'autotrade_retries_total{host="serpapi.com"} 1' in response.text
+        assert requests.get(base + "/other", timeout=5).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,139 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from model_scheduler import ModelScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def response(tokens=0, content="{}"):
+    return SimpleNamespace(usage=SimpleNamespace(total_tokens=tokens), content=content)
+
+
+def test_token_bucket_refills_at_rate_and_allows_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(600, burst_seconds=1, clock=clock)   # 초당 10, 용량 10
+    assert bucket.wait_time(10) == 0
+    bucket.consume(10)
+    assert bucket.wait_time(5) == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.wait_time(5) == 0
+
+    bucket.consume(25)   # 실제 사용량이 더 많으면 빚으로 남음
+    assert bucket.wait_time(1) == pytest.approx(2.1)
+    assert bucket.wait_time(100) == pytest.approx(3.0)   # 용량보다 큰 요청은 가득 찰 때까지만 기다림
+
+
+def test_higher_priority_requests_run_first():
+    release = threading.Event()
+    order = []
+
+    def call(name):
+        if name == "blocker":
+            release.wait(5)
+        order.append(name)
+        return response()
+
+    scheduler = ModelScheduler(call, max_concurrency=1)
+    blocker = scheduler.submit(name="blocker")
+    time.sleep(0.05)
+    futures = [scheduler.submit(priority=p, name=n) for p, n in ((5, "low"), (0, "high"), (5, "low2"), (1, "mid"))]
+    release.set()
+    for future in [blocker, *futures]:
+        future.result(timeout=5)
+    assert order == ["blocker", "high", "mid", "low", "low2"]
+
+
+def test_concurrency_limit_and_queue_wait_are_reported():
+    def call():
+        time.sleep(0.05)
+        return response()
+
+    scheduler = ModelScheduler(call, max_concurrency=2)
+    futures = [scheduler.submit() for _ in range(6)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert scheduler.max_running == 2
+    assert all(f.model_latency >= 0.05 for f in futures)
+    assert futures[-1].queue_wait >= 0.1     # 앞의 두 묶음을 기다림
+    assert futures[0].queue_wait < 0.05
+
+
+def test_requests_per_minute_limit_spaces_out_calls():
+    calls = []
+    scheduler = ModelScheduler(lambda: calls.append(time.monotonic()) or response(),
+                               max_concurrency=4, requests_per_minute=1200, burst_seconds=0.05)   # 초당 20, 한 번에 1개
+    for future in [scheduler.submit() for _ in range(5)]:
+        future.result(timeout=5)
+    assert calls[-1] - calls[0] >= 4 * 0.05 * 0.9
+
+
+def test_tokens_per_minute_limit_uses_estimates_and_actual_usage():
+    scheduler = ModelScheduler(lambda tokens: response(tokens), tokens_per_minute=60_000, burst_seconds=1)   # 초당 1000
+    started = time.monotonic()
+    scheduler.submit(estimated_tokens=1000, tokens=1000).result(timeout=5)
+    second = scheduler.submit(estimated_tokens=500, tokens=500)
+    second.result(timeout=5)
+    assert second.queue_wait >= 0.4
+    assert time.monotonic() - started >= 0.4
+
+    # 실제 사용량이 예상보다 적으면 남은 토큰을 돌려받아 다음 요청이 바로 실행됨
+    time.sleep(1.0)
+    scheduler.submit(estimated_tokens=900, tokens=100).result(timeout=5)
+    third = scheduler.submit(estimated_tokens=800, tokens=100)
+    third.result(timeout=5)
+    assert third.queue_wait < 0.1
+
+
+def test_retryable_errors_are_retried_after_retry_after():
+    attempts = []
+
+    def call():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimited(retry_after="0.1")
+        return response()
+
+    scheduler = ModelScheduler(call, retry_on=(RateLimited,), backoff_factor=0.01)
+    future = scheduler.submit()
+    assert future.result(timeout=5) is not None
+    assert future.attempts == 3
+    assert attempts[1] - attempts[0] >= 0.09
+    assert future.queue_wait >= 0.18
+
+
+def test_non_retryable_and_exhausted_errors_reach_the_caller():
+    scheduler = ModelScheduler(lambda: (_ for _ in ()).throw(ValueError("bad request")), retry_on=(RateLimited,))
+    with pytest.raises(ValueError):
+        scheduler.submit().result(timeout=5)
+
+    def always_limited():
+        raise RateLimited()
+
+    scheduler = ModelScheduler(always_limited, retry_on=(RateLimited,), max_retries=2, backoff_factor=0.01)
+    future = scheduler.submit()
+    with pytest.raises(RateLimited):
+        future.result(timeout=5)
+    assert future.attempts == 3
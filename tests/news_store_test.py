@@ -0,0 +1,128 @@
+import json
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+import http_client
+import news_store
+from fake_services import FakeServices, SERPAPI
+from news_store import NewsStore, fetch_google_news, format_news, parse_date
+
+
+@pytest.fixture
+def services(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    with FakeServices() as services, services.redirect():
+        yield services
+    monkeypatch.setattr(http_client, "_session", None)
+
+
+def titles(items):
+    return [title for title, _, _ in items]
+
+
+def test_items_are_deduplicated_and_parsed_once_across_cycles(tmp_path, services):
+    store = NewsStore(tmp_path / "news.sqlite", top_k=3)
+    fetch = partial(fetch_google_news, "fake-key")
+
+    assert store.refresh(fetch)
+    new, earlier = store.select()
+    # 대소문자/공백만 다른 기사와 묶음(stories) 안의 같은 기사는 한 번만 저장
+    assert titles(new) == [f"Bitcoin market update #{i}" for i in range(9, -1, -1)]
+    assert earlier == [] and store.parsed == 10
+
+    assert store.refresh(fetch)   # 새 기사 2개 (#10, #11)
+    new, earlier = store.select()
+    assert titles(new) == ["Bitcoin market update #11", "Bitcoin market update #10"]
+    assert titles(earlier) == ["Bitcoin market update #9", "Bitcoin market update #8", "Bitcoin market update #7"]
+    assert store.parsed == 12   # 이미 저장된 기사는 날짜를 다시 파싱하지 않음
+    assert new[0][2] > new[1][2] > earlier[0][2]
+
+    new, earlier = store.select()   # 새 기사가 없으면 이전 기사만
+    assert new == [] and titles(earlier) == ["Bitcoin market update #11", "Bitcoin market update #10", "Bitcoin market update #9"]
+
+
+def test_slow_api_falls_back_to_stored_items_and_keeps_the_late_result(tmp_path, services):
+    store = NewsStore(tmp_path / "news.sqlite", top_k=2)
+    fetch = partial(fetch_google_news, "fake-key")
+    store.refresh(fetch)
+    store.select()
+
+    services.latency[SERPAPI] = 0.5
+    assert store.refresh(fetch, wait=0.05) is False
+    new, earlier = store.select()
+    assert new == [] and titles(earlier) == ["Bitcoin market update #9", "Bitcoin market update #8"]
+
+    # 진행 중인 요청이 있으면 새로 보내지 않고 기다림. 늦게 온 결과는 다음 사이클에 새 기사로 보냄
+    assert store.refresh(fetch, wait=5) is True
+    assert services.stats[SERPAPI]["requests"] == 2
+    new, _ = store.select()
+    assert titles(new) == ["Bitcoin market update #11", "Bitcoin market update #10"]
+
+
+def test_failed_fetch_raises_and_keeps_stored_items(tmp_path):
+    store = NewsStore(tmp_path / "news.sqlite")
+    store.add([{"title": "Stored story", "source": {"name": "Wire"}, "date": "05/28/2024, 07:00 PM, +0000 UTC"}])
+
+    def fail():
+        raise ConnectionError("serpapi down")
+
+    with pytest.raises(ConnectionError):
+        store.refresh(fail, wait=1)
+    new, _ = store.select()
+    assert titles(new) == ["Stored story"]
+
+
+def test_dates_parse_with_am_pm_and_missing_dates_sort_by_arrival(tmp_path):
+    assert parse_date("05/28/2024, 07:00 PM, +0000 UTC") == int(datetime(2024, 5, 28, 19, tzinfo=timezone.utc).timestamp() * 1000)
+    assert parse_date("12:30 yesterday") is None and parse_date(None) is None
+
+    store = NewsStore(tmp_path / "news.sqlite", max_entries=2)
+    store.add([
+        {"title": "Old", "source": {"name": "A"}, "date": "01/01/2020, 12:30 AM, +0000 UTC"},
+        {"title": "Undated", "source": {"name": "B"}},
+        {"title": "Mid", "source": {"name": "C"}, "date": "01/01/2021, 09:00 AM, +0000 UTC"},
+    ])
+    new, _ = store.select()
+    assert titles(new) == ["Undated", "Mid"]   # 가장 오래된 기사부터 지움
+    assert new[0][2] is None
+
+
+def test_get_news_data_sends_only_new_and_recent_items(tmp_path, services, monkeypatch):
+    import autotrade_v2
+
+    monkeypatch.setattr(news_store, "news_store", NewsStore(tmp_path / "news.sqlite", top_k=1))
+    monkeypatch.setenv("SERPAPI_API_KEY", "fake-key")
+
+    first = json.loads(autotrade_v2.get_news_data())
+    second = json.loads(autotrade_v2.get_news_data())
+
+    assert len(first["new"]) == 10 and first["earlier"] == []
+    assert titles(second["new"]) == ["Bitcoin market update #11", "Bitcoin market update #10"]
+    assert titles(second["earlier"]) == ["Bitcoin market update #9"]
+    assert len(autotrade_v2.get_news_data()) < len(json.dumps(first))
+    assert format_news([], []) == "No news data available."
+
+
+def test_connections_are_closed_after_add_and_select(tmp_path):
+    store = NewsStore(tmp_path / "n.sqlite")
+    opened = []
+    connect = store._connect
+    store._connect = lambda: opened.append(connect()) or opened[-1]
+
+    store.add([{"title": "a", "source": {"name": "s"}, "date": None}])
+    assert titles(store.select()[0]) == ["a"]
+
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
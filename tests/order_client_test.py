@@ -0,0 +1,96 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import pyupbit
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+sys.path.append(str(Path(__file__).parent))
+
+import http_client
+import metrics
+from fake_services import FakeServices, UPBIT
+from market_snapshot import MarketSnapshot
+from order_client import OrderClient, OrderFailed, OrderRejected, size_buy, size_sell
+
+
+ACCESS_KEY = "fake-upbit-access-key-0000000000000000"
+SECRET_KEY = "fake-upbit-secret-key-0000000000000000"
+
+
+@pytest.fixture
+def services(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)   # 이전 테스트의 연결 통계/연결을 쓰지 않음
+    with FakeServices() as services, services.redirect():
+        yield services
+    monkeypatch.setattr(http_client, "_session", None)
+
+
+def test_sizing_uses_held_state_and_rejects_small_orders():
+    assert size_buy(1_000_000, 20) == pytest.approx(200_000 * (1 - 0.0005))
+    assert size_sell(0.01, 50, 100_000_000) == pytest.approx(0.005)
+    with pytest.raises(OrderRejected):
+        size_buy(20_000, 10)                 # 2,000원
+    with pytest.raises(OrderRejected):
+        size_sell(0.0001, 10, 100_000_000)   # 1,000원
+
+
+def test_order_is_one_request_on_a_warm_connection_and_records_latency(services):
+    client = OrderClient(pyupbit.Upbit(ACCESS_KEY, SECRET_KEY))
+    client.warm_up("KRW-BTC")
+    requests_before = services.stats[UPBIT]["requests"]
+
+    with metrics.cycle():
+        decided_at = time.perf_counter()
+        result = client.buy_market("KRW-BTC", 100_000, decided_at)
+    spans = dict(metrics.last_cycle())
+
+    assert result["side"] == "bid" and result["market"] == "KRW-BTC"
+    assert services.stats[UPBIT]["requests"] == requests_before + 1
+    assert http_client.connection_stats()["127.0.0.1"]["new_connections"] == 1
+    assert services.exchange.btc > 0
+    assert 0 < spans["order_request"] <= spans["decision_to_order"] == client.last_latency
+
+
+def test_rejected_order_raises_order_failed(services):
+    client = OrderClient(lambda: pyupbit.Upbit(ACCESS_KEY, SECRET_KEY))
+    with pytest.raises(OrderFailed):
+        client.sell_market("KRW-BTC", 1.0)   # 보유 BTC 없음
+    assert client.last_latency is None
+
+
+def test_fill_is_tracked_by_uuid_with_backoff_and_updates_local_balances(services):
+    services.exchange.pending_polls = 2   # 두 번은 미체결로 응답
+    upbit = pyupbit.Upbit(ACCESS_KEY, SECRET_KEY)
+    client = OrderClient(upbit)
+    snapshot = MarketSnapshot(upbit)
+    krw = snapshot.balance("KRW")
+    accounts_before = services.stats[UPBIT]["requests"]
+
+    order = client.buy_market("KRW-BTC", size_buy(krw, 30))
+    fill = client.wait_for_fill(order["uuid"], delay=0.01)
+    snapshot.apply_fill(fill)
+
+    assert fill.done and services.exchange.order_polls == 3
+    assert services.stats[UPBIT]["requests"] == accounts_before + 1 + 3   # 주문 1 + 조회 3, 잔고 재조회 없음
+    assert snapshot.balance("KRW") == pytest.approx(services.exchange.krw)
+    assert snapshot.balance("BTC") == pytest.approx(services.exchange.btc)
+    assert snapshot.avg_buy_price("BTC") == pytest.approx(services.exchange.avg_buy_price)
+
+    order = client.sell_market("KRW-BTC", snapshot.balance("BTC"))
+    snapshot.apply_fill(client.wait_for_fill(order["uuid"], delay=0.01))
+    assert snapshot.balance("BTC") == 0 and snapshot.avg_buy_price("BTC") == 0
+    assert snapshot.balance("KRW") == pytest.approx(services.exchange.krw)
+
+
+def test_unfilled_order_is_returned_when_the_wait_times_out(services):
+    services.exchange.pending_polls = 1000
+    client = OrderClient(pyupbit.Upbit(ACCESS_KEY, SECRET_KEY))
+    order = client.buy_market("KRW-BTC", 10_000)
+
+    fill = client.wait_for_fill(order["uuid"], timeout=0.1, delay=0.02, max_delay=0.04)
+    assert not fill.done and fill.volume == 0
+    assert services.exchange.order_polls >= 2
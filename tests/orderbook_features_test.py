@@ -0,0 +1,70 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from market_payload import count_tokens
+from orderbook_features import orderbook_features
+
+
+def make_orderbook(price, tick, levels=15, seed=1):
+    # pyupbit.get_orderbook과 같은 모양 (잔량은 소수점 8자리)
+    rng = random.Random(seed)
+    units = [{
+        "ask_price": float(price + tick * (i + 1)), "bid_price": float(price - tick * i),
+        "ask_size": round(rng.uniform(0.001, 2), 8), "bid_size": round(rng.uniform(0.001, 2), 8),
+    } for i in range(levels)]
+    return {
+        "market": "KRW-BTC", "timestamp": 1718000000000,
+        "total_ask_size": round(sum(u["ask_size"] for u in units), 8),
+        "total_bid_size": round(sum(u["bid_size"] for u in units), 8),
+        "orderbook_units": units, "level": 0,
+    }
+
+
+def test_features_match_a_hand_computed_book():
+    orderbook = {"orderbook_units": [
+        {"ask_price": 1_010_000, "ask_size": 1, "bid_price": 990_000, "bid_size": 3},
+        {"ask_price": 1_020_000, "ask_size": 2, "bid_price": 980_000, "bid_size": 1},
+        {"ask_price": 1_060_000, "ask_size": 5, "bid_price": 900_000, "bid_size": 10},
+    ]}
+    features = orderbook_features(orderbook, imbalance_levels=(1, 2, 5), depth_bps=(100, 300, 1000, 2000))
+
+    assert features["mid"] == 1_000_000 and features["spread_bps"] == 200
+    assert features["imbalance"] == {"top1": 0.5, "top2": 0.143, "top5": 0.273}   # top5는 호가 3개 전체
+    # 100bp(99만~101만 원): 매수 297만 원, 매도 101만 원 / 300bp: 두 번째 호가까지 / 1000bp: 전체
+    assert features["depth_1M"] == {
+        "100bp": [3.0, 1.0],
+        "300bp": [round(3.95, 1), round(3.05, 1)],
+        "1000bp": [round(12.95, 1), round(8.35, 1)],
+    }   # 호가창 범위(600bp)를 넘는 2000bp는 1000bp와 같아 생략
+    assert features["range_bps"] == 600
+
+
+def test_depth_is_cumulative_and_stops_after_the_book_range():
+    features = orderbook_features(make_orderbook(700, 1))   # 호가 한 칸이 약 14bp인 저가 코인
+    depth = features["depth_1M"]
+    assert list(depth) == ["2bp", "10bp", "25bp", "100bp"]
+    bids, asks = zip(*depth.values())
+    assert list(bids) == sorted(bids) and list(asks) == sorted(asks)
+
+    features = orderbook_features(make_orderbook(95_000_000, 1000))   # BTC: 15호가가 1.5bp 안에 있음
+    assert list(features["depth_1M"]) == ["2bp"] and features["range_bps"] == pytest.approx(1.5, abs=0.1)
+
+
+def test_summary_is_an_order_of_magnitude_smaller_than_the_raw_book():
+    orderbook = make_orderbook(95_000_000, 1000)
+    raw_tokens, _ = count_tokens(json.dumps(orderbook))
+    summary_tokens, _ = count_tokens(json.dumps(orderbook_features(orderbook)))
+    assert raw_tokens >= 10 * summary_tokens
+
+
+def test_empty_orderbook_is_an_error():
+    with pytest.raises(ValueError):
+        orderbook_features({"orderbook_units": []})
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from portfolio import AnalysisScheduler, parse_markets, currency_of
+
+
+def test_parse_markets():
+    assert parse_markets(None) == ["KRW-BTC"]
+    assert parse_markets(" krw-btc, KRW-ETH ,,KRW-BTC") == ["KRW-BTC", "KRW-ETH"]
+    assert currency_of("KRW-ETH") == "ETH"
+    with pytest.raises(ValueError):
+        parse_markets("KRW-BTC,BTC")
+
+
+def test_scheduler_rotates_through_all_markets():
+    markets = [f"KRW-C{i:03d}" for i in range(50)]
+    scheduler = AnalysisScheduler(markets, max_per_cycle=3)
+
+    seen = []
+    for _ in range(17):
+        chosen = scheduler.select()
+        assert len(chosen) == 3
+        seen.extend(chosen)
+    assert set(seen) == set(markets)
+    assert seen[:3] == markets[:3]
+
+
+def test_scheduler_analyzes_large_moves_first():
+    scheduler = AnalysisScheduler(["KRW-BTC", "KRW-ETH", "KRW-XRP"], max_per_cycle=1)
+    prices = {"KRW-BTC": 100.0, "KRW-ETH": 10.0, "KRW-XRP": 1.0}
+    assert [scheduler.select(prices) for _ in range(3)] == [["KRW-BTC"], ["KRW-ETH"], ["KRW-XRP"]]
+
+    # 다음 차례는 KRW-BTC지만 KRW-XRP가 5% 움직여 먼저 분석
+    assert scheduler.select({**prices, "KRW-XRP": 1.05}) == ["KRW-XRP"]
+    assert scheduler.select({**prices, "KRW-XRP": 1.05}) == ["KRW-BTC"]
+
+
+def test_scheduler_without_limit_selects_every_market():
+    assert AnalysisScheduler(["KRW-BTC", "KRW-ETH"]).select() == ["KRW-BTC", "KRW-ETH"]
+
+
+def test_last_decisions_use_the_same_market_keys_as_the_current_status(tmp_path):
+    import autotrade_v2
+
+    db_path = str(tmp_path / "decisions.sqlite")
+    store = autotrade_v2.decisions_store.get_store(db_path)
+    store.save("buy", 20, "xrp", 1000.0, 500000.0, 700.0, 710.0, market="KRW-XRP")
+    store.save("sell", 10, "btc", 0.01, 600000.0, 9e7, 9.1e7, market="KRW-BTC")
+
+    text = autotrade_v2.fetch_last_decisions(db_path, ticker="KRW-XRP")
+    assert "'market': 'KRW-XRP'" in text and "'xrp_balance': 1000.0" in text and "'xrp_avg_buy_price': 700.0" in text
+    assert "btc" not in text
+
+
+def test_failing_market_analysis_does_not_drop_the_other_markets(monkeypatch):
+    from functools import partial
+
+    import autotrade_v2
+
+    def analyze(*inputs, priority=0):
+        if priority == 1:
+            raise RuntimeError("model scheduler error")
+        return "advice"
+
+    messages = []
+    monkeypatch.setattr(autotrade_v2, "analyze_data_with_gpt4", analyze)
+    monkeypatch.setattr(autotrade_v2, "_parse_decisions", lambda ticker, advice, *inputs: {"decision": "hold", "reason": "r"})
+    monkeypatch.setattr(autotrade_v2, "print_and_slack_message", messages.append)
+
+    inputs = ("news", "data", "decisions", "fng", "status")
+    outcomes, _ = autotrade_v2.run_stages({
+        ticker: (partial(autotrade_v2._decide_and_order, ticker, inputs, rank), ())
+        for rank, ticker in enumerate(["KRW-BTC", "KRW-XRP"])
+    })
+
+    assert outcomes["KRW-XRP"] is None
+    assert outcomes["KRW-BTC"][0] == {"decision": "hold", "reason": "r"}
+    assert len(messages) == 1 and "KRW-XRP" in messages[0]
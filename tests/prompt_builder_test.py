@@ -0,0 +1,64 @@
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+import prompt_builder
+from prompt_builder import build_messages, load_instructions, prompt_usage_message
+
+
+def test_instructions_are_cached_until_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "instructions.md"
+    path.write_text("# Instruction v1", encoding="utf-8")
+
+    reads = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: reads.append(args[0]) or real_open(*args, **kwargs))
+
+    first = load_instructions(str(path))
+    assert load_instructions(str(path)) is first
+    assert len(reads) == 1
+
+    # 수정 시각만 바뀌고 내용이 같으면 같은 문자열 객체 유지
+    os.utime(path, ns=(1, 1))
+    assert load_instructions(str(path)) is first
+    assert len(reads) == 2
+
+    path.write_text("# Instruction v2 (changed)", encoding="utf-8")
+    assert load_instructions(str(path)) == "# Instruction v2 (changed)"
+    assert prompt_builder.instructions_digest(str(path)) is not None
+
+
+def test_missing_instructions_raise(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_instructions(str(tmp_path / "missing.md"))
+
+
+def test_static_prefix_is_byte_identical():
+    instructions = "# Bitcoin Investment Automation Instruction"
+    first = build_messages(instructions, [("Data 4: Fear and Greed Index", "{'value': '70'}"), ("Data 5: Current Investment State", '{"krw_balance": 1}')])
+    second = build_messages(instructions, [("Data 4: Fear and Greed Index", "{'value': '70'}"), ("Data 5: Current Investment State", '{"krw_balance": 2}')])
+
+    assert first[0] == {"role": "system", "content": instructions}
+    assert first[:2] == second[:2]
+    assert first[2]["content"].startswith("### Data 5: Current Investment State\n")
+
+
+def test_missing_block_content_is_stable_text():
+    messages = build_messages("x", [("Data 4: Fear and Greed Index", None)])
+    assert messages[1]["content"] == "### Data 4: Fear and Greed Index\nNo data available."
+
+
+def test_prompt_usage_message():
+    usage = SimpleNamespace(prompt_tokens=8000, completion_tokens=120, prompt_tokens_details=SimpleNamespace(cached_tokens=6144))
+    message = prompt_usage_message(usage)
+    assert "캐시 6,144 / 비캐시 1,856" in message
+    assert "캐시 적중 77%" in message
+
+    assert "캐시 0 / 비캐시 100" in prompt_usage_message(SimpleNamespace(prompt_tokens=100, completion_tokens=1, prompt_tokens_details=None))
@@ -0,0 +1,72 @@
+import sys
+import time
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from slack_bot import SlackNotifier
+
+
+class FakeSlack:
+    def __init__(self, delay=0.0, rate_limited=0):
+        self.delay = delay
+        self.rate_limited = rate_limited
+        self.posts = []
+
+    def __call__(self, text):
+        time.sleep(self.delay)
+        if self.rate_limited:
+            self.rate_limited -= 1
+            return 0.2   # Retry-After
+        self.posts.append((time.monotonic(), text))
+        return None
+
+
+def test_notify_returns_immediately():
+    slack = FakeSlack(delay=0.5)
+    notifier = SlackNotifier(sender=slack, min_interval=0, coalesce_window=0)
+
+    started = time.perf_counter()
+    notifier.notify("매수 주문 실패")
+    assert time.perf_counter() - started < 0.05
+
+    assert notifier.close(timeout=2)
+    assert [text for _, text in slack.posts] == ["매수 주문 실패"]
+
+
+def test_bursts_are_coalesced():
+    slack = FakeSlack()
+    notifier = SlackNotifier(sender=slack, min_interval=0, coalesce_window=0.2, max_batch_chars=20)
+    for text in ["one", "two", "three", "x" * 15]:
+        notifier.notify(text)
+
+    assert notifier.flush(timeout=2)
+    assert [text for _, text in slack.posts] == ["one\ntwo\nthree", "x" * 15]
+    assert notifier.messages == 4 and notifier.posts == 2
+    notifier.close()
+
+
+def test_rate_limits_are_respected():
+    slack = FakeSlack(rate_limited=1)
+    notifier = SlackNotifier(sender=slack, min_interval=0.3, coalesce_window=0)
+
+    started = time.monotonic()
+    notifier.notify("first")
+    assert notifier.flush(timeout=2)
+    notifier.notify("second")
+    assert notifier.close(timeout=2)
+
+    (first_at, first), (second_at, second) = slack.posts
+    assert (first, second) == ("first", "second")
+    assert first_at - started >= 0.2          # Retry-After 대기
+    assert second_at - first_at >= 0.3 - 0.01  # 채널 전송 간격
+
+
+def test_close_flushes_pending_messages():
+    slack = FakeSlack()
+    notifier = SlackNotifier(sender=slack, min_interval=0, coalesce_window=5)
+    notifier.notify("종료 직전 메시지")
+    assert notifier.close(timeout=2)
+    assert [text for _, text in slack.posts] == ["종료 직전 메시지"]
@@ -0,0 +1,67 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from stage_executor import run_stages, format_stage_timings
+
+
+def _sleep_then(value, seconds=0.2):
+    def stage(**kwargs):
+        time.sleep(seconds)
+        return value
+    return stage
+
+
+def test_independent_stages_run_concurrently():
+    stages = {name: (_sleep_then(name), ()) for name in ["news", "ohlcv", "decisions", "fng", "status"]}
+
+    started = time.perf_counter()
+    results, timings = run_stages(stages)
+    elapsed = time.perf_counter() - started
+
+    assert results == {name: name for name in stages}
+    assert set(timings) == set(stages)
+    # 합계(1초)가 아니라 가장 느린 단계(0.2초)에 가까워야 함
+    assert elapsed < 0.6
+
+
+def test_dependencies_receive_results():
+    results, _ = run_stages({
+        "a": (lambda: 2, ()),
+        "b": (lambda: 3, ()),
+        "c": (lambda a, b: a * b, ("a", "b")),
+    })
+    assert results["c"] == 6
+
+
+def test_stage_error_is_reraised_and_dependents_skipped():
+    called = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_stages({
+            "broken": (broken, ()),
+            "after": (lambda broken: called.append(broken), ("broken",)),
+        })
+    assert called == []
+
+
+def test_invalid_graph():
+    with pytest.raises(ValueError):
+        run_stages({"a": (lambda: 1, ("missing",))})
+    with pytest.raises(ValueError):
+        run_stages({"a": (lambda b: 1, ("b",)), "b": (lambda a: 1, ("a",))})
+
+
+def test_format_stage_timings():
+    message = format_stage_timings({"fast": 0.1, "slow": 1.5}, total=1.6)
+    assert message.index("slow") < message.index("fast")
+    assert "전체 1.60s" in message
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from decisions_store import DecisionStore, ReadOnlyDecisionStore
+from streamlit_app import DecisionHistory, page_bounds
+
+
+def save(store, n, start=0):
+    store.save_many([
+        (f"2024-04-01 {i % 24:02d}:00:00", "hold", 0.0, f"reason {i}", 0.01, 1_000_000.0 + i, 90_000_000.0, 95_000_000.0)
+        for i in range(start, start + n)
+    ])
+
+
+class CountingStore:
+    def __init__(self, store):
+        self.store = store
+        self.fetched = []
+
+    def max_id(self):
+        return self.store.max_id()
+
+    def fetch_since(self, last_id, market=None):
+        rows = self.store.fetch_since(last_id, market=market)
+        self.fetched.append(len(rows))
+        return rows
+
+
+def test_refresh_reads_only_new_rows(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    save(store, 5)
+    counting = CountingStore(store)
+    history = DecisionHistory(counting)
+
+    assert history.refresh() == 5
+    assert history.refresh() == 0
+    save(store, 3, start=5)
+    assert history.refresh() == 3
+
+    assert counting.fetched == [5, 0, 3]
+    assert list(history.frame.index) == list(range(1, 9))
+    assert history.frame['krw_balance'].iloc[-1] == 1_000_007.0
+    assert list(history.frame.columns)[0] == 'timestamp'
+
+
+def test_recreated_database_is_reloaded(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    save(store, 5)
+    history = DecisionHistory(store)
+    history.refresh()
+
+    other = DecisionStore(str(tmp_path / "new.sqlite"))
+    save(other, 2)
+    history.store = other
+    assert history.refresh() == 2
+    assert list(history.frame.index) == [1, 2]
+
+
+def test_empty_database_gives_empty_frame(tmp_path):
+    history = DecisionHistory(DecisionStore(str(tmp_path / "d.sqlite")))
+    assert history.refresh() == 0
+    assert history.frame.empty
+
+
+def test_history_reads_only_the_selected_market(tmp_path):
+    store = DecisionStore(str(tmp_path / "d.sqlite"))
+    save(store, 3)
+    store.save("buy", 20.0, "xrp", 1000.0, 500_000.0, 700.0, 710.0, market="KRW-XRP")
+    history = DecisionHistory(store, market="KRW-XRP")
+
+    assert history.refresh() == 1
+    assert history.frame['market'].tolist() == ["KRW-XRP"]
+    assert history.frame['btc_avg_buy_price'].iloc[-1] == 700.0
+    save(store, 2, start=3)
+    assert history.refresh() == 0
+    assert store.markets() == ["KRW-BTC", "KRW-XRP"]
+
+
+def test_history_reads_through_a_read_only_connection(tmp_path):
+    db_path = str(tmp_path / "d.sqlite")
+    history = DecisionHistory(ReadOnlyDecisionStore(db_path), market="KRW-BTC")
+    assert history.refresh() == 0
+
+    store = DecisionStore(db_path)
+    save(store, 4)
+    assert history.refresh() == 4
+    save(store, 1, start=4)
+    assert history.refresh() == 1
+    assert list(history.frame.index) == list(range(1, 6))
+
+
+def test_page_bounds_start_from_newest_rows():
+    assert page_bounds(120, 1, 50) == (70, 120)
+    assert page_bounds(120, 2, 50) == (20, 70)
+    assert page_bounds(120, 3, 50) == (0, 20)
+    assert page_bounds(0, 1, 50) == (0, 0)
@@ -0,0 +1,142 @@
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from translation_cache import TranslationCache, IdentityTranslator, _TextResult
+
+
+class CountingTranslator:
+    """호출 횟수와 요청된 문장을 기록하는 가짜 번역기"""
+
+    def __init__(self):
+        self.calls = []
+
+    def translate_text(self, text, target_lang=None, **kwargs):
+        self.calls.append(list(text))
+        return [_TextResult(f"[{target_lang}] {t}") for t in text]
+
+
+def test_repeated_text_is_served_from_cache(tmp_path):
+    translator = CountingTranslator()
+    cache = TranslationCache(tmp_path / "t.sqlite", translator=translator)
+
+    assert cache.translate("Buy the dip.") == "[KO] Buy the dip."
+    # 공백만 다른 문장은 같은 키를 사용
+    assert cache.translate("Buy  the dip.\n") == "[KO] Buy the dip."
+    assert len(translator.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_batch_translates_only_unique_misses_in_one_call(tmp_path):
+    translator = CountingTranslator()
+    cache = TranslationCache(tmp_path / "t.sqlite", translator=translator)
+    cache.translate("a")
+
+    result = cache.translate_batch(["a", "b", "c", "b"])
+
+    assert result == ["[KO] a", "[KO] b", "[KO] c", "[KO] b"]
+    assert translator.calls == [["a"], ["b", "c"]]
+
+
+def test_target_language_is_part_of_key(tmp_path):
+    translator = CountingTranslator()
+    cache = TranslationCache(tmp_path / "t.sqlite", translator=translator)
+
+    assert cache.translate("hello", "KO") == "[KO] hello"
+    assert cache.translate("hello", "JA") == "[JA] hello"
+    assert len(translator.calls) == 2
+
+
+def test_cache_persists_across_instances(tmp_path):
+    db_path = tmp_path / "t.sqlite"
+    TranslationCache(db_path, translator=CountingTranslator()).translate("hold")
+
+    translator = CountingTranslator()
+    assert TranslationCache(db_path, translator=translator).translate("hold") == "[KO] hold"
+    assert translator.calls == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    translator = CountingTranslator()
+    cache = TranslationCache(tmp_path / "t.sqlite", max_entries=2, translator=translator)
+    cache.translate("a")
+    cache.translate("b")
+    cache.translate("a")   # a를 최근 사용으로 갱신
+    cache.translate("c")   # 가장 오래 사용하지 않은 b가 제거됨
+
+    translator.calls.clear()
+    cache.translate_batch(["a", "c"])
+    assert translator.calls == []
+    cache.translate("b")
+    assert translator.calls == [["b"]]
+
+
+def test_identity_translator_results_are_not_stored(tmp_path):
+    db_path = tmp_path / "t.sqlite"
+    cache = TranslationCache(db_path, translator=IdentityTranslator())
+    assert cache.translate("Sell 50%.") == "Sell 50%."
+
+    translator = CountingTranslator()
+    assert TranslationCache(db_path, translator=translator).translate("Sell 50%.") == "[KO] Sell 50%."
+    assert len(translator.calls) == 1
+
+
+class BlockingTranslator(CountingTranslator):
+    """release가 설정될 때까지 응답하지 않는 가짜 번역기 (느린 DeepL 요청)"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def translate_text(self, text, target_lang=None, **kwargs):
+        self.started.set()
+        assert self.release.wait(5)
+        return super().translate_text(text, target_lang, **kwargs)
+
+
+def test_cached_lookup_does_not_wait_for_a_slow_translation(tmp_path):
+    translator = BlockingTranslator()
+    cache = TranslationCache(tmp_path / "t.sqlite", translator=translator)
+    translator.release.set()
+    cache.translate("cached")
+    translator.release.clear()
+
+    slow = threading.Thread(target=cache.translate, args=("slow",))
+    slow.start()
+    assert translator.started.wait(5)
+    results = []
+    lookup = threading.Thread(target=lambda: results.append(cache.translate("cached")))
+    lookup.start()
+    # 번역 요청이 끝나지 않아도 캐시된 문장은 바로 돌려줌
+    lookup.join(2)
+    done = not lookup.is_alive()
+    translator.release.set()
+    lookup.join(5)
+    slow.join(5)
+    assert done
+    assert results == ["[KO] cached"]
+    assert cache.translate("slow") == "[KO] slow"
+    assert translator.calls == [["cached"], ["slow"]]
+
+
+def test_connections_are_closed_after_each_batch(tmp_path):
+    cache = TranslationCache(tmp_path / "t.sqlite", translator=CountingTranslator())
+    opened = []
+    connect = cache._connect
+    cache._connect = lambda: opened.append(connect()) or opened[-1]
+
+    cache.translate_batch(["a", "b"])
+    cache.translate_batch(["a"])
+
+    assert len(opened) == 3
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
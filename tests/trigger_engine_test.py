@@ -0,0 +1,137 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 루트 디렉토리의 경로를 sys.path에 추가
+root_directory = Path(__file__).parent.parent
+sys.path.append(str(root_directory))
+
+from trigger_engine import (
+    TriggerEngine, CandleCache, MarketView, closed_candles,
+    rsi_extreme, band_break, sigma_move, volume_spike,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def candles(closes, volumes=None):
+    closes = np.asarray(closes, dtype=float)
+    index = pd.date_range("2024-04-01 09:00", periods=len(closes), freq="h")
+    return pd.DataFrame({
+        "open": closes, "high": closes * 1.002, "low": closes * 0.998, "close": closes,
+        "volume": volumes if volumes is not None else np.full(len(closes), 100.0),
+    }, index=index)
+
+
+def quiet_candles(n=50, price=100_000_000.0):
+    # 0.1% 안팎으로만 오르내리는 시간봉
+    return candles(price * (1 + 0.001 * np.sin(np.arange(n))))
+
+
+def always(reason):
+    def condition(view):
+        return reason if view.price > 0 else None
+    condition.__name__ = "always"
+    return condition
+
+
+def test_first_check_runs_immediately_and_quiet_market_waits_for_max_quiet():
+    clock = FakeClock()
+    engine = TriggerEngine(min_gap=900, max_quiet=8 * 3600, debounce=60, clock=clock)
+    view = lambda: engine.view("KRW-BTC", 100_000_000.0, quiet_candles())
+
+    first = engine.check([view()])
+    assert first.reasons == ["첫 실행"]
+    engine.mark_run({"KRW-BTC": 100_000_000.0})
+
+    while clock.now + 600 < engine.last_run + 8 * 3600:
+        clock.now += 600
+        assert engine.check([view()]) is None
+    clock.now = engine.last_run + 8 * 3600
+    assert engine.check([view()]).markets == []
+
+
+def test_debounce_min_gap_and_refire_after_reset():
+    clock = FakeClock()
+    active = {"on": False}
+
+    def flag(view):
+        return "조건" if active["on"] else None
+    flag.__name__ = "flag"
+
+    engine = TriggerEngine([flag], min_gap=900, max_quiet=10 ** 9, debounce=60, clock=clock)
+    engine.mark_run({})
+    check = lambda: engine.check([MarketView("KRW-ETH", 1.0, quiet_candles())])
+
+    clock.now += 300
+    active["on"] = True
+    assert check() is None            # 최소 간격 안 (조건은 이때부터 맞음)
+    clock.now += 630
+    trigger = check()                 # 간격이 지나면 그동안 맞아 있던 조건이 발동
+    assert trigger.markets == ["KRW-ETH"] and trigger.reasons == ["KRW-ETH: 조건"]
+    engine.mark_run({})
+
+    clock.now += 3600
+    assert check() is None            # 계속 맞아 있는 조건은 다시 발동하지 않음
+    active["on"] = False
+    assert check() is None
+    active["on"] = True
+    assert check() is None            # 다시 맞았지만 debounce 전
+    clock.now += 30
+    assert check() is None
+    clock.now += 30
+    assert check().markets == ["KRW-ETH"]
+
+
+def test_rsi_and_band_conditions_use_live_price():
+    history = quiet_candles()
+    price = history["close"].iloc[-1]
+    calm = MarketView("KRW-BTC", price, history)
+    assert rsi_extreme()(calm) is None
+    assert band_break()(calm) is None
+
+    crash = MarketView("KRW-BTC", price * 0.95, history)
+    assert rsi_extreme()(crash).startswith("RSI")
+    assert "하단" in band_break()(crash)
+    assert "상단" in band_break()(MarketView("KRW-BTC", price * 1.05, history))
+
+
+def test_sigma_move_scales_with_elapsed_time():
+    history = quiet_candles()
+    price = history["close"].iloc[-1]
+    condition = sigma_move(n_sigma=3)
+    assert condition(MarketView("KRW-BTC", price * 1.01, history)) is None   # 기준 가격 없음
+
+    # 시간봉 σ는 약 0.1%: 1시간에 1%는 큰 변동, 같은 변동이라도 긴 시간에 걸쳤으면 작은 변동
+    assert "σ" in condition(MarketView("KRW-BTC", price * 1.01, history, reference_price=price, elapsed=3600))
+    assert condition(MarketView("KRW-BTC", price * 1.001, history, reference_price=price, elapsed=3600)) is None
+
+
+def test_volume_spike_compares_last_closed_candle_to_median():
+    volumes = np.full(50, 100.0)
+    assert volume_spike()(MarketView("KRW-BTC", 1.0, candles(np.full(50, 1.0), volumes))) is None
+    volumes[-1] = 450.0
+    assert "4.5배" in volume_spike(multiplier=3)(MarketView("KRW-BTC", 1.0, candles(np.full(50, 1.0), volumes)))
+
+
+def test_closed_candles_and_hourly_cache():
+    history = candles(np.arange(1.0, 6.0))   # 09:00 ~ 13:00
+    assert list(closed_candles(history, now=datetime(2024, 4, 1, 13, 20)).index.hour) == [9, 10, 11, 12]
+
+    clock = FakeClock(now=3600 * 100 + 10)
+    fetches = []
+    cache = CandleCache(lambda ticker: fetches.append(ticker) or history, clock=clock)
+    for _ in range(5):
+        cache.get("KRW-BTC")
+    clock.now += 3600
+    cache.get("KRW-BTC")
+    assert fetches == ["KRW-BTC", "KRW-BTC"]
@@ -0,0 +1,157 @@
+"""
+DeepL 번역 결과를 디스크(SQLite)에 저장해 두는 내용 주소 기반 번역 캐시입니다.
+
+- 키: (목표 언어, 공백을 정리한 원문)의 SHA-256
+- 캐시에 없는 문장만 모아 DeepL에 한 번의 요청으로 번역합니다. (translate_batch)
+- 항목 수가 max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다. (LRU)
+- DeepL API 키가 없으면 원문을 그대로 돌려주는 로컬 번역기(IdentityTranslator)를 사용합니다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import http_client
+import metrics
+
+DB_PATH = 'translations.sqlite'
+MAX_ENTRIES = 5000
+
+
+class _TextResult:
+    def __init__(self, text):
+        self.text = text
+
+
+class IdentityTranslator:
+    """deepl.Translator와 같은 방식으로 호출할 수 있는 로컬 대역. 원문을 그대로 돌려줍니다."""
+
+    cacheable = False   # 원문을 번역문으로 저장해 두면 나중에 API 키를 설정해도 번역되지 않으므로 저장하지 않음
+
+    def translate_text(self, text, target_lang=None, **kwargs):
+        if isinstance(text, str):
+            return _TextResult(text)
+        return [_TextResult(t) for t in text]
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+def cache_key(text, target_lang):
+    return hashlib.sha256(f"{target_lang}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def get_translator():
+    api_key = os.getenv("DEEPL_API_KEY")
+    if not api_key:
+        print("DeepL API 키가 설정되지 않아 원문을 그대로 사용합니다.")
+        return IdentityTranslator()
+    return http_client.get_deepl_translator(api_key)
+
+
+class TranslationCache:
+    def __init__(self, db_path=DB_PATH, max_entries=MAX_ENTRIES, translator=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.translator = translator
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self._initialized:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT PRIMARY KEY,
+                    target_lang TEXT,
+                    source TEXT,
+                    translated TEXT,
+                    last_used REAL
+                );
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)')
+            self._initialized = True
+        return conn
+
+    def translate_batch(self, texts, target_lang="KO"):
+        """
+        여러 문장을 번역합니다. 캐시에 없는 문장만 중복 없이 모아 번역기를 한 번 호출합니다.
+        번역기(네트워크) 호출 중에는 잠금을 풀어 두므로 다른 스레드의 캐시 조회가 기다리지 않습니다.
+
+        반환값:
+        - list: 입력 순서와 같은 순서의 번역문입니다.
+        """
+        keys = [cache_key(text, target_lang) for text in texts]
+        now = time.time()
+        # 1) 캐시 조회 (사용 시각 갱신)
+        with self._lock, closing(self._connect()) as conn:
+            found = {}
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                cursor = conn.execute(
+                    f'SELECT key, translated FROM translations WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                )
+                found.update(cursor.fetchall())
+            if found:
+                conn.executemany('UPDATE translations SET last_used = ? WHERE key = ?', [(now, key) for key in found])
+                conn.commit()
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in missing:
+                    missing[key] = text
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += len(missing)
+
+        if missing:
+            # 2) 번역기 호출 (잠금 없이)
+            translator = self.translator or get_translator()
+            cacheable = getattr(translator, "cacheable", True)
+            if cacheable:
+                metrics.inc("api_calls", service="deepl")
+            results = translator.translate_text(list(missing.values()), target_lang=target_lang)
+            rows = []
+            for (key, source), result in zip(missing.items(), results):
+                found[key] = result.text
+                rows.append((key, target_lang, source, result.text, now))
+
+            # 3) 번역 결과 저장
+            if cacheable:
+                with self._lock, closing(self._connect()) as conn:
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO translations (key, target_lang, source, translated, last_used)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', rows)
+                    self._evict(conn)
+                    conn.commit()
+
+        return [found[key] for key in keys]
+
+    def translate(self, text, target_lang="KO"):
+        return self.translate_batch([text], target_lang)[0]
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('''
+                DELETE FROM translations WHERE key IN (
+                    SELECT key FROM translations ORDER BY last_used ASC LIMIT ?
+                )
+            ''', (count - self.max_entries,))
+
+
+translation_cache = TranslationCache()
+
+
+def translate_batch(texts, target_lang="KO"):
+    return translation_cache.translate_batch(texts, target_lang)
+
+
+def translate(text, target_lang="KO"):
+    return translation_cache.translate(text, target_lang)
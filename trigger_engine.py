@@ -0,0 +1,189 @@
+"""
+정해진 시각마다 사이클을 돌리는 대신, 실시간 시세에서 값싼 조건을 확인해 조건이 맞을 때만 사이클을 시작하는 트리거 엔진입니다.
+
+조건 (MarketView 하나를 받아 사유 문자열 또는 None을 돌려주는 함수):
+- rsi_extreme: 진행 중인 시간봉을 현재가로 본 RSI_14가 과매도/과매수 구간
+- band_break: 현재가가 볼린저 밴드 밖
+- sigma_move: 마지막 사이클 이후 가격 변동이 시간봉 변동성(σ) 기준 N배를 넘음
+- volume_spike: 마지막으로 마감된 시간봉 거래량이 직전 24개 중앙값의 N배를 넘음
+
+규칙:
+- debounce: 조건이 debounce초 동안 계속 맞아야 발동합니다. (한 번 튄 값에 반응하지 않음)
+- 발동한 조건은 조건이 풀렸다가 다시 맞을 때까지 다시 발동하지 않습니다.
+- min_gap: 마지막 사이클 시작 후 min_gap초 안에는 시작하지 않습니다. (그동안 맞은 조건은 간격이 지나면 발동)
+- max_quiet: 조건이 없어도 마지막 사이클 후 max_quiet초가 지나면 시작합니다.
+"""
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from indicators import compute_indicators, INDICATOR_COLUMNS
+
+CANDLE_COUNT = 50   # 조건 계산에 쓰는 시간봉 수 (RSI_14, 볼린저 20, 변동성/거래량 24개)
+KST = timezone(timedelta(hours=9))   # 업비트 캔들 인덱스의 시간대
+
+
+def closed_candles(candles, now=None):
+    """진행 중인 시간봉을 뺀 마감된 시간봉만 돌려줍니다."""
+    current = (now or datetime.now(KST)).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    return candles[candles.index < current]
+
+
+class MarketView:
+    """조건 확인에 쓰는 한 마켓의 현재 상태 (현재가 + 마감된 시간봉 + 마지막 사이클 때 가격)"""
+
+    def __init__(self, market, price, candles, reference_price=None, elapsed=None):
+        self.market = market
+        self.price = float(price)
+        self.candles = candles
+        self.reference_price = reference_price
+        self.elapsed = elapsed   # 마지막 사이클 이후 지난 시간(초)
+        self._live = None
+
+    def live_indicators(self):
+        """진행 중인 시간봉을 현재가로 채워 계산한 마지막 지표 값 {컬럼: 값} (한 번만 계산)"""
+        if self._live is None:
+            closes = np.append(self.candles['close'].to_numpy(dtype=float), self.price)
+            highs = np.append(self.candles['high'].to_numpy(dtype=float), self.price)
+            lows = np.append(self.candles['low'].to_numpy(dtype=float), self.price)
+            values = compute_indicators(highs, lows, closes)[-1]
+            self._live = dict(zip(INDICATOR_COLUMNS, values))
+        return self._live
+
+
+def rsi_extreme(low=30, high=70):
+    def condition(view):
+        rsi = view.live_indicators()['RSI_14']
+        if rsi < low:
+            return f"RSI {rsi:.1f} < {low}"
+        if rsi > high:
+            return f"RSI {rsi:.1f} > {high}"
+        return None
+    condition.__name__ = "rsi_extreme"
+    return condition
+
+
+def band_break():
+    def condition(view):
+        values = view.live_indicators()
+        if view.price > values['Upper_Band']:
+            return f"볼린저 상단 돌파 ({view.price:,.0f} > {values['Upper_Band']:,.0f})"
+        if view.price < values['Lower_Band']:
+            return f"볼린저 하단 이탈 ({view.price:,.0f} < {values['Lower_Band']:,.0f})"
+        return None
+    condition.__name__ = "band_break"
+    return condition
+
+
+def sigma_move(n_sigma=3.0, window=24):
+    def condition(view):
+        if not view.reference_price or not view.elapsed:
+            return None
+        closes = view.candles['close'].to_numpy(dtype=float)[-(window + 1):]
+        if len(closes) < 3:
+            return None
+        sigma = np.std(np.diff(np.log(closes)), ddof=1)   # 시간봉 로그 수익률의 표준편차
+        scaled = sigma * math.sqrt(max(view.elapsed, 60) / 3600)
+        move = math.log(view.price / view.reference_price)
+        if scaled > 0 and abs(move) > n_sigma * scaled:
+            return f"{move * 100:+.2f}% 변동 ({abs(move) / scaled:.1f}σ)"
+        return None
+    condition.__name__ = "sigma_move"
+    return condition
+
+
+def volume_spike(multiplier=3.0, window=24):
+    def condition(view):
+        volumes = view.candles['volume'].to_numpy(dtype=float)
+        if len(volumes) < window + 1:
+            return None
+        median = np.median(volumes[-(window + 1):-1])
+        if median > 0 and volumes[-1] > multiplier * median:
+            return f"거래량 급증 (중앙값의 {volumes[-1] / median:.1f}배)"
+        return None
+    condition.__name__ = "volume_spike"
+    return condition
+
+
+DEFAULT_CONDITIONS = (rsi_extreme(), band_break(), sigma_move(), volume_spike())
+
+
+class Trigger:
+    def __init__(self, reasons, markets):
+        self.reasons = reasons   # ["KRW-BTC: RSI 25.1 < 30", ...]
+        self.markets = markets   # 조건이 맞은 마켓 (최대 대기 시간 경과로 시작하면 빈 목록)
+
+    def __repr__(self):
+        return ", ".join(self.reasons)
+
+
+class TriggerEngine:
+    def __init__(self, conditions=DEFAULT_CONDITIONS, min_gap=15 * 60, max_quiet=8 * 3600, debounce=60, clock=time.time):
+        self.conditions = list(conditions)
+        self.min_gap = min_gap
+        self.max_quiet = max_quiet
+        self.debounce = debounce
+        self.clock = clock
+        self.last_run = None
+        self.reference_prices = {}
+        self._since = {}     # (마켓, 조건) -> 조건이 처음 맞은 시각
+        self._fired = set()  # 발동한 뒤 아직 풀리지 않은 (마켓, 조건)
+
+    def elapsed(self):
+        return None if self.last_run is None else self.clock() - self.last_run
+
+    def view(self, market, price, candles):
+        """현재 상태로 MarketView를 만듭니다. (마지막 사이클 때 가격과 경과 시간 포함)"""
+        return MarketView(market, price, candles, self.reference_prices.get(market), self.elapsed())
+
+    def check(self, views):
+        """조건을 확인해 사이클을 시작해야 하면 Trigger를, 아니면 None을 돌려줍니다."""
+        now = self.clock()
+        ready = []
+        for view in views:
+            for condition in self.conditions:
+                key = (view.market, condition.__name__)
+                reason = condition(view)
+                if reason is None:
+                    self._since.pop(key, None)
+                    self._fired.discard(key)
+                    continue
+                since = self._since.setdefault(key, now)
+                if key not in self._fired and now - since >= self.debounce:
+                    ready.append((key, f"{view.market}: {reason}"))
+
+        if self.last_run is None:
+            return Trigger(["첫 실행"], [])
+        if now - self.last_run < self.min_gap:
+            return None
+        if ready:
+            self._fired.update(key for key, _ in ready)
+            markets = list(dict.fromkeys(key[0] for key, _ in ready))
+            return Trigger([reason for _, reason in ready], markets)
+        if now - self.last_run >= self.max_quiet:
+            return Trigger([f"{self.max_quiet / 3600:g}시간 동안 조건 없음"], [])
+        return None
+
+    def mark_run(self, prices):
+        """사이클을 시작할 때 호출합니다. 이때의 가격이 다음 sigma_move의 기준이 됩니다."""
+        self.last_run = self.clock()
+        self.reference_prices.update(prices or {})
+
+
+class CandleCache:
+    """조건 확인용 시간봉을 시간이 바뀔 때만 다시 가져옵니다. (fetch: ticker -> DataFrame)"""
+
+    def __init__(self, fetch, clock=time.time):
+        self.fetch = fetch
+        self.clock = clock
+        self._cache = {}
+
+    def get(self, ticker):
+        hour = int(self.clock() // 3600)
+        cached = self._cache.get(ticker)
+        if cached is None or cached[0] != hour:
+            cached = (hour, self.fetch(ticker))
+            self._cache[ticker] = cached
+        return cached[1]